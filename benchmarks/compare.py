@@ -0,0 +1,57 @@
+"""
+Compare two saved benchmark runs metric by metric.
+
+    python benchmarks/compare.py                  # two most recent runs in benchmarks/results
+    python benchmarks/compare.py old.json new.json
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def flatten(metrics: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def load(path: Path) -> dict:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {"meta": data.get("meta", {}), "metrics": flatten(data.get("benchmarks", {}))}
+
+
+def main(argv) -> int:
+    if len(argv) == 2:
+        old_path, new_path = Path(argv[0]), Path(argv[1])
+    elif not argv:
+        runs = sorted(RESULTS_DIR.glob("*.json"))
+        if len(runs) < 2:
+            print(f"need two runs in {RESULTS_DIR}", file=sys.stderr)
+            return 2
+        old_path, new_path = runs[-2], runs[-1]
+    else:
+        print(__doc__, file=sys.stderr)
+        return 2
+    old, new = load(old_path), load(new_path)
+    print(f"old: {old_path.name} ({old['meta'].get('commit')})")
+    print(f"new: {new_path.name} ({new['meta'].get('commit')})")
+    for key in sorted(set(old["metrics"]) | set(new["metrics"])):
+        a, b = old["metrics"].get(key), new["metrics"].get(key)
+        if a is None or b is None:
+            print(f"{key:<60} {a!s:>14} {b!s:>14}")
+            continue
+        change = f"{(b - a) / a * 100:+.1f}%" if a else ""
+        print(f"{key:<60} {a:>14.6g} {b:>14.6g} {change:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,183 @@
+"""
+Shared fixtures for the harness benchmarks.
+
+Results are collected with the ``bench`` fixture, printed as a table at the
+end of the run and saved to ``benchmarks/results/<UTC stamp>-<commit>.json``
+for comparison across commits (see ``benchmarks/compare.py``).
+"""
+
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from latency_histogram import LatencyHistogram  # noqa: E402
+
+# Mock target used by every benchmark: fixed time to first chunk, quick streaming
+MOCK_FIRST_TOKEN_SECONDS = 0.05
+MOCK_ARGS = ["--latency", "fixed", "--latency-mean", str(MOCK_FIRST_TOKEN_SECONDS),
+             "--stream-chunks", "4", "--chunk-interval", "0.01", "--reply-words", "20"]
+MOCK_REPLY_SECONDS = MOCK_FIRST_TOKEN_SECONDS + 3 * 0.01
+
+_results: Dict[str, dict] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "harness benchmarks")
+    group.addoption("--bench-seconds", type=float, default=2.0,
+                    help="duration of each measurement step (seconds)")
+    group.addoption("--bench-dir", default=str(ROOT / "benchmarks" / "results"),
+                    help="where JSON results are saved")
+    group.addoption("--bench-no-save", action="store_true", help="do not save JSON results")
+
+
+class BenchRecorder:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def record(self, name: str, **metrics) -> None:
+        _results[name] = metrics
+
+
+@pytest.fixture(scope="session")
+def bench(request) -> BenchRecorder:
+    return BenchRecorder(request.config.getoption("--bench-seconds"))
+
+
+def summarize(values: List[float]) -> dict:
+    """Median/p95/mean (seconds) of a list of timings."""
+    hist = LatencyHistogram(lowest=0.00001)
+    for value in values:
+        hist.record(value)
+    return {"p50": hist.percentile(50), "p95": hist.percentile(95), "mean": hist.mean, "n": hist.count}
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process (Linux /proc); None elsewhere."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def process_tree(pid: int) -> List[int]:
+    """pid plus all its descendants (Linux /proc)."""
+    children: Dict[int, List[int]] = {}
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def chrome_available() -> bool:
+    return any(shutil.which(name) for name in ("google-chrome", "google-chrome-stable", "chromium",
+                                               "chromium-browser", "chrome"))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def mock_url():
+    """Mock Darcy in a separate process, so its CPU is not charged to the harness."""
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, str(ROOT / "src" / "mock_darcy.py"), "--port", str(port)] + MOCK_ARGS,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            requests.get(url + "/mock/stats", timeout=0.5)
+            break
+        except requests.RequestException:
+            time.sleep(0.1)
+    else:
+        proc.kill()
+        pytest.skip("mock server did not start")
+    yield url
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value * 1000:.2f} ms" if value < 1 else f"{value:.3f}"
+    return str(value)
+
+
+def _flatten(metrics: dict, prefix: str = "") -> Dict[str, object]:
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("harness benchmarks")
+    for name, metrics in _results.items():
+        terminalreporter.write_line(name)
+        for key, value in _flatten(metrics).items():
+            terminalreporter.write_line(f"    {key:<45} {_fmt(value)}")
+
+
+def pytest_sessionfinish(session):
+    if not _results or session.config.getoption("--bench-no-save", default=True):
+        return
+    commit = _git_commit()
+    out_dir = Path(session.config.getoption("--bench-dir"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = out_dir / f"{stamp}-{commit}.json"
+    path.write_text(json.dumps({
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mock_reply_seconds": MOCK_REPLY_SECONDS,
+        },
+        "benchmarks": _results,
+    }, indent=2), encoding="utf-8")
+    session.config.pluginmanager.get_plugin("terminalreporter").write_line(f"benchmark results saved to {path}")
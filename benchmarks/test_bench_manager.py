@@ -0,0 +1,131 @@
+"""
+BotManager benchmarks against the mock target (HTTP backend; no browser needed).
+"""
+
+import os
+import time
+
+import pytest
+
+from bot_manager import BotManager
+from conftest import MOCK_REPLY_SECONDS, rss_bytes, summarize
+
+RATE_LADDER = (2, 5, 10, 15, 20, 30, 50, 100, 200)
+RATE_TOLERANCE = 0.1  # achieved rate may trail the target by this fraction
+
+
+def make_manager(tmp_path, mock_url, **kwargs) -> BotManager:
+    questions = tmp_path / "questions.txt"
+    questions.write_text("Qual o prazo de matrícula?\nOnde fica a biblioteca?\n", encoding="utf-8")
+    options = dict(
+        url=mock_url + "/my/",
+        questions_file=str(questions),
+        backend="http",
+        http_backend={"endpoint": mock_url + "/api/chat"},
+        interval_seconds=0.0,
+        jitter=0.0,
+        wait_for_manual_login=False,
+        capture_responses=False,
+        log_dir=str(tmp_path / "logs"),
+    )
+    options.update(kwargs)
+    return BotManager(**options)
+
+
+class TestManagerBenchmarks:
+    """Throughput, overhead and memory of the BotManager harness."""
+
+    def test_sustainable_rate_per_worker(self, bench, tmp_path, mock_url):
+        """Highest open-model arrival rate one worker keeps up with (no missed, <5% late, on target)."""
+        manager = make_manager(tmp_path, mock_url, concurrency=1, mode="open", arrival_rate=RATE_LADDER[0])
+        assert manager.start()
+        steps = []
+        sustainable = 0.0
+        cpu_start, sent_start = time.process_time(), 0
+        try:
+            time.sleep(0.5)  # session warm-up
+            for rate in RATE_LADDER:
+                manager.arrival_rate = rate
+                # Skip the slot in flight across the rate step before measuring
+                time.sleep(max(2.0 / rate, 0.2))
+                before = manager.metrics()["open_model"]
+                time.sleep(bench.seconds)
+                after = manager.metrics()["open_model"]
+                scheduled = after["slots_scheduled"] - before["slots_scheduled"]
+                late = after["slots_late"] - before["slots_late"]
+                missed = after["slots_missed"] - before["slots_missed"]
+                achieved = (after["completed"] - before["completed"]) / bench.seconds
+                steps.append({"target_rate": rate, "achieved_rate": achieved, "late": late, "missed": missed})
+                if (missed or (scheduled and late / scheduled > 0.05)
+                        or achieved < rate * (1 - RATE_TOLERANCE)):
+                    break
+                sustainable = float(rate)
+            sent = manager.metrics()["messages_sent"] - sent_start
+            cpu = time.process_time() - cpu_start
+        finally:
+            manager.stop()
+        bench.record(
+            "manager.http.sustainable_rate",
+            max_sustainable_rate_per_worker=sustainable,
+            ideal_rate_per_worker=1.0 / MOCK_REPLY_SECONDS,
+            cpu_seconds_per_message=(cpu / sent) if sent else None,
+            messages_per_core_second=(sent / cpu) if cpu else None,
+            steps={f"{s['target_rate']}/s": s["achieved_rate"] for s in steps},
+        )
+        assert sustainable > 0
+        for step in steps:
+            if step["target_rate"] <= sustainable:
+                assert step["achieved_rate"] == pytest.approx(step["target_rate"], rel=RATE_TOLERANCE)
+
+    def test_latency_overhead(self, bench, tmp_path, mock_url):
+        """Measured latency minus the mock's own reply time, at a rate well below saturation."""
+        manager = make_manager(tmp_path, mock_url, concurrency=2, mode="open", arrival_rate=5)
+        assert manager.start()
+        try:
+            time.sleep(bench.seconds * 2)
+        finally:
+            manager.stop()
+        response = manager.latency_stats["response"].overall
+        assert response.count > 0
+        bench.record(
+            "manager.http.latency",
+            mock_reply_seconds=MOCK_REPLY_SECONDS,
+            response_p50=response.percentile(50),
+            response_p95=response.percentile(95),
+            overhead_p50=response.percentile(50) - MOCK_REPLY_SECONDS,
+            overhead_p95=response.percentile(95) - MOCK_REPLY_SECONDS,
+        )
+
+    @pytest.mark.skipif(rss_bytes(os.getpid()) is None, reason="needs /proc to read memory usage")
+    def test_memory_per_session(self, bench, tmp_path, mock_url):
+        """Resident memory added per HTTP session (in this process)."""
+        sessions = 20
+        before = rss_bytes(os.getpid())
+        manager = make_manager(tmp_path, mock_url, concurrency=sessions, interval_seconds=0.5)
+        assert manager.start()
+        try:
+            time.sleep(bench.seconds)
+            after = rss_bytes(os.getpid())
+        finally:
+            manager.stop()
+        bench.record(
+            "manager.http.memory",
+            sessions=sessions,
+            rss_delta_bytes=after - before,
+            bytes_per_session=(after - before) / sessions,
+        )
+
+    def test_send_phases(self, bench, tmp_path, mock_url):
+        """Per-message split between sending and waiting for the reply (HTTP backend)."""
+        manager = make_manager(tmp_path, mock_url, concurrency=1)
+        client = manager._new_automator()
+        assert client.start()
+        first, complete = [], []
+        deadline = time.monotonic() + bench.seconds
+        while time.monotonic() < deadline:
+            result = client.send_message("Qual o prazo de matrícula?")
+            assert result.ok, result.error
+            first.append(result.first_token_seconds)
+            complete.append(result.complete_seconds)
+        client.close()
+        bench.record("manager.http.phases", headers=summarize(first), complete=summarize(complete))
@@ -0,0 +1,107 @@
+"""
+Selenium harness benchmarks against the mock target (skipped without Chrome).
+"""
+
+import time
+
+import pytest
+
+from conftest import MOCK_REPLY_SECONDS, chrome_available, process_tree, rss_bytes, summarize
+
+pytestmark = pytest.mark.skipif(not chrome_available(), reason="Chrome is not installed")
+
+SELECTORS = {"iframe_id": "tool_content", "input_tag": "textarea", "bot_message_css": ".bot-message"}
+MESSAGES = 20
+
+
+def chrome_rss(driver) -> int:
+    """Memory of the chromedriver process and every Chrome process under it."""
+    pid = driver.service.process.pid
+    return sum(rss_bytes(p) or 0 for p in process_tree(pid))
+
+
+class TestSeleniumBenchmarks:
+    """Per-phase WebDriver overhead and memory per browser session."""
+
+    def test_chatbot_automator_phases(self, bench, mock_url):
+        """Time spent per phase of ChatbotAutomator.send_message."""
+        from chatbot_automator import ChatbotAutomator
+
+        automator = ChatbotAutomator(mock_url + "/my/", headless=True, selectors=SELECTORS,
+                                     response_settle_seconds=0.2, response_timeout=10)
+        if not automator.start():
+            pytest.skip("WebDriver could not start")
+        try:
+            phases, complete = {}, []
+            for i in range(MESSAGES):
+                result = automator.send_message(f"Pergunta {i}")
+                assert result.ok, result.error
+                for name, seconds in result.phases.items():
+                    phases.setdefault(name, []).append(seconds)
+                if result.complete_seconds is not None:
+                    complete.append(result.complete_seconds)
+            memory = chrome_rss(automator.driver)
+        finally:
+            automator.close()
+        bench.record(
+            "selenium.automator",
+            phases={name: summarize(values) for name, values in phases.items()},
+            reply_complete=summarize(complete),
+            mock_reply_seconds=MOCK_REPLY_SECONDS,
+            session_rss_bytes=memory,
+        )
+
+    def test_lean_profile_memory(self, bench, mock_url):
+        """Chrome memory per session with the default and the lean browser profile."""
+        from browser_profile import BrowserProfile
+        from chatbot_automator import ChatbotAutomator
+
+        memory = {}
+        for name, lean in (("default", False), ("lean", True)):
+            automator = ChatbotAutomator(mock_url + "/my/", headless=True, selectors=SELECTORS,
+                                         response_settle_seconds=0.2, response_timeout=10,
+                                         browser_profile=BrowserProfile(lean=lean))
+            if not automator.start():
+                pytest.skip("WebDriver could not start")
+            try:
+                for i in range(5):
+                    assert automator.send_message(f"Pergunta {i}").ok
+                memory[name] = chrome_rss(automator.driver)
+            finally:
+                automator.close()
+        bench.record(
+            "selenium.browser_profile",
+            default_rss_bytes=memory["default"],
+            lean_rss_bytes=memory["lean"],
+            lean_saving=1 - memory["lean"] / memory["default"] if memory["default"] else None,
+        )
+
+    def test_darcy_tester_overhead(self, bench, mock_url):
+        """DarcyChatbotTester send + response capture versus the mock's reply time."""
+        from darcy_tester import DarcyChatbotTester
+
+        # The tester looks up the input in the top document, so it opens the chat page itself
+        try:
+            tester = DarcyChatbotTester(headless=True, base_url=mock_url + "/chat")
+        except Exception as e:
+            pytest.skip(f"WebDriver could not start: {e}")
+        try:
+            assert tester.navigate_to_chatbot()
+            send, response = [], []
+            for i in range(5):
+                started = time.monotonic()
+                assert tester.send_message_to_chatbot(f"Pergunta {i}")
+                sent = time.monotonic()
+                assert tester.get_chatbot_response()
+                send.append(sent - started)
+                response.append(time.monotonic() - sent)
+            memory = chrome_rss(tester.driver)
+        finally:
+            tester.close()
+        bench.record(
+            "selenium.darcy_tester",
+            send=summarize(send),
+            get_response=summarize(response),
+            response_overhead_p50=summarize(response)["p50"] - MOCK_REPLY_SECONDS,
+            session_rss_bytes=memory,
+        )
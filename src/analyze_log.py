@@ -0,0 +1,614 @@
+"""
+Streaming analysis of a run's message log (``logs/messages.csv`` or a run log).
+
+The log is read once, row by row or in chunks; memory grows with the number
+of time buckets and distinct questions, never with the number of rows::
+
+    python src/analyze_log.py logs/messages.csv --bucket 60 --top 20
+    python src/analyze_log.py runs/20250101T120000 --json > report.json
+
+Reports throughput over time, latency percentiles (log-bucketed histograms),
+error and empty-response rates, the slowest messages and per-question stats.
+With pandas installed, CSVs are processed in vectorized chunks
+(``--engine auto``, the default); otherwise a plain ``csv`` loop is used.
+Both engines produce the same report.
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from latency_histogram import LatencyHistogram
+from run_log import iter_records, parse_timestamp
+
+ENGINES = ("auto", "python", "pandas")
+OTHER = "(other)"
+# messages.csv stores booleans as 1/0; older logs wrote True/False
+_TRUE = frozenset(("1", "True", "true"))
+
+
+def _stamp_epoch(stamp: str) -> Optional[float]:
+    """``parse_timestamp``, falling back to the whole seconds of a stamp."""
+    value = parse_timestamp(stamp)
+    return value if value is not None else parse_timestamp(stamp[:19])
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None:
+        return None
+    moment = datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+    return moment.isoformat(timespec='seconds')
+
+
+class _Series:
+    """Counters and sparse latency-bucket counts of a bucket or question."""
+
+    __slots__ = ("sent", "errors", "empty", "total", "max", "counts")
+
+    def __init__(self):
+        self.sent = 0
+        self.errors = 0
+        self.empty = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.counts: Dict[int, int] = {}
+
+    def merge(self, other: "_Series") -> None:
+        self.sent += other.sent
+        self.errors += other.errors
+        self.empty += other.empty
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+
+    def histogram(self, layout: LatencyHistogram) -> LatencyHistogram:
+        hist = LatencyHistogram(layout.lowest, layout.highest,
+                                layout.precision)
+        hist.counts = self.counts
+        hist.count = sum(self.counts.values())
+        hist.total = self.total
+        hist.max = self.max if hist.count else None
+        return hist
+
+
+class RunAnalysis:
+    """One-pass accumulator for a message log.
+
+    Rows go through ``add()`` (or ``add_chunk()`` for pandas DataFrames);
+    ``report()`` builds the summary at any point. Questions beyond
+    ``max_questions`` distinct texts (and error kinds beyond
+    ``max_error_kinds``) are counted under ``(other)`` so memory stays
+    bounded on unbounded input.
+    """
+
+    def __init__(self, bucket_seconds: int = 60, top: int = 10,
+                 max_questions: int = 10000, max_error_kinds: int = 100):
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        self.top = top
+        self.max_questions = max_questions
+        self.max_error_kinds = max_error_kinds
+        self.rows = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        # Bucket layout; its min is the run's minimum latency
+        self.latency = LatencyHistogram()
+        self.buckets: Dict[int, _Series] = {}
+        self.questions: Dict[str, _Series] = {}
+        self.error_kinds: Dict[str, int] = {}
+        # Min-heap of (latency, seq, timestamp, message)
+        self._slowest: List[tuple] = []
+        self._seq = 0
+        self._log_lowest = self.latency.lowest
+        self._log_base = self.latency._log_base
+        self._last_index = self.latency.bucket_count - 1
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self._log_lowest:
+            return 0
+        index = int(math.log(value / self._log_lowest) / self._log_base)
+        return min(index, self._last_index)
+
+    def _question(self, message: str) -> _Series:
+        series = self.questions.get(message)
+        if series is None:
+            if len(self.questions) >= self.max_questions:
+                message = OTHER
+                series = self.questions.get(OTHER)
+            if series is None:
+                series = self.questions[message] = _Series()
+        return series
+
+    def _count_error(self, error: str, n: int = 1) -> None:
+        error = (error or "").strip()
+        kind = error.splitlines()[0][:80] if error else "unknown"
+        if (kind not in self.error_kinds
+                and len(self.error_kinds) >= self.max_error_kinds):
+            kind = OTHER
+        self.error_kinds[kind] = self.error_kinds.get(kind, 0) + n
+
+    def _offer_slowest(self, latency: float, timestamp: float,
+                       message: str) -> None:
+        entry = (latency, self._seq, timestamp, message)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif latency > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        self._seq += 1
+
+    def add(self, timestamp: float, message: str, ok: bool, error: str = "",
+            empty: bool = False, latency: Optional[float] = None) -> None:
+        """Account for one logged message.
+
+        ``latency`` is in seconds, None if unknown.
+        """
+        self.rows += 1
+        if self.first is None or timestamp < self.first:
+            self.first = timestamp
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+        bucket_key = int(timestamp // self.bucket_seconds)
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self.buckets[bucket_key] = _Series()
+        question = self._question(message)
+        # Run totals are the sum of the time buckets
+        touched = (bucket, question)
+        if not ok:
+            for series in touched:
+                series.sent += 1
+                series.errors += 1
+            self._count_error(error)
+            return
+        index = None if latency is None else self._bucket_index(latency)
+        for series in touched:
+            series.sent += 1
+            if empty:
+                series.empty += 1
+            if index is not None:
+                series.total += latency
+                if latency > series.max:
+                    series.max = latency
+                series.counts[index] = series.counts.get(index, 0) + 1
+        if latency is not None:
+            if self.latency.min is None or latency < self.latency.min:
+                self.latency.min = latency
+            if self.top and (len(self._slowest) < self.top
+                             or latency > self._slowest[0][0]):
+                self._offer_slowest(latency, timestamp, message)
+
+    def _bucket(self, key: int) -> _Series:
+        series = self.buckets.get(key)
+        if series is None:
+            series = self.buckets[key] = _Series()
+        return series
+
+    def add_chunk(self, frame) -> None:
+        """Vectorized ``add()`` for a pandas DataFrame.
+
+        Columns: ``timestamp`` (epoch seconds), ``message``, ``ok``,
+        ``error``, ``empty`` and ``latency`` (NaN when unknown).
+        """
+        import numpy as np
+        import pandas as pd
+
+        if frame.empty:
+            return
+        self.rows += len(frame)
+        timestamps = frame["timestamp"].to_numpy(dtype=float)
+        first, last = float(timestamps.min()), float(timestamps.max())
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+        ok = frame["ok"].to_numpy(dtype=bool)
+        latency = frame["latency"].to_numpy(dtype=float)
+        timed = ok & ~np.isnan(latency)
+        timed_latency = np.where(timed, latency, 0.0)
+        # Same bucket as LatencyHistogram._index; values <= lowest go to 0
+        scaled = np.maximum(timed_latency, self._log_lowest) / self._log_lowest
+        index = np.minimum((np.log(scaled) / self._log_base).astype(np.int64),
+                           self._last_index)
+        if timed.any():
+            chunk_min = float(latency[timed].min())
+            if self.latency.min is None or chunk_min < self.latency.min:
+                self.latency.min = chunk_min
+
+        codes, messages = pd.factorize(frame["message"].to_numpy())
+        # Questions past max_questions map to (other)
+        question_series = [self._question(m) for m in messages]
+        values = pd.DataFrame({
+            "failed": ~ok,
+            "empty": ok & frame["empty"].to_numpy(dtype=bool),
+            "latency": timed_latency,
+        })
+        groupings = (
+            ((timestamps // self.bucket_seconds).astype(np.int64),
+             self._bucket),
+            (codes, question_series.__getitem__),
+        )
+        for keys, series_for in groupings:
+            totals = values.groupby(keys, sort=False).agg(
+                sent=("failed", "size"), errors=("failed", "sum"),
+                empty=("empty", "sum"), total=("latency", "sum"),
+                peak=("latency", "max"))
+            for key, sent, errors, empty, total, peak in totals.itertuples():
+                series = series_for(int(key))
+                series.sent += int(sent)
+                series.errors += int(errors)
+                series.empty += int(empty)
+                series.total += float(total)
+                series.max = max(series.max, float(peak))
+            pairs = pd.Series(index[timed]).groupby(
+                [keys[timed], index[timed]], sort=False).size()
+            for (key, idx), n in pairs.items():
+                counts = series_for(int(key)).counts
+                counts[int(idx)] = counts.get(int(idx), 0) + int(n)
+
+        for error, n in frame["error"][~ok].value_counts().items():
+            self._count_error(error, int(n))
+        if self.top and timed.any():
+            for i in np.argsort(timed_latency)[-self.top:]:
+                value = float(timed_latency[i])
+                if timed[i] and (len(self._slowest) < self.top
+                                 or value > self._slowest[0][0]):
+                    self._offer_slowest(value, float(timestamps[i]),
+                                        messages[codes[i]])
+
+    def report(self, questions: Optional[int] = None) -> dict:
+        """Summary dict.
+
+        ``questions`` limits the per-question table (most sent first).
+        """
+        totals = _Series()
+        for series in self.buckets.values():
+            totals.merge(series)
+        overall = totals.histogram(self.latency)
+        overall.min = self.latency.min
+        duration = (self.last - self.first) if self.rows else 0.0
+        timeline = []
+        for key in sorted(self.buckets):
+            series = self.buckets[key]
+            hist = series.histogram(self.latency)
+            timeline.append({
+                "start": _iso(key * self.bucket_seconds),
+                "sent": series.sent,
+                "errors": series.errors,
+                "empty": series.empty,
+                "per_second": series.sent / self.bucket_seconds,
+                "p50": hist.percentile(50),
+                "p95": hist.percentile(95),
+                "max": hist.max,
+            })
+        ranked = sorted(self.questions.items(),
+                        key=lambda item: item[1].sent, reverse=True)
+        per_question = []
+        for message, series in ranked[:questions] if questions else ranked:
+            hist = series.histogram(self.latency)
+            per_question.append({
+                "message": message,
+                "sent": series.sent,
+                "errors": series.errors,
+                "empty": series.empty,
+                "mean": hist.mean,
+                "p50": hist.percentile(50),
+                "p95": hist.percentile(95),
+                "max": hist.max,
+            })
+        ok = totals.sent - totals.errors
+        errors_by_type = sorted(self.error_kinds.items(),
+                                key=lambda item: item[1], reverse=True)
+        slowest = [{"timestamp": _iso(ts), "message": message,
+                    "latency_seconds": latency}
+                   for latency, _, ts, message
+                   in sorted(self._slowest, reverse=True)]
+        return {
+            "rows": self.rows,
+            "start": _iso(self.first),
+            "end": _iso(self.last),
+            "duration_seconds": duration,
+            "throughput_per_second":
+                (self.rows / duration) if duration > 0 else None,
+            "errors": totals.errors,
+            "error_rate": (totals.errors / self.rows) if self.rows else None,
+            "empty_responses": totals.empty,
+            "empty_rate": (totals.empty / ok) if ok else None,
+            "errors_by_type": dict(errors_by_type),
+            "latency": overall.summary(),
+            "timeline": timeline,
+            "slowest": slowest,
+            "questions_distinct": len(self.questions),
+            "questions": per_question,
+        }
+
+
+def _csv_columns(header: List[str]) -> Dict[str, int]:
+    columns = {name: i for i, name in enumerate(header)}
+    timestamp = "timestamp_utc" if "timestamp_utc" in columns else "timestamp"
+    missing = [name for name in (timestamp, "message")
+               if name not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    optional = ("message", "ok", "error", "response", "latency_seconds")
+    return {"timestamp": columns[timestamp],
+            **{name: columns.get(name) for name in optional}}
+
+
+def analyze_csv(path: Union[str, Path], analysis: RunAnalysis) -> RunAnalysis:
+    """Plain-Python pass over a messages CSV.
+
+    Equivalent to calling ``analysis.add()`` per row, inlined: at ~10M rows
+    the per-row call and attribute overhead is most of the run time.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        cols = _csv_columns(next(reader, []))
+        ts_i, msg_i = cols["timestamp"], cols["message"]
+        ok_i, err_i = cols["ok"], cols["error"]
+        resp_i, lat_i = cols["response"], cols["latency_seconds"]
+        width = 1 + max(i for i in cols.values() if i is not None)
+        a = analysis
+        buckets, question_for = a.buckets, a._question
+        questions = a.questions
+        log, lowest, base = math.log, a._log_lowest, a._log_base
+        last_index = a._last_index
+        bucket_seconds = a.bucket_seconds
+        rows = 0
+        # ISO strings of one format order like the times they encode
+        first = last = None
+        min_latency = a.latency.min
+        # Consecutive rows share their second: parse each second once
+        last_prefix, second = None, 0.0
+        bucket_key, bucket = None, None
+        for row in reader:
+            if len(row) < width:
+                continue
+            stamp = row[ts_i]
+            prefix = stamp[:19]
+            if prefix != last_prefix:
+                parsed = parse_timestamp(prefix)
+                if parsed is None:
+                    continue
+                last_prefix, second = prefix, parsed
+                key = int(second // bucket_seconds)
+                if key != bucket_key:
+                    bucket_key = key
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        bucket = buckets[key] = _Series()
+            rows += 1
+            if first is None or stamp < first:
+                first = stamp
+            if last is None or stamp > last:
+                last = stamp
+            message = row[msg_i]
+            question = questions.get(message) or question_for(message)
+            if ok_i is not None and row[ok_i] not in _TRUE:
+                for series in (bucket, question):
+                    series.sent += 1
+                    series.errors += 1
+                a._count_error(row[err_i] if err_i is not None else "")
+                continue
+            empty = resp_i is not None and not row[resp_i]
+            value = row[lat_i] if lat_i is not None else ""
+            if not value:
+                for series in (bucket, question):
+                    series.sent += 1
+                    series.empty += empty
+                continue
+            latency = float(value)
+            if latency > lowest:
+                index = min(int(log(latency / lowest) / base), last_index)
+            else:
+                index = 0
+            for series in (bucket, question):
+                series.sent += 1
+                series.empty += empty
+                series.total += latency
+                if latency > series.max:
+                    series.max = latency
+                counts = series.counts
+                counts[index] = counts.get(index, 0) + 1
+            if min_latency is None or latency < min_latency:
+                min_latency = latency
+            if a.top and (len(a._slowest) < a.top
+                          or latency > a._slowest[0][0]):
+                a._offer_slowest(latency, _stamp_epoch(stamp), message)
+        a.rows += rows
+        if rows:
+            earlier = a.first if a.first is not None else math.inf
+            later = a.last if a.last is not None else -math.inf
+            a.first = min(_stamp_epoch(first), earlier)
+            a.last = max(_stamp_epoch(last), later)
+        a.latency.min = min_latency
+    return analysis
+
+
+def analyze_csv_chunks(path: Union[str, Path], analysis: RunAnalysis,
+                       chunk_rows: int = 500000) -> RunAnalysis:
+    """Vectorized pass over a messages CSV, ``chunk_rows`` rows at a time.
+
+    Needs pandas.
+    """
+    import numpy as np
+    import pandas as pd
+
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    names = {name: header[i] for name, i in _csv_columns(header).items()
+             if i is not None}
+    latency_column = names.get("latency_seconds")
+    reader = pd.read_csv(
+        path, usecols=list(names.values()), chunksize=chunk_rows,
+        keep_default_na=False,
+        dtype={name: (float if name == latency_column else str)
+               for name in names.values()},
+        na_values={latency_column: [""]} if latency_column else None,
+    )
+    for chunk in reader:
+        n = len(chunk)
+        parsed = pd.to_datetime(chunk[names["timestamp"]], format="ISO8601",
+                                errors="coerce")
+        valid = ~parsed.isna().to_numpy()
+        # Resolution-independent epoch seconds (pandas may parse to s/ms/us/ns)
+        micros = parsed.to_numpy().astype("datetime64[us]").astype(np.int64)
+        if "ok" in names:
+            ok = chunk[names["ok"]].isin(_TRUE).to_numpy()
+        else:
+            ok = np.ones(n, dtype=bool)
+        if "response" in names:
+            empty = (chunk[names["response"]] == "").to_numpy()
+        else:
+            empty = np.zeros(n, dtype=bool)
+        if latency_column:
+            latency = chunk[latency_column].to_numpy(dtype=float)
+        else:
+            latency = np.full(n, np.nan)
+        frame = pd.DataFrame({
+            "timestamp": micros / 1e6,
+            "message": chunk[names["message"]].to_numpy(),
+            "ok": ok,
+            "error": (chunk[names["error"]].to_numpy()
+                      if "error" in names else ""),
+            "empty": empty,
+            "latency": latency,
+        })
+        analysis.add_chunk(frame[valid] if not valid.all() else frame)
+    return analysis
+
+
+def analyze_run_log(path: Union[str, Path],
+                    analysis: RunAnalysis) -> RunAnalysis:
+    """Pass over binary run log segments (``run_log.py``)."""
+    for rec in iter_records(path):
+        if rec.get("timestamp") is None:
+            continue
+        analysis.add(rec["timestamp"], rec.get("message") or "",
+                     bool(rec.get("ok")), rec.get("error") or "",
+                     not (rec.get("response") or "").strip(),
+                     rec.get("latency_seconds"))
+    return analysis
+
+
+def pandas_available() -> bool:
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def analyze(path: Union[str, Path], engine: str = "auto",
+            **options) -> RunAnalysis:
+    """Analyze a messages CSV or run log with the chosen engine."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    path = Path(path)
+    analysis = RunAnalysis(**options)
+    if path.suffix.lower() != ".csv":
+        return analyze_run_log(path, analysis)
+    if engine == "pandas" or (engine == "auto" and pandas_available()):
+        return analyze_csv_chunks(path, analysis)
+    return analyze_csv(path, analysis)
+
+
+def _fmt_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def _fmt_rate(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 100:.2f}%"
+
+
+def _fmt_columns(row: dict, keys: Iterable[str]) -> str:
+    return " ".join(f"{_fmt_seconds(row[key]):>8}" for key in keys)
+
+
+def format_report(report: dict) -> str:
+    latency = report['latency']
+    lines = [
+        f"rows            {report['rows']}",
+        f"period          {report['start']} .. {report['end']} "
+        f"({report['duration_seconds']:.0f} s)",
+        f"throughput      {report['throughput_per_second'] or 0:.3f} msg/s",
+        f"errors          {report['errors']} "
+        f"({_fmt_rate(report['error_rate'])})",
+        f"empty replies   {report['empty_responses']} "
+        f"({_fmt_rate(report['empty_rate'])})",
+        "latency (s)     " + "  ".join(
+            f"{k}={_fmt_seconds(latency.get(k))}"
+            for k in ("mean", "p50", "p90", "p95", "p99", "max")),
+    ]
+    if report["errors_by_type"]:
+        lines += ["", "errors by type"]
+        lines += [f"  {n:>8}  {kind}"
+                  for kind, n in report["errors_by_type"].items()]
+    lines += ["", f"{'bucket start':<20} {'sent':>8} {'errors':>7} "
+                  f"{'msg/s':>8} {'p50':>8} {'p95':>8} {'max':>8}"]
+    for row in report["timeline"]:
+        lines.append(f"{row['start']:<20} {row['sent']:>8} {row['errors']:>7} "
+                     f"{row['per_second']:>8.3f} "
+                     + _fmt_columns(row, ("p50", "p95", "max")))
+    if report["slowest"]:
+        lines += ["", "slowest messages"]
+        lines += [f"  {row['latency_seconds']:>9.3f}  {row['timestamp']}  "
+                  f"{row['message'][:70]}"
+                  for row in report["slowest"]]
+    lines += ["", f"questions ({report['questions_distinct']} distinct)",
+              f"  {'sent':>8} {'errors':>7} {'empty':>6} {'mean':>8} "
+              f"{'p50':>8} {'p95':>8} {'max':>8}  message"]
+    for row in report["questions"]:
+        counts = f"  {row['sent']:>8} {row['errors']:>7} {row['empty']:>6} "
+        lines.append(counts + _fmt_columns(row, ("mean", "p50", "p95", "max"))
+                     + f"  {row['message'][:60]}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Analyze a messages.csv or run log in one streaming pass")
+    parser.add_argument("path",
+                        help="messages CSV, run log segment or run directory")
+    parser.add_argument("--bucket", type=int, default=60,
+                        help="timeline bucket size (seconds)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="how many slowest messages to list")
+    parser.add_argument("--questions", type=int, default=20,
+                        help="per-question rows to print, most sent first "
+                             "(0 = all)")
+    parser.add_argument("--max-questions", type=int, default=10000,
+                        help="distinct questions tracked before the rest "
+                             "count as (other)")
+    parser.add_argument("--engine", choices=ENGINES, default="auto",
+                        help="pandas = vectorized chunks; auto uses it when "
+                             "installed")
+    parser.add_argument("--json", action="store_true",
+                        help="print the report as JSON")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    started = time.perf_counter()
+    try:
+        analysis = analyze(args.path, args.engine, bucket_seconds=args.bucket,
+                           top=args.top, max_questions=args.max_questions)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    report = analysis.report(args.questions or None)
+    report["elapsed_seconds"] = time.perf_counter() - started
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+        print(f"\nanalyzed in {report['elapsed_seconds']:.1f} s",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,85 @@
+import math
 import threading
 import time
 import random
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 
-from chatbot_automator import ChatbotAutomator
-import csv
+from chatbot_automator import ChatbotAutomator, SendResult
+from browser_pool import BrowserPool, ProfileStore
+from browser_profile import BrowserProfile
+from driver_resolver import ChromeDriverResolver
+from http_automator import HttpChatbotClient
+from load_scheduler import OpenLoadScheduler
+from latency_histogram import LatencyStats
+from log_writer import BufferedCsvWriter, MESSAGE_LOG_FIELDS
+from run_log import RunLogWriter
+from question_corpus import QuestionCorpus
+from scenarios import Scenario, ScenarioSet, ScenarioStats
+from load_profile import LoadProfile
+from replay import ReplaySource
+from rate_controller import AimdRateController
 
 logger = logging.getLogger(__name__)
 
+
+class SessionWorker:
+    """State of one independent chat session (own automator, pacing and errors)."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.thread: Optional[threading.Thread] = None
+        self.automator: Optional[ChatbotAutomator] = None
+        self.messages_sent = 0
+        self.errors_count = 0
+        self.driver_restarts = 0
+        self.last_error: Optional[str] = None
+        self.last_message: Optional[str] = None
+        self.last_response: Optional[str] = None
+        self.last_sent_at: Optional[datetime] = None
+        self.last_recovery_seconds: Optional[float] = None
+        # Per-step timings of the last browser start (driver_resolve, browser_launch, page_load)
+        self.last_startup: Dict[str, float] = {}
+        self.last_latency: Optional[float] = None
+        # Conversation in progress (scenario mode) and index of its next step
+        self.scenario: Optional[Scenario] = None
+        self.step_index = 0
+        # Set when a load profile scales the pool down; the loop exits after its current send
+        self.retired = False
+
+    @property
+    def is_alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def snapshot(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "alive": self.is_alive,
+            "driver_ready": self.automator is not None,
+            "messages_sent": self.messages_sent,
+            "errors_count": self.errors_count,
+            "driver_restarts": self.driver_restarts,
+            "retired": self.retired,
+            "last_recovery_seconds": self.last_recovery_seconds,
+            "last_startup": self.last_startup,
+            "last_latency_seconds": self.last_latency,
+            "last_message": self.last_message,
+            "scenario": self.scenario.name if self.scenario else None,
+            "scenario_step": self.step_index + 1 if self.scenario else None,
+            "last_error": self.last_error,
+            "last_sent_at": self.last_sent_at.isoformat() if self.last_sent_at else None,
+        }
+
+
 class BotManager:
-    """Manages lifecycle of the stress bot (start/stop, loop, resilience)."""
+    """Manages lifecycle of the stress bot (start/stop, worker pool, resilience)."""
 
     def __init__(self,
                  url: str,
                  questions_file: str,
+                 scenarios_file: Optional[str] = None,
                  interval_seconds: float = 3.0,
                  jitter: float = 0.5,
                  restart_delay: float = 10.0,
@@ -26,23 +89,50 @@ class BotManager:
                  capture_responses: bool = True,
                  log_dir: str = "logs",
                  messages_csv: str = "messages.csv",
-                 selectors: Optional[dict] = None):
+                 selectors: Optional[dict] = None,
+                 concurrency: int = 1,
+                 browser_pool: Optional[dict] = None,
+                 browser_profile: Optional[dict] = None,
+                 chromedriver: Optional[dict] = None,
+                 backend: str = "selenium",
+                 http_backend: Optional[dict] = None,
+                 mode: str = "closed",
+                 arrival_rate: float = 1.0,
+                 arrival_process: str = "constant",
+                 max_backlog: int = 100,
+                 response_timeout: float = 60.0,
+                 response_settle_seconds: float = 1.0,
+                 script_submit: bool = False,
+                 log_batch_size: int = 200,
+                 log_flush_seconds: float = 1.0,
+                 run_log: Optional[dict] = None,
+                 load_profile: Optional[dict] = None,
+                 replay: Optional[dict] = None,
+                 rate_controller: Optional[dict] = None):
         self.url = url
         self.questions_file = Path(questions_file)
         self.interval_seconds = interval_seconds
         self.jitter = jitter
         self.restart_delay = restart_delay
-        self._thread: Optional[threading.Thread] = None
+        self.concurrency = max(1, int(concurrency))
+        self._workers: List[SessionWorker] = []
         self._stop_event = threading.Event()
         self._lock = threading.Lock()
-        self._automator: Optional[ChatbotAutomator] = None
+        self._stats_lock = threading.Lock()
+        self._listeners: List[Callable[[str, Optional[str]], None]] = []
         self._messages_sent = 0
         self._last_error: Optional[str] = None
         self._last_message: Optional[str] = None
         self._last_response: Optional[str] = None
         self._started_at: Optional[datetime] = None
-        self._questions_cache: List[str] = []
+        self.questions = QuestionCorpus(self.questions_file)
+        self.scenarios_file = Path(scenarios_file) if scenarios_file else None
+        self._scenarios: Optional[ScenarioSet] = None
+        self._scenario_stats: Dict[str, ScenarioStats] = {}
         self._errors_count: int = 0
+        # Manager-level total: workers are rebuilt on every start, this is not
+        self._driver_restarts = 0
+        self._errors_by_type: Dict[str, int] = {}
         self._last_sent_at: Optional[datetime] = None
         self.headless = headless
         self.wait_for_manual_login = wait_for_manual_login
@@ -51,44 +141,411 @@ class BotManager:
         self.log_dir = Path(log_dir)
         self.messages_csv = self.log_dir / messages_csv
         self.selectors = selectors or {}
+        self.browser_pool = browser_pool or {}
+        self._profiles: Optional[ProfileStore] = None
+        if self.browser_pool.get('enabled'):
+            self._profiles = ProfileStore(
+                self.browser_pool.get('profiles_dir', 'profiles'),
+                self.browser_pool.get('cookies_file') or None
+            )
+        self._pool: Optional[BrowserPool] = None
+        self.browser_profile = BrowserProfile.from_config(browser_profile)
+        self.driver_resolver = ChromeDriverResolver.from_config(chromedriver)
+        self.backend = (backend or "selenium").lower()
+        self.http_backend = http_backend or {}
+        self._session_lock = threading.Lock()
+        # closed: each worker sends, waits for the reply, then sleeps interval +/- jitter.
+        # open: OpenLoadScheduler issues arrivals at arrival_rate regardless of latency.
+        self.mode = (mode or "closed").lower()
+        self._arrival_rate = float(arrival_rate)
+        self.arrival_process = arrival_process
+        self.max_backlog = max_backlog
+        self.response_timeout = response_timeout
+        self.response_settle_seconds = response_settle_seconds
+        self.script_submit = script_submit
+        # WebDriver commands per send (Selenium backend), for the round-trip average
+        self._round_trips_total = 0
+        self._round_trips_sends = 0
+        self._engine_thread: Optional[threading.Thread] = None
+        self._scheduler: Optional[OpenLoadScheduler] = None
+        self._last_latency: Optional[float] = None
+        # response: end-to-end (incl. open-model queueing); send_overhead: input+Enter cost
+        self._latency = {name: LatencyStats() for name in ("response", "first_token", "complete", "send_overhead")}
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        if not self.messages_csv.exists():
-            with self.messages_csv.open('w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["timestamp_utc","message","response"])  # header
+        self.log_batch_size = log_batch_size
+        self.log_flush_seconds = log_flush_seconds
+        self._csv_writer: Optional[BufferedCsvWriter] = None
+        self.run_log = run_log or {}
+        self._run_log: Optional[RunLogWriter] = None
+        self.load_profile = load_profile or {}
+        self._profile: Optional[LoadProfile] = None
+        self._profile_state: Optional[dict] = None
+        self._profile_thread: Optional[threading.Thread] = None
+        # (interval_seconds, arrival_rate) to restore when a profile/controller run stops
+        self._pacing_saved: Optional[tuple] = None
+        self.replay = replay or {}
+        self._replay: Optional[ReplaySource] = None
+        self.rate_controller = rate_controller or {}
+        self._controller: Optional[AimdRateController] = None
+        self._controller_thread: Optional[threading.Thread] = None
+
+    def add_listener(self, callback: Callable[[str, Optional[str]], None]) -> None:
+        """Register ``callback(kind, detail)`` for state changes (started, stopped, sent, error).
+
+        Callbacks run on worker threads and must return immediately.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, kind: str, detail: Optional[str] = None) -> None:
+        for callback in self._listeners:
+            try:
+                callback(kind, detail)
+            except Exception as e:
+                logger.error(f"Listener failed: {e}")
 
     def load_questions(self) -> List[str]:
+        return list(self.questions.current())
+
+    def reload_questions(self) -> dict:
+        """Force a re-read of the questions file (picked up atomically by all workers)."""
+        changed = self.questions.reload(force=True)
+        self._notify("questions", None)
+        return dict(self.questions.stats(), reloaded=changed)
+
+    def _load_scenarios(self) -> None:
+        """(Re)load the scenarios file for a new run; without one, single questions are sent."""
+        self._scenarios = None
+        self._scenario_stats = {}
+        if not self.scenarios_file:
+            return
         try:
-            lines = [l.strip() for l in self.questions_file.read_text(encoding='utf-8').splitlines() if l.strip()]
-            if lines:
-                self._questions_cache = lines
-            return self._questions_cache
+            self._scenarios = ScenarioSet.load(self.scenarios_file)
         except Exception as e:
-            logger.error(f"Failed to load questions: {e}")
-            return self._questions_cache or ["Olá, tudo bem?"]
+            logger.error(f"Failed to load scenarios from {self.scenarios_file}, using single questions: {e}")
+            return
+        self._scenario_stats = {sc.name: ScenarioStats(sc) for sc in self._scenarios.scenarios}
+        logger.info("Loaded %d scenario(s) from %s", len(self._scenarios), self.scenarios_file)
+
+    def _next_message(self, worker: SessionWorker) -> str:
+        """Next step of the worker's conversation (sampling a new scenario when idle), or a single question."""
+        if not self._scenarios:
+            return self.questions.choice()
+        if worker.scenario is None:
+            worker.scenario = self._scenarios.sample()
+            worker.step_index = 0
+            self._scenario_stats[worker.scenario.name].record_start()
+        return worker.scenario.steps[worker.step_index].message
+
+    def _finish_step(self, worker: SessionWorker, ok: bool, latency: Optional[float]) -> None:
+        scenario = worker.scenario
+        if scenario is None:
+            return
+        stats = self._scenario_stats[scenario.name]
+        stats.record_step(worker.step_index, ok, latency)
+        worker.step_index += 1
+        if not ok or worker.step_index >= len(scenario.steps):
+            # A failed step breaks the conversation: start a fresh scenario next time
+            stats.record_end(completed=ok)
+            worker.scenario = None
+            worker.step_index = 0
+
+    def _replay_file(self) -> Optional[Path]:
+        """The log to replay, or None (with ``_last_error`` set) if it cannot be used."""
+        replay_file = Path(self.replay.get('file') or '')
+        if not replay_file.is_file() and not replay_file.is_dir():
+            self._last_error = f"Replay log not found: {replay_file}"
+            logger.error(self._last_error)
+            return None
+        if replay_file.resolve() == self.messages_csv.resolve():
+            # The run appends to this file while it is being read
+            self._last_error = f"Replay log is this run's output ({replay_file}); replay a copy"
+            logger.error(self._last_error)
+            return None
+        return replay_file
 
     def start(self) -> bool:
         with self._lock:
             if self.is_running:
                 return False
+            self._replay = None
+            if self.mode == "replay":
+                replay_file = self._replay_file()
+                if replay_file is None:
+                    return False
+                self._replay = ReplaySource(replay_file, speed=self.replay.get('speed', 1.0),
+                                            loop=bool(self.replay.get('loop', False)),
+                                            shard=self.replay.get('shard') or (0, 1))
             self._stop_event.clear()
-            self._thread = threading.Thread(target=self._run_loop, daemon=True)
-            self._thread.start()
+            self._load_scenarios()
+            self._profile = self._build_profile()
+            initial_workers = self.concurrency
+            if self._profile:
+                if self._profile.uses_rate:
+                    self._pacing_saved = (self.interval_seconds, self._arrival_rate)
+                first = self._profile.at(0.0)
+                self._profile_state = first
+                if self.mode == "open" and self._profile.uses_rate:
+                    self._arrival_rate = first["target_rate"]
+                elif self.mode == "closed" and self._profile.uses_concurrency:
+                    initial_workers = first["target_concurrency"]
+            self._controller = self._build_controller()
+            if self._controller:
+                self._pacing_saved = (self.interval_seconds, self._arrival_rate)
+                if self.mode == "open":
+                    current = self._arrival_rate
+                else:
+                    current = initial_workers / self.interval_seconds if self.interval_seconds > 0 else math.inf
+                self._apply_rate(self._controller.reset(current), sessions=initial_workers)
+            if self._profiles and self.backend == "selenium":
+                self._pool = BrowserPool(
+                    self._new_automator,
+                    size=self.browser_pool.get('size', 1),
+                    can_warm=lambda: not self.wait_for_manual_login or self._profiles.has_cookies(),
+                    on_discard=lambda a: self._profiles.release_profile(a.profile_dir)
+                )
+                self._pool.start()
+            if self.capture_responses:
+                self._csv_writer = BufferedCsvWriter(
+                    self.messages_csv,
+                    MESSAGE_LOG_FIELDS,
+                    batch_size=self.log_batch_size,
+                    flush_interval=self.log_flush_seconds
+                )
+                self._csv_writer.start()
+            if self.run_log.get('enabled'):
+                self._run_log = RunLogWriter(
+                    self.log_dir / self.run_log.get('dir', 'runs'),
+                    max_segment_bytes=int(float(self.run_log.get('max_segment_mb', 64)) * 1024 * 1024),
+                    compression_level=self.run_log.get('compression_level', 6),
+                    batch_size=self.log_batch_size,
+                    flush_interval=self.log_flush_seconds
+                )
+                self._run_log.start()
+            self._workers = [SessionWorker(i) for i in range(initial_workers)]
+            if self.mode in ("open", "replay"):
+                self._scheduler = OpenLoadScheduler(
+                    self._workers, self._open_send,
+                    rate=self._arrival_rate,
+                    process=self.arrival_process,
+                    max_backlog=self.max_backlog,
+                    schedule=self._replay,
+                    backpressure=bool(self._replay and self._replay.as_fast_as_possible)
+                )
+                self._engine_thread = threading.Thread(target=self._run_open_loop, name="bot-open-load", daemon=True)
+                # Sessions are driven by the scheduler thread and its executor
+                for worker in self._workers:
+                    worker.thread = self._engine_thread
+                self._engine_thread.start()
+            else:
+                self._scheduler = None
+                self._engine_thread = None
+                for worker in self._workers:
+                    self._start_worker(worker)
             self._started_at = datetime.utcnow()
-            logger.info("BotManager started")
-            return True
+            if self._profile:
+                self._profile_thread = threading.Thread(target=self._run_profile, name="bot-load-profile", daemon=True)
+                self._profile_thread.start()
+            if self._controller:
+                self._controller_thread = threading.Thread(target=self._run_controller, name="bot-rate-controller",
+                                                           daemon=True)
+                self._controller_thread.start()
+            logger.info("BotManager started with %d worker(s) in %s mode", len(self._workers), self.mode)
+        self._notify("started")
+        return True
+
+    def _start_worker(self, worker: SessionWorker) -> None:
+        worker.retired = False
+        worker.thread = threading.Thread(
+            target=self._run_loop, args=(worker,),
+            name=f"bot-worker-{worker.worker_id}", daemon=True
+        )
+        worker.thread.start()
+
+    def _build_profile(self) -> Optional[LoadProfile]:
+        self._profile_state = None
+        if not self.load_profile.get('enabled'):
+            return None
+        try:
+            return LoadProfile.from_dict(self.load_profile)
+        except Exception as e:
+            logger.error(f"Invalid load profile, running with fixed settings: {e}")
+            return None
+
+    def _scale_workers(self, target: int) -> None:
+        """Grow or shrink the closed-model pool to ``target`` sessions."""
+        with self._lock:
+            if self._stop_event.is_set():
+                return
+            active = [w for w in self._workers if not w.retired]
+            for worker in active[target:]:
+                worker.retired = True
+            missing = target - len(active)
+            for worker in self._workers:
+                if missing <= 0:
+                    break
+                # Reuse retired sessions once their thread has finished
+                if worker.retired and not worker.is_alive:
+                    self._start_worker(worker)
+                    missing -= 1
+            while missing > 0:
+                worker = SessionWorker(len(self._workers))
+                self._workers.append(worker)
+                self._start_worker(worker)
+                missing -= 1
+
+    def _apply_profile(self, state: dict) -> None:
+        if self._stop_event.is_set() or self.mode == "replay":
+            return
+        if self.mode == "open":
+            if self._profile.uses_rate:
+                self.arrival_rate = state["target_rate"]
+            return
+        if self._profile.uses_concurrency:
+            self._scale_workers(state["target_concurrency"])
+        if self._profile.uses_rate:
+            self._apply_rate(state["target_rate"])
+
+    def _apply_rate(self, rate: float, sessions: Optional[int] = None, latency: float = 0.0) -> None:
+        """Pace the current load model for ``rate`` messages/s.
+
+        Closed model: spread the rate over the active sessions; each one also
+        spends ``latency`` waiting for the reply before its pause.
+        """
+        if self.mode == "open":
+            self.arrival_rate = rate
+            return
+        if sessions is None:
+            sessions = sum(1 for w in self._workers if not w.retired) or 1
+        self.interval_seconds = min(60.0, max(0.0, sessions / rate - latency)) if rate > 0 else 60.0
+
+    def _build_controller(self) -> Optional[AimdRateController]:
+        if not self.rate_controller.get('enabled'):
+            return None
+        if self.mode not in ("closed", "open"):
+            logger.warning("Rate controller ignored in %s mode", self.mode)
+            return None
+        if self._profile and self._profile.uses_rate:
+            logger.warning("Rate controller ignored: the load profile sets the rate")
+            return None
+        try:
+            return AimdRateController.from_dict(self.rate_controller)
+        except Exception as e:
+            logger.error(f"Invalid rate controller, running with fixed pacing: {e}")
+            return None
+
+    def _run_controller(self) -> None:
+        """Feed the controller the sends, errors and p95 since its last decision; apply its rate."""
+        controller = self._controller
+        since = time.monotonic()
+        sent_base, errors_base = self._messages_sent, self._errors_count
+        while not self._stop_event.wait(controller.period_seconds):
+            elapsed = time.monotonic() - since
+            window = self._latency["response"].window(max(1, math.ceil(elapsed)))
+            decision = controller.update(self._messages_sent - sent_base, self._errors_count - errors_base,
+                                         window.percentile(95), elapsed)
+            if decision is None:
+                continue  # too few replies yet; keep accumulating
+            since = time.monotonic()
+            sent_base, errors_base = self._messages_sent, self._errors_count
+            if decision["action"] == "hold":
+                logger.info("Rate controller: holding %.3f msg/s (%s)", decision["rate"], decision["reason"])
+                continue
+            self._apply_rate(decision["rate"], latency=window.mean or 0.0)
+            detail = f"{decision['old_rate']:.3f} -> {decision['rate']:.3f} msg/s ({decision['reason']})"
+            logger.info("Rate controller: %s %s", decision["action"], detail)
+            self._notify("rate_adjusted", detail)
+
+    def _run_profile(self) -> None:
+        started = time.monotonic()
+        stage_index = None
+        while not self._stop_event.is_set():
+            state = self._profile.at(time.monotonic() - started)
+            self._profile_state = state
+            self._apply_profile(state)
+            if state["stage_index"] != stage_index and not state["finished"]:
+                stage_index = state["stage_index"]
+                logger.info("Load profile stage %d/%d: %s", stage_index + 1,
+                            len(self._profile.stages), state["stage"])
+                self._notify("profile_stage", state["stage"])
+            if state["finished"]:
+                if self._profile.on_finish == "stop":
+                    logger.info("Load profile finished; stopping")
+                    self.stop()
+                else:
+                    logger.info("Load profile finished; holding last stage")
+                return
+            self._stop_event.wait(0.5)
 
     def stop(self) -> None:
         with self._lock:
             self._stop_event.set()
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=10)
-        self._cleanup_driver()
+        if self._scheduler:
+            # Open/replay: one scheduler thread drives every session and closes the
+            # drivers itself once its executor has drained the sends in flight
+            self._engine_thread.join(timeout=10)
+            if self._engine_thread.is_alive():
+                logger.warning("Open-model sends still in flight; their sessions close when they finish")
+        else:
+            for worker in self._workers:
+                if worker.is_alive:
+                    worker.thread.join(timeout=10)
+                self._cleanup_driver(worker)
+        if self._pool:
+            self._pool.stop()
+        if self._csv_writer:
+            self._csv_writer.close()
+        if self._run_log:
+            self._run_log.close()
+        if self._pacing_saved:
+            # The profile only drives this run; restore the configured pacing
+            self.interval_seconds, self.arrival_rate = self._pacing_saved
+            self._pacing_saved = None
         logger.info("BotManager stopped")
+        self._notify("stopped")
+
+    def set_pacing(self, interval_seconds: float, arrival_rate: float) -> bool:
+        """Apply configured pacing (API); False if kept for the end of the run instead.
+
+        While the rate controller or a rate-driven load profile sets the
+        pacing, the new values replace the ones restored by stop().
+        """
+        if self._pacing_saved is not None:
+            self._pacing_saved = (interval_seconds, arrival_rate)
+            return False
+        self.interval_seconds = interval_seconds
+        self.arrival_rate = arrival_rate
+        return True
+
+    @property
+    def arrival_rate(self) -> float:
+        return self._arrival_rate
+
+    @arrival_rate.setter
+    def arrival_rate(self, value: float) -> None:
+        self._arrival_rate = float(value)
+        if self._scheduler:
+            self._scheduler.rate = self._arrival_rate
 
     @property
     def is_running(self) -> bool:
-        return self._thread is not None and self._thread.is_alive() and not self._stop_event.is_set()
+        return any(w.is_alive for w in self._workers) and not self._stop_event.is_set()
+
+    @property
+    def active_workers(self) -> int:
+        return sum(1 for w in self._workers if w.is_alive)
+
+    @property
+    def errors_by_type(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._errors_by_type)
+
+    @property
+    def driver_restarts(self) -> int:
+        return self._driver_restarts
+
+    @property
+    def latency_stats(self) -> Dict[str, LatencyStats]:
+        return self._latency
 
     def status(self) -> dict:
         uptime = None
@@ -105,87 +562,335 @@ class BotManager:
             "jitter": self.jitter,
             "errors_count": self._errors_count,
             "last_sent_at": self._last_sent_at.isoformat() if self._last_sent_at else None,
+            "concurrency": self.concurrency,
+            "active_workers": self.active_workers,
+            "workers": [w.snapshot() for w in self._workers],
+            "browser_pool": self._pool.status() if self._pool else None,
+            "backend": self.backend,
+            "mode": self.mode,
+            "questions": self.questions.stats(),
+            "load_profile": self._profile_state,
+            "replay": self._replay.stats() if self._replay else None,
+            "rate_controller": self._controller.state() if self._controller else None,
         }
 
-    def _init_driver(self) -> bool:
-        try:
-            self._automator = ChatbotAutomator(
+    @property
+    def cookies_file(self) -> Path:
+        """Login cookie jar shared by the browser profiles and the HTTP backend."""
+        configured = self.http_backend.get('cookies_file')
+        if configured:
+            return Path(configured)
+        if self._profiles:
+            return self._profiles.cookies_file
+        return Path(self.browser_pool.get('profiles_dir', 'profiles')) / "cookies.json"
+
+    def _new_automator(self):
+        if self.backend == "http":
+            cfg = self.http_backend
+            return HttpChatbotClient(
                 self.url,
-                headless=self.headless,
+                endpoint=cfg.get('endpoint', ''),
+                cookies_file=str(self.cookies_file),
+                method=cfg.get('method', 'POST'),
+                message_field=cfg.get('message_field', 'message'),
+                conversation_field=cfg.get('conversation_field') or None,
+                extra_payload=cfg.get('extra_payload') or {},
+                response_field=cfg.get('response_field', 'response'),
+                headers=cfg.get('headers') or {},
+                timeout=cfg.get('timeout', 60.0),
+                pool_size=cfg.get('pool_size', 100)
+            )
+        profile_dir = self._profiles.lease_profile() if self._profiles else None
+        return ChatbotAutomator(
+            self.url,
+            headless=self.headless,
+            selectors=self.selectors,
+            wait_for_manual_login=self.wait_for_manual_login,
+            manual_login_wait_seconds=self.manual_login_wait_seconds,
+            profile_dir=profile_dir,
+            cookies_file=str(self._profiles.cookies_file) if self._profiles else None,
+            response_timeout=self.response_timeout,
+            response_settle_seconds=self.response_settle_seconds,
+            script_submit=self.script_submit,
+            browser_profile=self.browser_profile,
+            driver_resolver=self.driver_resolver
+        )
+
+    def _ensure_http_session(self) -> None:
+        """Capture login cookies once through a real browser for the HTTP backend."""
+        if self.backend != "http" or not self.wait_for_manual_login:
+            return
+        with self._session_lock:
+            if self.cookies_file.exists() or self._stop_event.is_set():
+                return
+            logger.info("No saved session for the HTTP backend; opening a browser for login")
+            browser = ChatbotAutomator(
+                self.url,
+                headless=False,
                 selectors=self.selectors,
-                wait_for_manual_login=self.wait_for_manual_login,
-                manual_login_wait_seconds=self.manual_login_wait_seconds
+                wait_for_manual_login=True,
+                manual_login_wait_seconds=self.manual_login_wait_seconds,
+                cookies_file=str(self.cookies_file),
+                driver_resolver=self.driver_resolver
             )
-            return self._automator.start()
+            try:
+                browser.start()
+            finally:
+                browser.close()
+
+    def _init_driver(self, worker: SessionWorker) -> bool:
+        started = time.monotonic()
+        if self._pool:
+            warm = self._pool.acquire()
+            if warm:
+                worker.automator = warm
+                worker.last_recovery_seconds = time.monotonic() - started
+                logger.info("Worker %d took a warm browser from the pool", worker.worker_id)
+                return True
+        try:
+            worker.automator = self._new_automator()
+            started_ok = worker.automator.start()
+            worker.last_startup = dict(getattr(worker.automator, 'startup', None) or {})
+            if started_ok:
+                worker.last_recovery_seconds = time.monotonic() - started
+                return True
+            self._cleanup_driver(worker)
+            return False
         except Exception as e:
-            self._last_error = f"Driver init failed: {e}"
-            logger.exception(self._last_error)
+            self._record_error(worker, f"Driver init failed: {e}", "driver_init")
+            logger.exception(worker.last_error)
+            self._cleanup_driver(worker)
             return False
 
-    def _cleanup_driver(self):
-        if self._automator:
+    def _cleanup_driver(self, worker: SessionWorker):
+        if worker.automator:
             try:
-                self._automator.close()
+                worker.automator.close()
             except Exception:
                 pass
-            self._automator = None
+            if self._profiles:
+                self._profiles.release_profile(worker.automator.profile_dir)
+            worker.automator = None
+        if worker.scenario is not None:
+            # New session = new conversation
+            self._scenario_stats[worker.scenario.name].record_end(completed=False)
+            worker.scenario = None
+            worker.step_index = 0
 
-    def _run_loop(self):
-        self.load_questions()
-        if not self._init_driver():
-            time.sleep(self.restart_delay)
-        while not self._stop_event.is_set():
+    def _restart_backoff(self) -> None:
+        """Wait before re-initialising a driver, unless a warm browser is ready."""
+        if self._pool and self._pool.available:
+            return
+        self._sleep(self.restart_delay)
+
+    def _record_restart(self, worker: SessionWorker) -> None:
+        worker.driver_restarts += 1
+        with self._stats_lock:
+            self._driver_restarts += 1
+
+    def _record_error(self, worker: SessionWorker, error: str, kind: str = "send_failed") -> None:
+        worker.last_error = error
+        worker.errors_count += 1
+        with self._stats_lock:
+            self._last_error = f"[worker {worker.worker_id}] {error}"
+            self._errors_count += 1
+            self._errors_by_type[kind] = self._errors_by_type.get(kind, 0) + 1
+        self._notify("error", self._last_error)
+
+    def _record_sent(self, worker: SessionWorker, result: SendResult,
+                     latency: Optional[float] = None) -> None:
+        now = datetime.utcnow()
+        worker.messages_sent += 1
+        worker.last_message = result.message
+        worker.last_sent_at = now
+        worker.last_latency = latency
+        with self._stats_lock:
+            self._messages_sent += 1
+            self._last_message = result.message
+            self._last_sent_at = now
+            if latency is not None:
+                self._last_latency = latency
+            if result.round_trips is not None:
+                self._round_trips_total += result.round_trips
+                self._round_trips_sends += 1
+            if self.capture_responses:
+                worker.last_response = result.response
+                self._last_response = result.response
+        # LatencyStats has its own lock
+        if latency is not None:
+            self._latency["response"].record(latency)
+        for name, value in (("first_token", result.first_token_seconds),
+                            ("complete", result.complete_seconds),
+                            ("send_overhead", result.send_seconds)):
+            if value is not None:
+                self._latency[name].record(value)
+        self._notify("sent")
+
+    def _sleep(self, seconds: float) -> None:
+        """Sleep that returns early as soon as stop() is requested."""
+        self._stop_event.wait(max(0.0, seconds))
+
+    def _send_once(self, worker: SessionWorker, scheduled_at: Optional[float] = None,
+                   message: Optional[str] = None) -> None:
+        """Send one question (``message``, or the next one) on the worker's session and record the outcome.
+
+        ``scheduled_at`` (monotonic) is when the send was supposed to start; in
+        open mode it predates any queueing, so latency is measured from there.
+        """
+        started = time.monotonic()
+        if scheduled_at is None:
+            scheduled_at = started
+        if message is None:
+            message = self._next_message(worker)
+        result = worker.automator.send_message(message)
+        if not result.ok:
+            self._log_result(worker, result, None)
+            self._finish_step(worker, False, None)
+            if not worker.automator.is_alive():
+                raise RuntimeError(result.error or "Session lost")
+            self._record_error(worker, result.error or "Send failed")
+            return
+        # Queueing delay before the send plus the reply time measured by the backend;
+        # the backend's settle wait after the last change is not latency.
+        if result.complete_seconds is not None:
+            latency = (started - scheduled_at) + (result.send_seconds or 0.0) + result.complete_seconds
+        else:
+            latency = time.monotonic() - scheduled_at
+        self._record_sent(worker, result, latency)
+        self._log_result(worker, result, latency)
+        self._finish_step(worker, True, latency)
+
+    def _log_result(self, worker: SessionWorker, result: SendResult, latency: Optional[float]) -> None:
+        """Queue one row for the CSV and binary run logs (never blocks on disk)."""
+        if not (self._csv_writer or self._run_log):
+            return
+        record = {
+            "timestamp": result.sent_at or time.time(),
+            "message": result.message,
+            "response": (result.response or '').replace('\n', ' ').strip(),
+            "worker_id": worker.worker_id,
+            "ok": result.ok,
+            "error": result.error,
+            "latency_seconds": latency,
+            "first_token_seconds": result.first_token_seconds,
+            "complete_seconds": result.complete_seconds,
+            "send_seconds": result.send_seconds,
+            "scenario": worker.scenario.name if worker.scenario else None,
+            "step": worker.step_index + 1 if worker.scenario else None,
+        }
+        if self._run_log:
+            self._run_log.write(record)
+        if self._csv_writer:
+            row = dict(record, timestamp_utc=datetime.utcfromtimestamp(record["timestamp"]).isoformat(),
+                       ok=int(result.ok), error=result.error or '',
+                       scenario=record["scenario"] or '', step=record["step"] or '')
+            for key in ("latency_seconds", "first_token_seconds", "complete_seconds", "send_seconds"):
+                row[key] = '' if row[key] is None else f"{row[key]:.4f}"
+            self._csv_writer.write([row[name] for name in MESSAGE_LOG_FIELDS])
+
+    def _run_loop(self, worker: SessionWorker):
+        self.questions.current()
+        self._ensure_http_session()
+        if not self._init_driver(worker):
+            self._restart_backoff()
+        while not self._stop_event.is_set() and not worker.retired:
             try:
-                if not self._automator:
-                    if not self._init_driver():
-                        time.sleep(self.restart_delay)
+                if not worker.automator:
+                    self._record_restart(worker)
+                    if not self._init_driver(worker):
+                        self._restart_backoff()
                         continue
-                q_list = self.load_questions()
-                message = random.choice(q_list)
-                response = self._automator.send_message(message)
-                self._messages_sent += 1
-                self._last_message = message
-                self._last_sent_at = datetime.utcnow()
-                if self.capture_responses:
-                    self._last_response = response
-                    try:
-                        with self.messages_csv.open('a', newline='', encoding='utf-8') as f:
-                            writer = csv.writer(f)
-                            writer.writerow([
-                                datetime.utcnow().isoformat(),
-                                message,
-                                (response or '').replace('\n',' ').strip()
-                            ])
-                    except Exception as log_err:
-                        logger.error(f"Erro gravando CSV: {log_err}")
-                base = self.interval_seconds
-                jitter = random.uniform(-self.jitter, self.jitter)
-                delay = max(0.5, base + jitter)
-                for _ in range(int(delay * 10)):
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(0.1)
+                self._send_once(worker)
+                if worker.scenario is not None:
+                    # Mid-conversation: the next step's think time
+                    delay = worker.scenario.steps[worker.step_index].pause()
+                else:
+                    base = self.interval_seconds
+                    jitter = random.uniform(-self.jitter, self.jitter)
+                    delay = max(0.5, base + jitter)
+                self._sleep(delay)
             except Exception as e:
-                self._last_error = str(e)
-                self._errors_count += 1
-                logger.exception(f"Loop error: {e}")
-                self._cleanup_driver()
-                time.sleep(self.restart_delay)
-        self._cleanup_driver()
+                self._record_error(worker, str(e), type(e).__name__)
+                logger.exception(f"Loop error (worker {worker.worker_id}): {e}")
+                self._cleanup_driver(worker)
+                self._restart_backoff()
+        self._cleanup_driver(worker)
+
+    def _run_open_loop(self):
+        self.questions.current()
+        self._ensure_http_session()
+        starters = [threading.Thread(target=self._init_driver, args=(w,), daemon=True) for w in self._workers]
+        for t in starters:
+            t.start()
+        for t in starters:
+            t.join()
+        try:
+            self._scheduler.run(self._stop_event)
+        except Exception as e:
+            self._last_error = f"Open-model scheduler failed: {e}"
+            logger.exception(self._last_error)
+        for worker in self._workers:
+            self._cleanup_driver(worker)
+        if self._scheduler.schedule_exhausted and not self._stop_event.is_set():
+            logger.info("Replay finished (%d messages); stopping", self._replay.rows if self._replay else 0)
+            # stop() joins this thread, so it runs on its own
+            threading.Thread(target=self.stop, name="bot-replay-stop", daemon=True).start()
+
+    def _open_send(self, worker: SessionWorker, scheduled_at: float, message: Optional[str] = None) -> None:
+        """Executor callback for one open-model arrival; never sleeps for pacing."""
+        if self._stop_event.is_set():
+            return
+        try:
+            if not worker.automator:
+                self._record_restart(worker)
+                if not self._init_driver(worker):
+                    self._record_error(worker, "Driver unavailable for scheduled arrival", "driver_unavailable")
+                    return
+            self._send_once(worker, scheduled_at, message)
+        except Exception as e:
+            self._record_error(worker, str(e), type(e).__name__)
+            logger.exception(f"Open-model send error (worker {worker.worker_id}): {e}")
+            self._cleanup_driver(worker)
+
+    def export_histograms(self) -> Dict[str, dict]:
+        """Raw latency histograms, mergeable across nodes by a coordinator."""
+        return {name: stats.export() for name, stats in self._latency.items()}
+
+    def _driver_resolution(self) -> Optional[dict]:
+        """How this process found chromedriver (first resolution pays the cost)."""
+        resolution = self.driver_resolver.resolution
+        return resolution.to_dict() if resolution else None
 
     def metrics(self) -> dict:
         now = datetime.utcnow()
         uptime_sec = (now - self._started_at).total_seconds() if self._started_at else 0
         avg_interval = (uptime_sec / self._messages_sent) if self._messages_sent > 0 else None
         messages_per_min = (self._messages_sent / (uptime_sec / 60)) if uptime_sec > 0 and self._messages_sent > 0 else 0
+        avg_round_trips = (self._round_trips_total / self._round_trips_sends) if self._round_trips_sends else None
         return {
             "uptime_seconds": uptime_sec,
             "messages_sent": self._messages_sent,
             "errors_count": self._errors_count,
+            "errors_by_type": self.errors_by_type,
+            "driver_restarts": self.driver_restarts,
             "avg_interval_seconds": avg_interval,
             "messages_per_min": messages_per_min,
             "last_sent_at": self._last_sent_at.isoformat() if self._last_sent_at else None,
-            "running": self.is_running
+            "running": self.is_running,
+            "concurrency": self.concurrency,
+            "active_workers": self.active_workers,
+            "mode": self.mode,
+            "avg_latency_seconds": self._latency["response"].overall.mean,
+            "last_latency_seconds": self._last_latency,
+            "avg_first_token_seconds": self._latency["first_token"].overall.mean,
+            "avg_complete_seconds": self._latency["complete"].overall.mean,
+            "avg_round_trips_per_send": avg_round_trips,
+            "latency": {name: stats.summary() for name, stats in self._latency.items()},
+            "log_writer": self._csv_writer.stats() if self._csv_writer else None,
+            "run_log": self._run_log.stats() if self._run_log else None,
+            "driver_resolution": self._driver_resolution(),
+            "open_model": self._scheduler.stats() if self._scheduler else None,
+            "scenarios": {name: st.summary() for name, st in self._scenario_stats.items()} or None,
         }
 
 if __name__ == "__main__":
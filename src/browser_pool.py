@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+from chatbot_automator import ChatbotAutomator
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileStore:
+    """Persistent Chrome profile directories plus the shared login cookie jar.
+
+    Chrome locks a ``--user-data-dir`` while it runs, so every live browser
+    leases its own ``slot-N`` directory; released slots are reused (keeping
+    their cache/local storage) by the next browser.
+    """
+
+    def __init__(self, base_dir: str, cookies_file: Optional[str] = None):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.cookies_file = Path(cookies_file) if cookies_file else self.base_dir / "cookies.json"
+        self._leased: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def lease_profile(self) -> str:
+        with self._lock:
+            n = 0
+            while f"slot-{n}" in self._leased:
+                n += 1
+            name = f"slot-{n}"
+            self._leased.add(name)
+        path = self.base_dir / name
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path.resolve())
+
+    def release_profile(self, profile_dir: Optional[str]) -> None:
+        if not profile_dir:
+            return
+        with self._lock:
+            self._leased.discard(Path(profile_dir).name)
+
+    def has_cookies(self) -> bool:
+        return self.cookies_file.exists()
+
+
+class BrowserPool:
+    """Keeps ``size`` started (and, with saved cookies, logged-in) automators ready.
+
+    A background thread refills the pool so that replacing a crashed session
+    is a queue pop instead of a Chrome boot plus manual login.
+    """
+
+    def __init__(self,
+                 factory: Callable[[], ChatbotAutomator],
+                 size: int = 1,
+                 can_warm: Optional[Callable[[], bool]] = None,
+                 on_discard: Optional[Callable[[ChatbotAutomator], None]] = None):
+        self.factory = factory
+        self.size = max(0, int(size))
+        self.can_warm = can_warm or (lambda: True)
+        self.on_discard = on_discard
+        self._idle: "queue.Queue[ChatbotAutomator]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._warming = 0
+        self.warmed_total = 0
+        self.warm_failures = 0
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._fill_loop, name="browser-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        while True:
+            try:
+                automator = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(automator)
+
+    def acquire(self, timeout: float = 0.0) -> Optional[ChatbotAutomator]:
+        """Pop a warm automator that still responds, or None if none is ready."""
+        while True:
+            try:
+                automator = self._idle.get(timeout=timeout) if timeout > 0 else self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if automator.is_alive():
+                return automator
+            logger.warning("Discarding dead warm browser")
+            self._discard(automator)
+
+    def status(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self.available,
+            "warming": self._warming,
+            "warmed_total": self.warmed_total,
+            "warm_failures": self.warm_failures,
+        }
+
+    def _discard(self, automator: ChatbotAutomator) -> None:
+        try:
+            automator.close()
+        except Exception:
+            pass
+        if self.on_discard:
+            self.on_discard(automator)
+
+    def _fill_loop(self) -> None:
+        while not self._stop_event.is_set():
+            if self.available + self._warming >= self.size or not self.can_warm():
+                self._stop_event.wait(0.5)
+                continue
+            self._warming += 1
+            try:
+                automator = self.factory()
+                if automator.start():
+                    if self._stop_event.is_set():
+                        self._discard(automator)
+                    else:
+                        self._idle.put(automator)
+                        self.warmed_total += 1
+                else:
+                    self.warm_failures += 1
+                    self._discard(automator)
+                    self._stop_event.wait(1.0)
+            except Exception as e:
+                self.warm_failures += 1
+                logger.exception(f"Warm browser start failed: {e}")
+                self._stop_event.wait(1.0)
+            finally:
+                self._warming -= 1
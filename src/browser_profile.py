@@ -0,0 +1,115 @@
+"""
+Chrome launch profile shared by ChatbotAutomator and DarcyChatbotTester.
+
+The "lean" profile trades page fidelity for memory: the chat only needs the DOM
+and its scripts, so images, fonts and media are not downloaded, background
+services are off, the window is small and the renderer's JS heap is capped.
+With ``lean: false`` (default) the browser is launched exactly as before.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Chrome switches that cut background work and per-process memory
+LEAN_ARGS = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+)
+
+# URL patterns blocked through the DevTools protocol (Network.setBlockedURLs)
+FONT_PATTERNS = ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot")
+MEDIA_PATTERNS = ("*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav", "*.m4a", "*.m3u8")
+
+# Content setting value 2 = block
+_BLOCK = 2
+
+
+class BrowserProfile:
+    """Options applied to every Chrome started by the harness.
+
+    ``page_load_strategy`` "eager" returns from ``driver.get`` at
+    DOMContentLoaded instead of waiting for every subresource;
+    ``renderer_memory_mb`` caps the V8 heap of each renderer (0 = no cap) and
+    ``renderer_process_limit`` how many renderer processes Chrome may spawn.
+    """
+
+    def __init__(self, lean: bool = False, page_load_strategy: str = "eager",
+                 block_images: bool = True, block_fonts: bool = True, block_media: bool = True,
+                 window_size: str = "800,600", renderer_memory_mb: int = 512,
+                 renderer_process_limit: int = 1, extra_args=()):
+        if page_load_strategy not in ("normal", "eager", "none"):
+            raise ValueError(f"Unknown page_load_strategy: {page_load_strategy}")
+        self.lean = lean
+        self.page_load_strategy = page_load_strategy
+        self.block_images = block_images
+        self.block_fonts = block_fonts
+        self.block_media = block_media
+        self.window_size = window_size
+        self.renderer_memory_mb = int(renderer_memory_mb or 0)
+        self.renderer_process_limit = int(renderer_process_limit or 0)
+        self.extra_args = tuple(extra_args or ())
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "BrowserProfile":
+        """Build from the ``browser_profile`` config section (missing keys use the defaults)."""
+        cfg = dict(cfg or {})
+        return cls(**{key: value for key, value in cfg.items() if value is not None})
+
+    @property
+    def blocked_url_patterns(self) -> list:
+        patterns = []
+        if self.block_fonts:
+            patterns.extend(FONT_PATTERNS)
+        if self.block_media:
+            patterns.extend(MEDIA_PATTERNS)
+        return patterns
+
+    def apply(self, options) -> None:
+        """Add the lean switches and preferences to a ``ChromeOptions``."""
+        for arg in self.extra_args:
+            options.add_argument(arg)
+        if not self.lean:
+            return
+        options.page_load_strategy = self.page_load_strategy
+        for arg in LEAN_ARGS:
+            options.add_argument(arg)
+        if self.window_size:
+            # Replace the caller's window size instead of passing two
+            options.arguments[:] = [a for a in options.arguments if not a.startswith("--window-size=")]
+            options.add_argument(f"--window-size={self.window_size}")
+        if self.renderer_memory_mb > 0:
+            options.add_argument(f"--js-flags=--max-old-space-size={self.renderer_memory_mb}")
+        if self.renderer_process_limit > 0:
+            options.add_argument(f"--renderer-process-limit={self.renderer_process_limit}")
+        prefs = {}
+        if self.block_images:
+            prefs["profile.managed_default_content_settings.images"] = _BLOCK
+            options.add_argument("--blink-settings=imagesEnabled=false")
+        if self.block_media:
+            prefs["profile.managed_default_content_settings.media_stream"] = _BLOCK
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
+
+    def attach(self, driver) -> None:
+        """Block font/media downloads in a started driver (Chrome DevTools protocol)."""
+        patterns = self.blocked_url_patterns if self.lean else []
+        if not patterns:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            # Not fatal: the browser still works, it just downloads fonts/media
+            logger.warning("Could not block font/media downloads: %s", e)
@@ -5,26 +5,148 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import (NoSuchElementException, NoSuchFrameException,
+                                        StaleElementReferenceException)
+from browser_profile import BrowserProfile
+from driver_resolver import ChromeDriverResolver
+import json
 import time
 import logging
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
 from typing import Optional, Dict
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class SendResult:
+    """Resultado de um envio: resposta capturada e tempos medidos (segundos).
+
+    ``send_seconds`` é o custo do próprio envio (localizar input, digitar, Enter);
+    ``first_token_seconds`` vai do Enter até surgir texto numa nova mensagem do bot;
+    ``complete_seconds`` vai do Enter até esse texto parar de mudar.
+    ``phases`` traz o tempo de parede de cada etapa do harness (iframe_switch,
+    element_lookup, send, capture), para separar custo do WebDriver e do chatbot;
+    ``round_trips`` conta os comandos WebDriver (idas e voltas HTTP) até o envio,
+    sem a captura da resposta.
+    """
+    message: str
+    response: Optional[str] = None
+    ok: bool = True
+    error: Optional[str] = None
+    sent_at: Optional[float] = None  # epoch (time.time()) do envio
+    send_seconds: Optional[float] = None
+    first_token_seconds: Optional[float] = None
+    complete_seconds: Optional[float] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+    round_trips: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Observa o DOM do iframe e registra (em performance.now()) quando surge texto numa
+# mensagem nova e a última vez que esse texto mudou. Mensagens iguais à enviada
+# (nossa própria bolha) são ignoradas quando não há seletor específico do bot.
+_REPLY_PROBE_JS = """
+const sel = arguments[0], sent = arguments[1];
+if (window.__darcyObserver) { window.__darcyObserver.disconnect(); }
+const probe = {baseline: document.querySelectorAll(sel).length, sent: null,
+               first: null, last: null, text: null, start: performance.now()};
+window.__darcyProbe = probe;
+if (!window.__darcyKeyHook) {
+  window.__darcyKeyHook = true;
+  document.addEventListener('keydown', function(e) {
+    const p = window.__darcyProbe;
+    if (p && e.key === 'Enter' && p.sent === null) { p.sent = performance.now(); }
+  }, true);
+}
+const check = function() {
+  const items = document.querySelectorAll(sel);
+  for (let i = items.length - 1; i >= probe.baseline; i--) {
+    const t = (items[i].innerText || '').trim();
+    if (!t || t === sent) { continue; }
+    if (t !== probe.text) {
+      const now = performance.now();
+      if (probe.first === null) { probe.first = now; }
+      probe.last = now;
+      probe.text = t;
+    }
+    return;
+  }
+};
+const obs = new MutationObserver(check);
+obs.observe(document.body, {childList: true, subtree: true, characterData: true});
+window.__darcyObserver = obs;
+"""
+
+# Envio numa única chamada: (opcionalmente) arma a sonda de resposta acima,
+# preenche o input como um usuário faria (setter nativo + evento input, para
+# frameworks reativos) e dispara Enter. Se o keydown não for tratado pela
+# página, envia também keypress. Argumentos: input, texto, seletor da resposta
+# (ou null) e texto enviado para a sonda.
+_SCRIPT_SUBMIT_JS = """
+if (arguments[2]) { (function() {""" + _REPLY_PROBE_JS + """}).apply(null, [arguments[2], arguments[3]]); }
+const input = arguments[0], text = arguments[1];
+input.focus();
+const proto = input.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(input, text);
+input.dispatchEvent(new Event('input', {bubbles: true}));
+const key = {key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true, cancelable: true};
+if (input.dispatchEvent(new KeyboardEvent('keydown', key))) {
+  input.dispatchEvent(new KeyboardEvent('keypress', key));
+}
+input.dispatchEvent(new KeyboardEvent('keyup', key));
+"""
+
+# Erros que indicam handle de iframe/input desatualizado (página recarregada)
+_STALE_ERRORS = (StaleElementReferenceException, NoSuchFrameException, NoSuchElementException)
+
+_REPLY_POLL_JS = """
+const p = window.__darcyProbe;
+if (!p) { return null; }
+return {sent: p.sent === null ? p.start : p.sent, first: p.first, last: p.last,
+        text: p.text, now: performance.now()};
+"""
+
 class ChatbotAutomator:
     """Encapsula a interação com o chatbot via Selenium."""
 
     def __init__(self, url: str, *, headless: bool = False, selectors: Optional[Dict] = None,
-                 wait_for_manual_login: bool = False, manual_login_wait_seconds: int = 120):
+                 wait_for_manual_login: bool = False, manual_login_wait_seconds: int = 120,
+                 profile_dir: Optional[str] = None, cookies_file: Optional[str] = None,
+                 response_timeout: float = 60.0, response_settle_seconds: float = 1.0,
+                 script_submit: bool = False, browser_profile: Optional[BrowserProfile] = None,
+                 driver_resolver: Optional[ChromeDriverResolver] = None):
         self.url = url
         self.driver: Optional[webdriver.Chrome] = None
         self.headless = headless
         self.selectors = selectors or {}
         self.wait_for_manual_login = wait_for_manual_login
         self.manual_login_wait_seconds = manual_login_wait_seconds
+        # Diretório de perfil persistente do Chrome e arquivo de cookies da sessão logada
+        self.profile_dir = profile_dir
+        self.cookies_file = Path(cookies_file) if cookies_file else None
+        # Espera pela resposta: tempo máximo e quanto tempo o texto deve ficar estável
+        self.response_timeout = response_timeout
+        self.response_settle_seconds = response_settle_seconds
+        # Envio via script injetado (1 comando) em vez de send_keys
+        self.script_submit = script_submit
+        # Flags do Chrome (perfil "lean": sem imagens/fontes/mídia, janela pequena)
+        self.browser_profile = browser_profile or BrowserProfile()
+        # Caminho do chromedriver, resolvido uma vez por processo
+        self.driver_resolver = driver_resolver or ChromeDriverResolver()
+        # Tempo (s) de cada etapa do último start: driver_resolve, browser_launch, page_load
+        self.startup: Dict[str, float] = {}
+        # Handles mantidos entre mensagens: o driver fica dentro do iframe do chat
+        self._in_chat_frame = False
+        self._chat_input = None
+        # Comandos WebDriver enviados por este navegador (ver _count_round_trips)
+        self.round_trips = 0
 
     def start(self) -> bool:
+        self.startup = {}
         try:
             options = Options()
             if self.headless:
@@ -32,14 +154,31 @@ class ChatbotAutomator:
             options.add_argument('--no-sandbox')
             options.add_argument('--disable-dev-shm-usage')
             options.add_argument('--disable-gpu')
-            service = Service(ChromeDriverManager().install())
+            if self.profile_dir:
+                options.add_argument(f'--user-data-dir={self.profile_dir}')
+            self.browser_profile.apply(options)
+            mark = time.monotonic()
+            resolution = self.driver_resolver.resolve()
+            self.startup['driver_resolve'] = time.monotonic() - mark
+            mark = time.monotonic()
+            service = Service(executable_path=resolution.path)
             self.driver = webdriver.Chrome(service=service, options=options)
+            self.browser_profile.attach(self.driver)
+            self.startup['browser_launch'] = time.monotonic() - mark
+            self._count_round_trips(self.driver)
+            self._reset_chat_handles()
             self.driver.set_page_load_timeout(60)
+            mark = time.monotonic()
             self.driver.get(self.url)
+            self.startup['page_load'] = time.monotonic() - mark
             logger.info("Página carregada: %s", self.url)
+            if self.load_cookies() and self._chat_available():
+                logger.info("Sessão restaurada a partir de %s", self.cookies_file)
+                return True
             if self.wait_for_manual_login:
                 logger.info("Aguardando login manual (até %s s)...", self.manual_login_wait_seconds)
                 self._countdown(self.manual_login_wait_seconds)
+                self.save_cookies()
             return True
         except Exception as e:
             logger.exception("Erro iniciando WebDriver: %s", e)
@@ -49,63 +188,179 @@ class ChatbotAutomator:
         for _ in range(seconds):
             if not self.driver:
                 break
+            if self._chat_available():
+                logger.info("Chat disponível; encerrando espera de login.")
+                break
             time.sleep(1)
 
+    def _chat_available(self) -> bool:
+        """True quando o iframe do chat já está presente (usuário autenticado)."""
+        try:
+            iframe_id = self.selectors.get('iframe_id', 'tool_content')
+            return bool(self.driver.find_elements(By.ID, iframe_id))
+        except Exception:
+            return False
+
+    def is_alive(self) -> bool:
+        """Verifica (barato) se o navegador ainda responde."""
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def save_cookies(self) -> bool:
+        if not (self.driver and self.cookies_file):
+            return False
+        try:
+            cookies = self.driver.get_cookies()
+            if not cookies:
+                return False
+            self.cookies_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cookies_file.with_suffix('.tmp')
+            tmp.write_text(json.dumps(cookies), encoding='utf-8')
+            tmp.replace(self.cookies_file)
+            logger.info("Cookies da sessão salvos em %s", self.cookies_file)
+            return True
+        except Exception as e:
+            logger.warning("Falha salvando cookies: %s", e)
+            return False
+
+    def load_cookies(self) -> bool:
+        """Injeta cookies persistidos e recarrega a página. Requer a URL já carregada."""
+        if not (self.driver and self.cookies_file and self.cookies_file.exists()):
+            return False
+        try:
+            cookies = json.loads(self.cookies_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.warning("Arquivo de cookies inválido (%s): %s", self.cookies_file, e)
+            return False
+        restored = 0
+        for cookie in cookies:
+            try:
+                self.driver.add_cookie(cookie)
+                restored += 1
+            except Exception:
+                continue
+        if not restored:
+            return False
+        self.driver.get(self.url)
+        self._reset_chat_handles()
+        return True
+
+    def _count_round_trips(self, driver) -> None:
+        """Conta cada comando enviado ao chromedriver (inclui os de WebElement e de esperas)."""
+        execute = driver.execute
+
+        def counted(driver_command, params=None):
+            self.round_trips += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted
+
+    def _reset_chat_handles(self) -> None:
+        self._in_chat_frame = False
+        self._chat_input = None
+
     def _switch_into_iframe(self):
         iframe_id = self.selectors.get('iframe_id', 'tool_content')
         WebDriverWait(self.driver, 20).until(
             EC.frame_to_be_available_and_switch_to_it((By.ID, iframe_id))
         )
 
-    def send_message(self, message: str) -> Optional[str]:
-        if not self.driver:
-            logger.warning("Driver não iniciado.")
-            return None
-        response_text = None
-        try:
+    def _reply_selector(self) -> Optional[str]:
+        return self.selectors.get('bot_message_css') or self.selectors.get('message_item_css')
+
+    def _submit(self, message: str, result: SendResult) -> None:
+        """Entra no iframe e localiza o input só quando necessário, depois envia."""
+        phases = result.phases
+        mark = time.monotonic()
+        if not self._in_chat_frame:
             self.driver.switch_to.default_content()
             self._switch_into_iframe()
+            self._in_chat_frame = True
+        phases['iframe_switch'] = time.monotonic() - mark
+        mark = time.monotonic()
+        if self._chat_input is None:
             input_tag = self.selectors.get('input_tag', 'textarea')
-            chat_input = WebDriverWait(self.driver, 20).until(
+            self._chat_input = WebDriverWait(self.driver, 20).until(
                 EC.presence_of_element_located((By.TAG_NAME, input_tag))
             )
-            chat_input.send_keys(message)
-            chat_input.send_keys(Keys.RETURN)
+        phases['element_lookup'] = time.monotonic() - mark
+        mark = time.monotonic()
+        reply_css = self._reply_selector()
+        if self.script_submit:
+            self.driver.execute_script(_SCRIPT_SUBMIT_JS, self._chat_input, message, reply_css, message.strip())
+        else:
+            if reply_css:
+                self.driver.execute_script(_REPLY_PROBE_JS, reply_css, message.strip())
+            self._chat_input.send_keys(message + Keys.RETURN)
+        phases['send'] = time.monotonic() - mark
+
+    def send_message(self, message: str) -> SendResult:
+        result = SendResult(message=message, sent_at=time.time())
+        if not self.driver:
+            logger.warning("Driver não iniciado.")
+            result.ok, result.error = False, "Driver não iniciado"
+            return result
+        started = time.monotonic()
+        round_trips = self.round_trips
+        try:
+            try:
+                self._submit(message, result)
+            except _STALE_ERRORS as e:
+                # Iframe ou input recriados pela página: localiza de novo, uma vez
+                logger.info("Handles do chat desatualizados (%s); localizando de novo", type(e).__name__)
+                self._reset_chat_handles()
+                self._submit(message, result)
+            result.send_seconds = time.monotonic() - started
+            result.round_trips = self.round_trips - round_trips
             logger.info("Mensagem enviada: %s", message)
-            # Tentar capturar resposta se configurado
-            if self.selectors:
-                response_text = self._capture_last_response()
-            return response_text
+            if self._reply_selector():
+                mark = time.monotonic()
+                self._wait_for_reply(result)
+                result.phases['capture'] = time.monotonic() - mark
+            return result
         except Exception as e:
             logger.exception("Erro enviando mensagem: %s", e)
-            return None
+            result.ok, result.error = False, str(e)
+            self._reset_chat_handles()
+            return result
         finally:
-            try:
-                self.driver.switch_to.default_content()
-            except Exception:
-                pass
+            if result.round_trips is None:
+                result.round_trips = self.round_trips - round_trips
 
-    def _capture_last_response(self) -> Optional[str]:
-        try:
-            messages_container_css = self.selectors.get('messages_container_css')
-            message_item_css = self.selectors.get('message_item_css')
-            if not (messages_container_css and message_item_css):
-                return None
-            # Já estamos dentro do iframe
-            container = self.driver.find_elements(By.CSS_SELECTOR, messages_container_css)
-            if not container:
-                return None
-            items = self.driver.find_elements(By.CSS_SELECTOR, message_item_css)
-            if not items:
-                return None
-            last = items[-1]
-            text = last.text.strip()
-            logger.debug("Última resposta capturada: %s", text)
-            return text
-        except Exception:
-            return None
+    def _wait_for_reply(self, result: SendResult) -> None:
+        """Aguarda uma nova mensagem do bot e que seu texto pare de mudar.
+
+        Os tempos vêm do relógio do navegador (performance.now()), então não
+        incluem a latência de ida e volta do WebDriver em cada consulta.
+        """
+        deadline = time.monotonic() + self.response_timeout
+        state = None
+        settled = False
+        while time.monotonic() < deadline:
+            state = self.driver.execute_script(_REPLY_POLL_JS)
+            if state and state.get('last') is not None:
+                if (state['now'] - state['last']) / 1000.0 >= self.response_settle_seconds:
+                    settled = True
+                    break
+            time.sleep(0.1)
+        if state and state.get('first') is not None:
+            result.response = state.get('text')
+            result.first_token_seconds = max(0.0, (state['first'] - state['sent']) / 1000.0)
+        if not settled:
+            # Sem resposta, ou ainda mudando no prazo: é timeout, não uma resposta truncada
+            logger.warning("Resposta não concluída em %.0f s", self.response_timeout)
+            result.ok, result.error = False, "reply timeout"
+            return
+        result.complete_seconds = max(0.0, (state['last'] - state['sent']) / 1000.0)
+        logger.debug("Resposta capturada em %.2f s: %s", result.complete_seconds, result.response)
 
     def close(self):
+        self._reset_chat_handles()
         if self.driver:
             try:
                 self.driver.quit()
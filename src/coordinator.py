@@ -0,0 +1,272 @@
+"""
+Multi-node load generation: a coordinator drives several agent nodes.
+
+Every agent is a normal control API (``web_app.py``) with its own BotManager.
+Agents register themselves (``AgentRegistrar`` heartbeat) or are listed
+statically; the coordinator splits the target load across them by capacity,
+starts/stops them together and merges their counters and latency histograms.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from latency_histogram import merge_exports, summarize_merged
+
+logger = logging.getLogger(__name__)
+
+# Settings copied to every agent as-is; concurrency and arrival_rate are split
+SHARED_SETTINGS = ("mode", "arrival_process", "interval_seconds", "jitter")
+SUMMED_METRICS = ("messages_sent", "errors_count", "driver_restarts", "active_workers",
+                  "concurrency", "messages_per_min")
+
+
+def split_integer(total: int, weights: Sequence[float]) -> List[int]:
+    """Split ``total`` proportionally to ``weights`` (largest remainder, sums exactly)."""
+    weight_sum = float(sum(weights))
+    if not weights or weight_sum <= 0:
+        return [0] * len(weights)
+    exact = [total * w / weight_sum for w in weights]
+    shares = [int(x) for x in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - shares[i], reverse=True)
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+class AgentNode:
+    def __init__(self, url: str, capacity: float = 1.0, agent_id: Optional[str] = None, static: bool = False):
+        self.agent_id = agent_id or uuid.uuid4().hex[:8]
+        self.url = url.rstrip('/')
+        self.capacity = float(capacity)
+        self.static = static
+        self.registered_at = time.time()
+        self.last_seen = time.time()
+        self.last_error: Optional[str] = None
+        self.share: Dict[str, Any] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "agent_id": self.agent_id,
+            "url": self.url,
+            "capacity": self.capacity,
+            "static": self.static,
+            "last_seen": self.last_seen,
+            "last_error": self.last_error,
+            "share": self.share,
+        }
+
+
+class Coordinator:
+    """Registry of agent nodes plus fan-out of control calls and metric merging."""
+
+    def __init__(self, api_key: Optional[str] = None, agents: Optional[List[dict]] = None,
+                 agent_ttl: float = 30.0, timeout: float = 5.0):
+        self.api_key = api_key
+        self.agent_ttl = agent_ttl
+        self.timeout = timeout
+        self._agents: Dict[str, AgentNode] = {}
+        self._lock = threading.Lock()
+        self._http = requests.Session()
+        if api_key:
+            self._http.headers['X-API-KEY'] = api_key
+        for item in agents or []:
+            self.register(item['url'], item.get('capacity', 1), item.get('agent_id'), static=True)
+
+    def register(self, url: str, capacity: float = 1.0, agent_id: Optional[str] = None,
+                 static: bool = False) -> AgentNode:
+        """Add an agent, or refresh it (heartbeat) if the id or URL is already known."""
+        url = url.rstrip('/')
+        with self._lock:
+            node = self._agents.get(agent_id) if agent_id else None
+            node = node or next((a for a in self._agents.values() if a.url == url), None)
+            if node is None:
+                node = AgentNode(url, capacity, agent_id, static)
+                self._agents[node.agent_id] = node
+                logger.info("Agent registered: %s (%s, capacity %s)", node.agent_id, url, capacity)
+            node.url = url
+            node.capacity = float(capacity)
+            node.last_seen = time.time()
+            return node
+
+    def unregister(self, agent_id: str) -> bool:
+        with self._lock:
+            return self._agents.pop(agent_id, None) is not None
+
+    @property
+    def agents(self) -> List[AgentNode]:
+        """Agents still alive (static ones, or registered with a recent heartbeat)."""
+        cutoff = time.time() - self.agent_ttl
+        with self._lock:
+            return [a for a in self._agents.values() if a.static or a.last_seen >= cutoff]
+
+    def _call(self, agent: AgentNode, method: str, path: str, payload: Optional[dict] = None) -> Tuple[bool, Any]:
+        try:
+            resp = self._http.request(method, agent.url + path, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            agent.last_error = None
+            return True, resp.json()
+        except Exception as e:
+            agent.last_error = str(e)
+            logger.warning("Agent %s %s %s failed: %s", agent.agent_id, method, path, e)
+            return False, str(e)
+
+    def _fan_out(self, agents: List[AgentNode], fn: Callable[[AgentNode], Any]) -> List[Any]:
+        if not agents:
+            return []
+        with ThreadPoolExecutor(max_workers=min(32, len(agents))) as pool:
+            return list(pool.map(fn, agents))
+
+    def plan(self, settings: dict, agents: Optional[List[AgentNode]] = None) -> Dict[str, dict]:
+        """Per-agent settings: concurrency and arrival_rate split by capacity.
+
+        With a concurrency the rate follows each agent's sessions, so agents left
+        without sessions (and skipped by ``start``) take no part of the rate.
+        """
+        agents = self.agents if agents is None else agents
+        weights = [a.capacity for a in agents]
+        shared = {k: settings[k] for k in SHARED_SETTINGS if k in settings}
+        concurrency = split_integer(int(settings['concurrency']), weights) if 'concurrency' in settings else None
+        rate_weights = weights if concurrency is None else concurrency
+        total_weight = sum(rate_weights) or 1.0
+        result = {}
+        for i, agent in enumerate(agents):
+            share = dict(shared)
+            if concurrency is not None:
+                share['concurrency'] = concurrency[i]
+            if 'arrival_rate' in settings:
+                share['arrival_rate'] = float(settings['arrival_rate']) * rate_weights[i] / total_weight
+            result[agent.agent_id] = share
+        return result
+
+    def start(self, settings: Optional[dict] = None) -> Dict[str, Any]:
+        """Configure every agent with its share, then start them together."""
+        agents = self.agents
+        plan = self.plan(settings or {}, agents)
+
+        def configure_and_start(agent: AgentNode):
+            share = plan[agent.agent_id]
+            agent.share = share
+            if share.get('concurrency') == 0:
+                return {"skipped": "no sessions assigned"}
+            if share:
+                ok, data = self._call(agent, 'POST', '/api/config', share)
+                if not ok:
+                    return {"error": data}
+            ok, data = self._call(agent, 'POST', '/api/start')
+            return data if ok else {"error": data}
+
+        return dict(zip([a.agent_id for a in agents], self._fan_out(agents, configure_and_start)))
+
+    def stop(self) -> Dict[str, Any]:
+        agents = self.agents
+        results = self._fan_out(agents, lambda a: self._call(a, 'POST', '/api/stop')[1])
+        return dict(zip([a.agent_id for a in agents], results))
+
+    def status(self) -> List[dict]:
+        agents = self.agents
+
+        def fetch(agent: AgentNode) -> dict:
+            ok, data = self._call(agent, 'GET', '/api/status')
+            return dict(agent.snapshot(), ok=ok, status=data if ok else None)
+
+        return self._fan_out(agents, fetch)
+
+    def metrics(self) -> dict:
+        """Counters summed across agents and latency percentiles from merged histograms."""
+        agents = self.agents
+
+        def fetch(agent: AgentNode):
+            ok, metrics = self._call(agent, 'GET', '/api/metrics')
+            if not ok:
+                return agent, None, None
+            ok, histograms = self._call(agent, 'GET', '/api/histograms')
+            return agent, metrics, histograms if ok else None
+
+        merged: Dict[str, Any] = {name: 0 for name in SUMMED_METRICS}
+        errors_by_type: Dict[str, int] = {}
+        exports = []
+        per_agent = []
+        running = False
+        for agent, metrics, histograms in self._fan_out(agents, fetch):
+            entry = {"agent_id": agent.agent_id, "url": agent.url, "ok": metrics is not None,
+                     "error": agent.last_error}
+            per_agent.append(entry)
+            if metrics is None:
+                continue
+            running = running or bool(metrics.get('running'))
+            for name in SUMMED_METRICS:
+                merged[name] += metrics.get(name) or 0
+            for kind, n in (metrics.get('errors_by_type') or {}).items():
+                errors_by_type[kind] = errors_by_type.get(kind, 0) + n
+            entry.update({name: metrics.get(name) for name in ("running", "messages_sent", "messages_per_min",
+                                                               "errors_count", "active_workers")})
+            entry["histograms_ok"] = histograms is not None
+            exports.append(histograms)
+        latency_summary = summarize_merged(merge_exports(exports))
+        merged.update({
+            "running": running,
+            "agents_total": len(agents),
+            "agents_reporting": sum(1 for a in per_agent if a["ok"]),
+            "errors_by_type": errors_by_type,
+            "latency": latency_summary,
+            "agents": per_agent,
+        })
+        return merged
+
+
+class AgentRegistrar:
+    """Heartbeat thread that (re-)registers this node with a coordinator."""
+
+    def __init__(self, coordinator_url: str, agent_url: str, capacity: float = 1.0,
+                 agent_id: Optional[str] = None, api_key: Optional[str] = None,
+                 interval: float = 10.0, timeout: float = 5.0):
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.agent_url = agent_url
+        self.capacity = capacity
+        self.agent_id = agent_id
+        self.api_key = api_key
+        self.interval = interval
+        self.timeout = timeout
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="agent-registrar", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def register_once(self) -> bool:
+        headers = {'X-API-KEY': self.api_key} if self.api_key else {}
+        try:
+            resp = requests.post(
+                f"{self.coordinator_url}/api/cluster/register",
+                json={"url": self.agent_url, "capacity": self.capacity, "agent_id": self.agent_id},
+                headers=headers, timeout=self.timeout
+            )
+            resp.raise_for_status()
+            # Keep the id the coordinator assigned so heartbeats refresh the same entry
+            self.agent_id = resp.json().get('agent', {}).get('agent_id', self.agent_id)
+            self.last_error = None
+            return True
+        except Exception as e:
+            if self.last_error is None:
+                logger.warning(f"Failed to register with coordinator {self.coordinator_url}: {e}")
+            self.last_error = str(e)
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.register_once()
+            self._stop.wait(self.interval)
@@ -10,28 +10,158 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from browser_profile import BrowserProfile
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import time
 
+# Elements matching a CSS selector; ``sel:contains('text')`` (jQuery style,
+# rejected by querySelectorAll) is emulated with a text filter.
+_MATCH_JS = """
+function darcyMatch(css) {
+  let needle = null;
+  const m = css.match(/^(.*):contains\\((['"])(.*)\\2\\)$/);
+  if (m) { css = m[1] || '*'; needle = m[3]; }
+  let found;
+  try { found = Array.from(document.querySelectorAll(css)); } catch (e) { return []; }
+  return needle === null ? found : found.filter(el => (el.textContent || '').includes(needle));
+}
+function darcyText(el) { return (el.innerText || el.textContent || '').trim(); }
+"""
+
+# Finds the first candidate selector that matches, in one round trip.
+# arguments[0]: CSS selectors in priority order; arguments[1]: take the last
+# match instead of the first; arguments[2]: skip a candidate whose chosen
+# element has no text. Returns [candidate index, element, text] or null.
+_SELECTOR_PROBE_JS = _MATCH_JS + """
+const candidates = arguments[0], last = arguments[1], needText = arguments[2];
+for (let i = 0; i < candidates.length; i++) {
+  const found = darcyMatch(candidates[i]);
+  if (!found.length) { continue; }
+  const el = last ? found[found.length - 1] : found[0];
+  const text = darcyText(el);
+  if (needText && !text) { continue; }
+  return [i, el, text];
+}
+return null;
+"""
+
+# Armed before sending: a MutationObserver tracks the latest bot message (last
+# element with text of the first matching candidate, ignoring our own bubble)
+# and records, in performance.now() time, when a message other than the one
+# present at arming time first shows text and when that text last changed.
+_REPLY_WATCH_JS = _MATCH_JS + """
+const candidates = arguments[0], sent = arguments[1];
+function latest() {
+  for (let i = 0; i < candidates.length; i++) {
+    const found = darcyMatch(candidates[i]);
+    if (!found.length) { continue; }
+    const el = found[found.length - 1], text = darcyText(el);
+    if (text && text !== sent) { return {index: i, el: el, text: text}; }
+  }
+  return null;
+}
+if (window.__darcyWatchObserver) { window.__darcyWatchObserver.disconnect(); }
+const base = latest();
+const watch = {first: null, last: null, text: null, index: null, start: performance.now()};
+window.__darcyWatch = watch;
+const check = function() {
+  const cur = latest();
+  if (!cur || (base && cur.el === base.el && cur.text === base.text)) { return; }
+  if (cur.text !== watch.text) {
+    const now = performance.now();
+    if (watch.first === null) { watch.first = now; }
+    watch.last = now;
+    watch.text = cur.text;
+    watch.index = cur.index;
+  }
+};
+const observer = new MutationObserver(check);
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+window.__darcyWatchObserver = observer;
+"""
+
+# Async: resolves once the watched reply has been stable for arguments[1] ms,
+# or after arguments[0] ms, checking in-page (no WebDriver round trips).
+_REPLY_WAIT_JS = """
+const timeoutMs = arguments[0], settleMs = arguments[1], done = arguments[arguments.length - 1];
+const watch = window.__darcyWatch;
+if (!watch) { done(null); return; }
+const started = performance.now();
+const finish = function(settled) {
+  if (window.__darcyWatchObserver) { window.__darcyWatchObserver.disconnect(); }
+  done({text: watch.text, index: watch.index, settled: settled,
+        first: watch.first === null ? null : watch.first - watch.start,
+        last: watch.last === null ? null : watch.last - watch.start});
+};
+(function tick() {
+  const now = performance.now();
+  if (watch.last !== null && now - watch.last >= settleMs) { finish(true); return; }
+  if (now - started >= timeoutMs) { finish(false); return; }
+  setTimeout(tick, 50);
+})();
+"""
+
 
 class DarcyChatbotTester:
     """
     Main class for testing the Darcy chatbot at https://aprender2teste.unb.br/my/
+
+    Element lookups probe every candidate selector in a single in-page query
+    and remember the winner per page; later messages reuse it and only probe
+    again after it stops matching or an interaction with it fails.
     """
+
+    # Common chatbot selectors, in priority order
+    INPUT_SELECTORS = [
+        "input[type='text']",
+        "textarea",
+        "[data-testid='chat-input']",
+        ".chat-input",
+        "#chat-input",
+        "[placeholder*='message']",
+        "[placeholder*='pergunta']"
+    ]
+    SEND_SELECTORS = [
+        "button[type='submit']",
+        ".send-button",
+        "#send-button",
+        "[data-testid='send-button']",
+        "button:contains('Enviar')",
+        "button:contains('Send')"
+    ]
+    RESPONSE_SELECTORS = [
+        ".chat-response",
+        ".bot-message",
+        "[data-testid='bot-response']",
+        ".message.bot",
+        ".chat-message:last-child"
+    ]
+    PROBE_POLL_SECONDS = 0.1
     
-    def __init__(self, headless: bool = False, timeout: int = 10):
+    def __init__(self, headless: bool = False, timeout: int = 10, base_url: Optional[str] = None,
+                 response_settle_seconds: float = 1.0, browser_profile: Optional[dict] = None):
         """
         Initialize the chatbot tester.
         
         Args:
             headless (bool): Run browser in headless mode
-            timeout (int): Default timeout for web elements
+            timeout (int): Default timeout for web elements and responses
+            base_url (str, optional): Chatbot page (e.g. the local mock server)
+            response_settle_seconds (float): How long a reply must stop changing to be complete
+            browser_profile (dict, optional): ``browser_profile`` settings, e.g. ``{"lean": True}``
         """
-        self.base_url = "https://aprender2teste.unb.br/my/"
+        self.base_url = base_url or "https://aprender2teste.unb.br/my/"
         self.timeout = timeout
+        self.response_settle_seconds = response_settle_seconds
+        self.browser_profile = BrowserProfile.from_config(browser_profile)
         self.driver: Optional[webdriver.Chrome] = None
+        self.learned_selectors: Dict[str, str] = {}
+        # Response selectors watched since the last send (None: no reply pending)
+        self._watched: Optional[List[str]] = None
+        # Milliseconds from the send to the first/last change of the last reply
+        self.last_response_timing: Dict[str, Optional[float]] = {}
         self.setup_logging()
         self.setup_driver(headless)
     
@@ -57,9 +187,11 @@ class DarcyChatbotTester:
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
+        self.browser_profile.apply(chrome_options)
         
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
+            self.browser_profile.attach(self.driver)
             self.logger.info("Chrome WebDriver initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize WebDriver: {e}")
@@ -74,6 +206,7 @@ class DarcyChatbotTester:
         """
         try:
             self.driver.get(self.base_url)
+            self.learned_selectors.clear()
             self.logger.info(f"Navigated to {self.base_url}")
             return True
         except Exception as e:
@@ -101,6 +234,83 @@ class DarcyChatbotTester:
             self.logger.warning(f"Element not found: {by}='{value}' - {e}")
             return None
     
+    def _probe(self, candidates: List[str], last: bool = False,
+               need_text: bool = False) -> Optional[Tuple[int, Any, str]]:
+        """Run the selector probe once; (candidate index, element, text) or None."""
+        hit = self.driver.execute_script(_SELECTOR_PROBE_JS, candidates, last, need_text)
+        return tuple(hit) if hit else None
+
+    def find_first(self, kind: str, candidates: List[str], timeout: float = 0.0,
+                   last: bool = False, need_text: bool = False) -> Optional[Tuple[Any, str]]:
+        """
+        Find an element by the learned selector for ``kind`` or, failing that,
+        by the first matching candidate (which is then learned).
+        
+        Args:
+            kind (str): Cache key, e.g. "input"
+            candidates (list): CSS selectors in priority order
+            timeout (float): Keep probing this long while nothing matches
+            last (bool): Use the last matching element (latest message)
+            need_text (bool): Skip elements without text
+            
+        Returns:
+            (WebElement, text) or None if nothing matched
+        """
+        learned = self.learned_selectors.get(kind)
+        if learned:
+            hit = self._probe([learned], last, need_text)
+            if hit:
+                return hit[1], hit[2]
+            self.logger.info(f"Learned {kind} selector '{learned}' no longer matches; probing again")
+            self.learned_selectors.pop(kind, None)
+        deadline = time.monotonic() + timeout
+        while True:
+            hit = self._probe(candidates, last, need_text)
+            if hit:
+                self.learned_selectors[kind] = candidates[hit[0]]
+                self.logger.info(f"Using {kind} selector '{candidates[hit[0]]}'")
+                return hit[1], hit[2]
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.PROBE_POLL_SECONDS)
+
+    def forget_selectors(self, *kinds: str):
+        """Drop learned selectors (all of them if no kind is given)."""
+        for kind in kinds or list(self.learned_selectors):
+            self.learned_selectors.pop(kind, None)
+
+    def _watch_for_reply(self, message: str):
+        """Start observing the page for the bot's reply to ``message``."""
+        learned = self.learned_selectors.get("response")
+        candidates = [learned] if learned else self.RESPONSE_SELECTORS
+        try:
+            self.driver.execute_script(_REPLY_WATCH_JS, candidates, message.strip())
+            self._watched = candidates
+        except Exception as e:
+            self.logger.warning(f"Could not watch for the reply: {e}")
+            self._watched = None
+
+    def _send_once(self, message: str):
+        found = self.find_first("input", self.INPUT_SELECTORS, timeout=2)
+        if not found:
+            return False
+        input_element = found[0]
+        self._watch_for_reply(message)
+        
+        # Clear and send message
+        input_element.clear()
+        input_element.send_keys(message)
+        
+        # The button is part of the same form, so it is there if the input is
+        found = self.find_first("send", self.SEND_SELECTORS)
+        if found:
+            found[0].click()
+        else:
+            # Try pressing Enter key
+            from selenium.webdriver.common.keys import Keys
+            input_element.send_keys(Keys.RETURN)
+        return True
+
     def send_message_to_chatbot(self, message: str) -> bool:
         """
         Send a message to the Darcy chatbot.
@@ -111,65 +321,30 @@ class DarcyChatbotTester:
         Returns:
             bool: True if message sent successfully, False otherwise
         """
-        try:
-            # Common chatbot input selectors to try
-            input_selectors = [
-                "input[type='text']",
-                "textarea",
-                "[data-testid='chat-input']",
-                ".chat-input",
-                "#chat-input",
-                "[placeholder*='message']",
-                "[placeholder*='pergunta']"
-            ]
-            
-            input_element = None
-            for selector in input_selectors:
-                input_element = self.wait_for_element(By.CSS_SELECTOR, selector, 2)
-                if input_element:
-                    break
-            
-            if not input_element:
-                self.logger.error("Could not find chat input element")
+        for attempt in range(2):
+            try:
+                if not self._send_once(message):
+                    self.logger.error("Could not find chat input element")
+                    return False
+                self.logger.info(f"Message sent: {message}")
+                return True
+            except Exception as e:
+                if attempt == 0 and self.learned_selectors:
+                    # e.g. the page re-rendered the form: learn the selectors again
+                    self.logger.warning(f"Send failed with learned selectors ({e}); probing again")
+                    self.forget_selectors("input", "send")
+                    continue
+                self.logger.error(f"Failed to send message: {e}")
                 return False
-            
-            # Clear and send message
-            input_element.clear()
-            input_element.send_keys(message)
-            
-            # Try to find and click send button
-            send_selectors = [
-                "button[type='submit']",
-                ".send-button",
-                "#send-button",
-                "[data-testid='send-button']",
-                "button:contains('Enviar')",
-                "button:contains('Send')"
-            ]
-            
-            send_button = None
-            for selector in send_selectors:
-                send_button = self.wait_for_element(By.CSS_SELECTOR, selector, 2)
-                if send_button:
-                    break
-            
-            if send_button:
-                send_button.click()
-            else:
-                # Try pressing Enter key
-                from selenium.webdriver.common.keys import Keys
-                input_element.send_keys(Keys.RETURN)
-            
-            self.logger.info(f"Message sent: {message}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to send message: {e}")
-            return False
+        return False
     
     def get_chatbot_response(self, timeout: Optional[int] = None) -> Optional[str]:
         """
-        Get the latest response from the chatbot.
+        Get the chatbot's response to the last message sent.
+        
+        Waits until a new bot message appears and its text stops changing for
+        ``response_settle_seconds`` (bounded by the timeout). Without a message
+        sent by this tester, returns the latest bot message on the page.
         
         Args:
             timeout (int, optional): Custom timeout
@@ -179,27 +354,31 @@ class DarcyChatbotTester:
         """
         wait_time = timeout or self.timeout
         try:
-            # Common response selectors
-            response_selectors = [
-                ".chat-response",
-                ".bot-message",
-                "[data-testid='bot-response']",
-                ".message.bot",
-                ".chat-message:last-child"
-            ]
+            if self._watched is None:
+                found = self.find_first("response", self.RESPONSE_SELECTORS, last=True, need_text=True)
+                return found[1] if found else None
             
-            time.sleep(2)  # Wait for response to appear
+            candidates, self._watched = self._watched, None
+            self.driver.set_script_timeout(wait_time + 5)
+            state = self.driver.execute_async_script(
+                _REPLY_WAIT_JS, wait_time * 1000, self.response_settle_seconds * 1000
+            )
+            if not state or not state.get("text"):
+                # A learned selector may be stale; watch every candidate next time
+                self.forget_selectors("response")
+                self.logger.warning(f"No chatbot response within {wait_time} s")
+                return None
             
-            for selector in response_selectors:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    response = elements[-1].text.strip()
-                    if response:
-                        self.logger.info(f"Received response: {response}")
-                        return response
-            
-            self.logger.warning("No chatbot response found")
-            return None
+            selector = candidates[state["index"]]
+            if self.learned_selectors.get("response") != selector:
+                self.learned_selectors["response"] = selector
+                self.logger.info(f"Using response selector '{selector}'")
+            self.last_response_timing = {"first_ms": state.get("first"), "complete_ms": state.get("last")}
+            if not state.get("settled"):
+                self.logger.warning(f"Response still changing after {wait_time} s; returning it as is")
+            response = state["text"]
+            self.logger.info(f"Received response: {response}")
+            return response
             
         except Exception as e:
             self.logger.error(f"Failed to get chatbot response: {e}")
@@ -241,9 +420,6 @@ class DarcyChatbotTester:
                     results["errors"].append(f"Failed to send message: {message}")
                 
                 results["conversation"].append(conversation_turn)
-                
-                # Small delay between messages
-                time.sleep(1)
             
             results["success"] = len(results["errors"]) == 0
             return results
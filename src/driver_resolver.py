@@ -0,0 +1,146 @@
+"""
+Resolve the chromedriver binary once per process instead of on every browser start.
+
+``ChromeDriverManager().install()`` queries the network for the latest driver
+each time it is called, which adds seconds to every worker recovery and fails
+on hosts without internet access. Resolution order:
+
+1. ``path`` configured explicitly (air-gapped hosts);
+2. on-disk cache ``<cache_dir>/<chrome major>/chromedriver`` for the installed
+   Chrome (a cache directory can be copied between hosts);
+3. download through webdriver-manager (skipped with ``offline``), copied into
+   the cache;
+4. ``chromedriver`` on ``PATH``;
+5. otherwise Selenium's own driver lookup (``Service()`` without a path).
+
+The result is memoized per process, so every worker and restart reuses it.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+_MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+_DRIVER_NAME = "chromedriver.exe" if os.name == "nt" else "chromedriver"
+
+_resolved: Dict[Tuple, "DriverResolution"] = {}
+_lock = threading.Lock()
+
+
+class DriverResolution:
+    """Where the driver came from and how long finding it took (seconds)."""
+
+    def __init__(self, path: Optional[str], source: str, seconds: float,
+                 chrome_version: Optional[str] = None):
+        self.path = path
+        self.source = source  # configured | cache | download | path | selenium
+        self.seconds = seconds
+        self.chrome_version = chrome_version
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "source": self.source, "seconds": self.seconds,
+                "chrome_version": self.chrome_version}
+
+
+def chrome_version() -> Optional[str]:
+    """Version of the installed Chrome/Chromium (``None`` if it cannot be told)."""
+    candidates = [shutil.which(name) for name in _CHROME_BINARIES]
+    if os.path.exists(_MAC_CHROME):
+        candidates.append(_MAC_CHROME)
+    for binary in filter(None, candidates):
+        try:
+            out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+\.\d+\.\d+\.\d+", out or "")
+        if match:
+            return match.group(0)
+    return None
+
+
+class ChromeDriverResolver:
+    """Finds the chromedriver path; see the module docstring for the order."""
+
+    def __init__(self, path: Optional[str] = None, cache_dir: Optional[str] = "drivers",
+                 offline: bool = False):
+        self.path = path or None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.offline = offline
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "ChromeDriverResolver":
+        cfg = cfg or {}
+        return cls(path=cfg.get('path'), cache_dir=cfg.get('cache_dir', 'drivers'),
+                   offline=bool(cfg.get('offline', False)))
+
+    @property
+    def _key(self) -> Tuple:
+        return (self.path, str(self.cache_dir) if self.cache_dir else None, self.offline)
+
+    @property
+    def resolution(self) -> Optional[DriverResolution]:
+        """Memoized result, if this process already resolved the driver."""
+        return _resolved.get(self._key)
+
+    def resolve(self) -> DriverResolution:
+        with _lock:
+            cached = _resolved.get(self._key)
+            if cached is None:
+                started = time.monotonic()
+                path, source, version = self._find()
+                cached = DriverResolution(path, source, time.monotonic() - started, version)
+                _resolved[self._key] = cached
+                logger.info("chromedriver resolved from %s in %.2f s: %s",
+                            source, cached.seconds, path or "(Selenium lookup)")
+            return cached
+
+    def _find(self) -> Tuple[Optional[str], str, Optional[str]]:
+        if self.path:
+            if not Path(self.path).is_file():
+                raise FileNotFoundError(f"chromedriver not found: {self.path}")
+            return self.path, "configured", None
+        version = chrome_version()
+        cached = self._cache_path(version)
+        if cached and cached.is_file():
+            return str(cached), "cache", version
+        if not self.offline:
+            try:
+                return self._download(cached), "download", version
+            except Exception as e:
+                logger.warning("chromedriver download failed (%s); falling back to PATH", e)
+        on_path = shutil.which("chromedriver")
+        if on_path:
+            return on_path, "path", version
+        return None, "selenium", version
+
+    def _cache_path(self, version: Optional[str]) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        major = version.split(".")[0] if version else "any"
+        return self.cache_dir / major / _DRIVER_NAME
+
+    @staticmethod
+    def _download(target: Optional[Path]) -> str:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        installed = ChromeDriverManager().install()
+        if not target:
+            return installed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(installed, target)
+        return str(target)
+
+
+def reset_cache() -> None:
+    """Forget the memoized resolutions (tests, or after upgrading Chrome)."""
+    with _lock:
+        _resolved.clear()
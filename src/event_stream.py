@@ -0,0 +1,159 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """Bounded per-client queue; a client that falls behind is resynced, never blocks others."""
+
+    def __init__(self, max_queue: int = 100):
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self.needs_resync = False
+
+    def offer(self, frame: str) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            # Drop the backlog; the next tick sends a full snapshot instead of deltas
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.needs_resync = True
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventBroadcaster:
+    """Pushes status/metrics changes to Server-Sent Events clients.
+
+    Producers call ``notify()`` (cheap: sets a flag) or ``notify_error()``.
+    A single thread wakes at most every ``interval`` seconds, takes one
+    snapshot and sends each client only the top-level keys that changed
+    since the previous tick, so a burst of sends costs one frame per tick.
+    Errors raised during the tick are sent together in one ``errors`` frame.
+    A snapshot is also taken every ``refresh_interval`` seconds (uptime,
+    rolling windows) and a comment heartbeat keeps idle connections open.
+    """
+
+    def __init__(self, snapshot: Callable[[], Dict[str, dict]], interval: float = 0.25,
+                 refresh_interval: float = 5.0, heartbeat_interval: float = 15.0,
+                 max_errors_per_tick: int = 20):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.refresh_interval = refresh_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.max_errors_per_tick = max_errors_per_tick
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dirty = False
+        self._errors: List[dict] = []
+        self._errors_dropped = 0
+        self._last: Dict[str, dict] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.frames_sent = 0
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="sse-broadcaster", daemon=True)
+        self._thread.start()
+
+    def notify(self, kind: str = "change", detail: Optional[str] = None) -> None:
+        if kind == "error":
+            self.notify_error(detail or "")
+            return
+        self._dirty = True
+        self._wake.set()
+
+    def notify_error(self, message: str) -> None:
+        with self._lock:
+            if len(self._errors) < self.max_errors_per_tick:
+                self._errors.append({"at": time.time(), "error": message})
+            else:
+                self._errors_dropped += 1
+        self._dirty = True
+        self._wake.set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber()
+        sub.needs_resync = True
+        with self._lock:
+            self._subscribers.add(sub)
+        self._dirty = True
+        self._wake.set()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def stream(self) -> Iterator[str]:
+        """Generator of SSE frames for one client (used as a streaming response body)."""
+        sub = self.subscribe()
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    yield sub.queue.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    def _run(self) -> None:
+        next_refresh = time.monotonic() + self.refresh_interval
+        while True:
+            self._wake.wait(timeout=max(0.0, next_refresh - time.monotonic()))
+            self._wake.clear()
+            if time.monotonic() >= next_refresh:
+                self._dirty = True
+                next_refresh = time.monotonic() + self.refresh_interval
+            if self._dirty and self._subscribers:
+                try:
+                    self._tick()
+                except Exception as e:
+                    logger.exception(f"SSE tick failed: {e}")
+            # Coalescing window: everything notified during it goes in the next tick
+            time.sleep(self.interval)
+
+    def _tick(self) -> None:
+        self._dirty = False
+        current = self.snapshot()
+        delta = {
+            section: {k: v for k, v in values.items() if self._last.get(section, {}).get(k) != v}
+            for section, values in current.items()
+        }
+        delta = {section: values for section, values in delta.items() if values}
+        self._last = current
+        with self._lock:
+            errors, self._errors = self._errors, []
+            dropped, self._errors_dropped = self._errors_dropped, 0
+            subscribers = list(self._subscribers)
+        delta_frame = format_sse("delta", delta) if delta else None
+        snapshot_frame = None
+        errors_frame = format_sse("errors", {"errors": errors, "dropped": dropped}) if errors else None
+        for sub in subscribers:
+            if sub.needs_resync:
+                sub.needs_resync = False
+                if snapshot_frame is None:
+                    snapshot_frame = format_sse("snapshot", current)
+                sub.offer(snapshot_frame)
+            elif delta_frame:
+                sub.offer(delta_frame)
+            if errors_frame:
+                sub.offer(errors_frame)
+            self.frames_sent += 1
@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from chatbot_automator import SendResult
+
+logger = logging.getLogger(__name__)
+
+_adapter_lock = threading.Lock()
+_shared_adapters: Dict[int, HTTPAdapter] = {}
+
+
+def _shared_adapter(pool_size: int) -> HTTPAdapter:
+    """Um único pool de conexões (urllib3, thread-safe) reaproveitado por todas as sessões."""
+    with _adapter_lock:
+        adapter = _shared_adapters.get(pool_size)
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _shared_adapters[pool_size] = adapter
+        return adapter
+
+
+class HttpChatbotClient:
+    """Fala direto com o endpoint do chat via HTTP, sem navegador.
+
+    Mesma interface de ``ChatbotAutomator`` (start/send_message/close). Os
+    cookies de autenticação vêm do arquivo salvo após um login feito no
+    navegador (ver ``ChatbotAutomator.save_cookies``).
+    """
+
+    def __init__(self, url: str, *, endpoint: str, cookies_file: Optional[str] = None,
+                 method: str = "POST", message_field: str = "message",
+                 conversation_field: Optional[str] = None,
+                 extra_payload: Optional[Dict[str, Any]] = None,
+                 response_field: Optional[str] = "response",
+                 headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 60.0, pool_size: int = 100):
+        self.url = url
+        self.endpoint = endpoint
+        self.cookies_file = Path(cookies_file) if cookies_file else None
+        self.method = method.upper()
+        self.message_field = message_field
+        self.conversation_field = conversation_field
+        self.extra_payload = extra_payload or {}
+        self.response_field = response_field
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.conversation_id = uuid.uuid4().hex
+        self.session: Optional[requests.Session] = None
+        # Compatibilidade com o gerenciador (sem perfil de navegador)
+        self.profile_dir: Optional[str] = None
+
+    def start(self) -> bool:
+        if not self.endpoint:
+            logger.error("http_backend.endpoint não configurado.")
+            return False
+        session = requests.Session()
+        adapter = _shared_adapter(self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        restored = self._load_cookies(session)
+        if self.cookies_file and not restored:
+            logger.warning("Nenhum cookie restaurado de %s; requisições irão sem sessão.", self.cookies_file)
+        self.session = session
+        return True
+
+    def _load_cookies(self, session: requests.Session) -> int:
+        if not (self.cookies_file and self.cookies_file.exists()):
+            return 0
+        try:
+            cookies = json.loads(self.cookies_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.warning("Arquivo de cookies inválido (%s): %s", self.cookies_file, e)
+            return 0
+        for cookie in cookies:
+            session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        return len(cookies)
+
+    def is_alive(self) -> bool:
+        return self.session is not None
+
+    def _build_payload(self, message: str) -> Dict[str, Any]:
+        payload = dict(self.extra_payload)
+        payload[self.message_field] = message
+        if self.conversation_field:
+            payload[self.conversation_field] = self.conversation_id
+        return payload
+
+    def _extract(self, resp: requests.Response) -> Optional[str]:
+        if not self.response_field:
+            return resp.text
+        try:
+            data: Any = resp.json()
+        except ValueError:
+            return resp.text
+        for key in self.response_field.split('.'):
+            if isinstance(data, dict):
+                data = data.get(key)
+            elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+                data = data[int(key)]
+            else:
+                return None
+        return data if isinstance(data, str) or data is None else json.dumps(data, ensure_ascii=False)
+
+    def send_message(self, message: str) -> SendResult:
+        result = SendResult(message=message, sent_at=time.time())
+        if not self.session:
+            logger.warning("Sessão HTTP não iniciada.")
+            result.ok, result.error = False, "Sessão HTTP não iniciada"
+            return result
+        payload = self._build_payload(message)
+        started = time.monotonic()
+        try:
+            # stream=True: a chamada retorna com os cabeçalhos (primeiro byte);
+            # o corpo completo é lido em seguida.
+            if self.method == "GET":
+                resp = self.session.get(self.endpoint, params=payload, timeout=self.timeout, stream=True)
+            else:
+                resp = self.session.request(self.method, self.endpoint, json=payload,
+                                            timeout=self.timeout, stream=True)
+            result.first_token_seconds = time.monotonic() - started
+            resp.content  # lê o corpo inteiro
+            result.complete_seconds = time.monotonic() - started
+            resp.raise_for_status()
+            result.response = self._extract(resp)
+            logger.debug("Mensagem enviada (HTTP): %s", message)
+        except Exception as e:
+            logger.warning("Erro enviando mensagem (HTTP): %s", e)
+            result.ok, result.error = False, str(e)
+        return result
+
+    def close(self):
+        # Não fecha o adapter: o pool de conexões é compartilhado entre sessões
+        self.session = None
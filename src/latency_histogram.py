@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+PERCENTILES = (50, 90, 95, 99)
+WINDOWS_SECONDS = {"1m": 60, "5m": 300, "15m": 900}
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (HDR style) with constant memory.
+
+    Values (seconds) are counted in buckets whose width grows geometrically by
+    ``precision`` (1% by default), so any percentile is reported within that
+    relative error no matter how many samples are recorded. Values outside
+    ``[lowest, highest]`` are clamped into the first/last bucket; the exact
+    min/max/sum are kept alongside.
+    """
+
+    def __init__(self, lowest: float = 0.001, highest: float = 3600.0, precision: float = 0.01):
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.bucket_count = self._index(highest) + 1
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base)
+
+    def _bucket_value(self, index: int) -> float:
+        """Upper edge of a bucket, so percentiles never under-report."""
+        return self.lowest * math.exp((index + 1) * self._log_base)
+
+    def record(self, value: float) -> None:
+        value = max(0.0, value)
+        index = min(self._index(value), self.bucket_count - 1)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if (other.lowest, other.highest, other.precision) != (self.lowest, self.highest, self.precision):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> List[int]:
+        """Samples <= each bound (bucket upper edges), for Prometheus-style ``le`` buckets."""
+        result = []
+        ordered = sorted(self.counts.items())
+        i, seen = 0, 0
+        for bound in bounds:
+            while i < len(ordered) and self._bucket_value(ordered[i][0]) <= bound * (1 + 1e-9):
+                seen += ordered[i][1]
+                i += 1
+            result.append(seen)
+        return result
+
+    def to_dict(self) -> dict:
+        """Compact, JSON-safe form (sparse buckets) for shipping between nodes."""
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "precision": self.precision,
+            "counts": {str(index): n for index, n in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        hist = cls(data["lowest"], data["highest"], data["precision"])
+        hist.counts = {int(index): n for index, n in data["counts"].items()}
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.min = data["min"]
+        hist.max = data["max"]
+        return hist
+
+    @property
+    def mean(self) -> Optional[float]:
+        return (self.total / self.count) if self.count else None
+
+    def summary(self) -> dict:
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+        }
+        for p in PERCENTILES:
+            result[f"p{p}"] = self.percentile(p)
+        return result
+
+
+class LatencyStats:
+    """Whole-run histogram plus sliding windows built from per-slot histograms.
+
+    The last 15 minutes are kept as a ring of ``slot_seconds`` histograms;
+    a window summary merges the slots it covers. Memory stays bounded by
+    ``bucket_count * (slots + 1)`` regardless of run length. Thread-safe.
+    """
+
+    def __init__(self, slot_seconds: int = 10, clock: Callable[[], float] = time.monotonic, **histogram_options):
+        self.slot_seconds = slot_seconds
+        self.clock = clock
+        self._options = histogram_options
+        self.overall = LatencyHistogram(**histogram_options)
+        self._slot_count = max(WINDOWS_SECONDS.values()) // slot_seconds
+        self._slots: List[Optional[LatencyHistogram]] = [None] * self._slot_count
+        self._slot_ids: List[int] = [-1] * self._slot_count
+        self._lock = threading.Lock()
+
+    def _current_slot(self) -> LatencyHistogram:
+        slot_id = int(self.clock() // self.slot_seconds)
+        pos = slot_id % self._slot_count
+        if self._slot_ids[pos] != slot_id:
+            self._slots[pos] = LatencyHistogram(**self._options)
+            self._slot_ids[pos] = slot_id
+        return self._slots[pos]
+
+    def record(self, value: float) -> None:
+        with self._lock:
+            self.overall.record(value)
+            self._current_slot().record(value)
+
+    def window(self, seconds: int) -> LatencyHistogram:
+        merged = LatencyHistogram(**self._options)
+        with self._lock:
+            now_id = int(self.clock() // self.slot_seconds)
+            oldest = now_id - max(1, seconds // self.slot_seconds) + 1
+            for slot_id, hist in zip(self._slot_ids, self._slots):
+                if hist is not None and oldest <= slot_id <= now_id:
+                    merged.merge(hist)
+        return merged
+
+    def export(self, windows: Iterable[str] = WINDOWS_SECONDS) -> dict:
+        """Serialized whole-run and window histograms (see ``LatencyHistogram.to_dict``)."""
+        with self._lock:
+            result = {"overall": self.overall.to_dict()}
+        result.update({name: self.window(WINDOWS_SECONDS[name]).to_dict() for name in windows})
+        return result
+
+    def summary(self, windows: Iterable[str] = WINDOWS_SECONDS) -> dict:
+        with self._lock:
+            result = self.overall.summary()
+        result["windows"] = {name: self.window(WINDOWS_SECONDS[name]).summary() for name in windows}
+        return result
+
+
+def merge_exports(exports: Iterable[Dict[str, Dict[str, dict]]]) -> Dict[str, Dict[str, LatencyHistogram]]:
+    """Merge several ``LatencyStats.export()`` payloads (one per node/process), series by series."""
+    merged: Dict[str, Dict[str, LatencyHistogram]] = {}
+    for export in exports:
+        for name, series in (export or {}).items():
+            for window, data in series.items():
+                hist = LatencyHistogram.from_dict(data)
+                target = merged.setdefault(name, {}).get(window)
+                if target is None:
+                    merged[name][window] = hist
+                else:
+                    target.merge(hist)
+    return merged
+
+
+def summarize_merged(merged: Dict[str, Dict[str, LatencyHistogram]]) -> Dict[str, dict]:
+    """``LatencyStats.summary()``-shaped dicts for the output of ``merge_exports``."""
+    result = {}
+    for name, series in merged.items():
+        summary = series["overall"].summary() if "overall" in series else {}
+        summary["windows"] = {w: h.summary() for w, h in series.items() if w != "overall"}
+        result[name] = summary
+    return result
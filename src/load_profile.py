@@ -0,0 +1,98 @@
+"""
+Declarative load profiles: a list of timed stages executed automatically.
+
+Each stage lasts ``duration`` seconds and sets a target ``rate`` (messages per
+second) and/or ``concurrency`` (sessions). With ``ramp: true`` the targets move
+linearly from the previous stage's values (0 rate / 1 session before the first
+stage) to the stage's values over its duration; otherwise they jump at the
+start of the stage. A target left out keeps the previous stage's value.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class Stage:
+    def __init__(self, duration: float, rate: Optional[float] = None,
+                 concurrency: Optional[int] = None, ramp: bool = False, name: Optional[str] = None):
+        if duration <= 0:
+            raise ValueError("Stage duration must be positive")
+        self.duration = float(duration)
+        self.rate = None if rate is None else float(rate)
+        self.concurrency = None if concurrency is None else max(1, int(concurrency))
+        self.ramp = ramp
+        self.name = name
+
+
+class LoadProfile:
+    """Maps elapsed run time to the active stage and its interpolated targets."""
+
+    def __init__(self, stages: Sequence[Stage], on_finish: str = "stop"):
+        if not stages:
+            raise ValueError("A load profile needs at least one stage")
+        if on_finish not in ("stop", "hold"):
+            raise ValueError(f"Unknown on_finish: {on_finish}")
+        self.stages = list(stages)
+        self.on_finish = on_finish
+        self.total_duration = sum(s.duration for s in self.stages)
+        # Resolved (start, end) targets for each stage, carrying values forward
+        self._bounds = []
+        rate, concurrency = 0.0, 1
+        for i, stage in enumerate(self.stages):
+            if stage.name is None:
+                stage.name = f"stage-{i + 1}"
+            end_rate = rate if stage.rate is None else stage.rate
+            end_conc = concurrency if stage.concurrency is None else stage.concurrency
+            start_rate, start_conc = (rate, concurrency) if stage.ramp else (end_rate, end_conc)
+            self._bounds.append((start_rate, end_rate, start_conc, end_conc))
+            rate, concurrency = end_rate, end_conc
+
+    @property
+    def uses_rate(self) -> bool:
+        return any(s.rate is not None for s in self.stages)
+
+    @property
+    def uses_concurrency(self) -> bool:
+        return any(s.concurrency is not None for s in self.stages)
+
+    @property
+    def max_concurrency(self) -> int:
+        return max(end for _, _, _, end in self._bounds)
+
+    def at(self, elapsed: float) -> Dict[str, Any]:
+        """Stage and targets ``elapsed`` seconds into the run."""
+        offset = 0.0
+        for index, stage in enumerate(self.stages):
+            if elapsed < offset + stage.duration:
+                break
+            offset += stage.duration
+        else:
+            start_rate, end_rate, start_conc, end_conc = self._bounds[-1]
+            return {
+                "stage": self.stages[-1].name, "stage_index": len(self.stages) - 1,
+                "stage_elapsed": self.stages[-1].duration, "stage_remaining": 0.0,
+                "target_rate": end_rate, "target_concurrency": end_conc, "finished": True,
+            }
+        start_rate, end_rate, start_conc, end_conc = self._bounds[index]
+        progress = (elapsed - offset) / stage.duration
+        return {
+            "stage": stage.name,
+            "stage_index": index,
+            "stage_elapsed": elapsed - offset,
+            "stage_remaining": offset + stage.duration - elapsed,
+            "target_rate": start_rate + (end_rate - start_rate) * progress,
+            "target_concurrency": int(round(start_conc + (end_conc - start_conc) * progress)),
+            "finished": False,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoadProfile":
+        stages: List[Stage] = []
+        for item in data.get('stages') or []:
+            stages.append(Stage(
+                duration=item['duration'],
+                rate=item.get('rate'),
+                concurrency=item.get('concurrency'),
+                ramp=bool(item.get('ramp', False)),
+                name=item.get('name'),
+            ))
+        return cls(stages, on_finish=data.get('on_finish', 'stop'))
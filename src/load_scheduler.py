@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARRIVAL_PROCESSES = ("constant", "poisson")
+
+
+class OpenLoadScheduler:
+    """Open-model load generator: requests arrive at a target rate, whatever the latency.
+
+    Arrivals follow an absolute schedule (constant spacing or exponential
+    inter-arrival times for a Poisson process), so a slow chatbot does not
+    lower the offered load. Each arrival waits for an idle session and is
+    sent on a thread pool; ``send`` receives the *intended* start time so
+    latency includes any queueing delay (no coordinated omission).
+
+    Arrivals dispatched more than ``late_threshold`` seconds after their slot
+    count as late; arrivals that find ``max_backlog`` requests already
+    waiting for a session are dropped and counted as missed. ``rate`` may be
+    changed while running (0 pauses arrivals).
+
+    Instead of a rate, ``schedule`` may give explicit arrivals as
+    ``(offset_seconds, payload)`` pairs (e.g. a replayed log), consumed lazily;
+    ``send`` then also receives the payload and ``run`` returns once every
+    arrival has been sent. With ``backpressure`` a full backlog pauses the
+    schedule instead of dropping arrivals (as-fast-as-possible replays).
+    """
+
+    def __init__(self,
+                 sessions: List[Any],
+                 send: Callable[[Any, float], None],
+                 rate: float,
+                 process: str = "constant",
+                 max_backlog: int = 100,
+                 late_threshold: float = 0.05,
+                 seed: Optional[int] = None,
+                 schedule: Optional[Iterable[Tuple[float, Any]]] = None,
+                 backpressure: bool = False):
+        if process not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process: {process}")
+        self.sessions = list(sessions)
+        self.send = send
+        self.rate = rate
+        self.process = process
+        self.max_backlog = max_backlog
+        self.late_threshold = late_threshold
+        self.schedule = schedule
+        self.backpressure = backpressure
+        self.schedule_exhausted = False
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.slots_scheduled = 0
+        self.slots_dispatched = 0
+        self.slots_late = 0
+        self.slots_missed = 0
+        self.completed = 0
+        self.backlog = 0
+        self.in_flight = 0
+        self.max_lateness = 0.0
+
+    def next_interval(self) -> float:
+        rate = max(self.rate, 1e-6)
+        if self.process == "poisson":
+            return self._random.expovariate(rate)
+        return 1.0 / rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "target_rate": self.rate,
+                "arrival_process": self.process,
+                "slots_scheduled": self.slots_scheduled,
+                "slots_dispatched": self.slots_dispatched,
+                "slots_late": self.slots_late,
+                "slots_missed": self.slots_missed,
+                "completed": self.completed,
+                "backlog": self.backlog,
+                "in_flight": self.in_flight,
+                "max_lateness_seconds": self.max_lateness,
+                "schedule_exhausted": self.schedule_exhausted,
+            }
+
+    def run(self, stop_event: threading.Event) -> None:
+        """Block the calling thread running the arrival loop until stop_event is set."""
+        asyncio.run(self._main(stop_event))
+
+    async def _main(self, stop_event: threading.Event) -> None:
+        loop = asyncio.get_running_loop()
+        idle: "asyncio.Queue[Any]" = asyncio.Queue()
+        for session in self.sessions:
+            idle.put_nowait(session)
+        tasks = set()
+        with ThreadPoolExecutor(max_workers=max(1, len(self.sessions)),
+                                thread_name_prefix="open-load") as executor:
+            next_at = last_at = start = time.monotonic()
+            rate_used = self.rate
+            arrivals = iter(self.schedule) if self.schedule is not None else None
+            payload = None
+            if arrivals is not None:
+                payload = self._next_arrival(arrivals)
+                if payload is not None:
+                    next_at = start + payload[0]
+            while not stop_event.is_set():
+                if arrivals is not None:
+                    if payload is None:
+                        break
+                elif self.rate != rate_used:
+                    # Rate changed live (API or load profile): re-space the pending slot.
+                    # Scaling the remaining wait never puts the slot in the past (no burst
+                    # of late slots) and, for Poisson arrivals, does not redraw on every change.
+                    now = time.monotonic()
+                    if rate_used > 0 and self.rate > 0:
+                        next_at = now + max(0.0, next_at - now) * rate_used / self.rate
+                    else:
+                        next_at = max(last_at, now) + self.next_interval()
+                    rate_used = self.rate
+                if rate_used <= 0:
+                    # Paused: no arrivals until the rate is raised again
+                    last_at = time.monotonic()
+                    await asyncio.sleep(0.1)
+                    continue
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(min(delay, 0.1))
+                    continue
+                with self._lock:
+                    full = self.backlog >= self.max_backlog
+                    wait = full and self.backpressure
+                    if not wait:
+                        self.slots_scheduled += 1
+                        if full:
+                            self.slots_missed += 1
+                        else:
+                            self.backlog += 1
+                if wait:
+                    await asyncio.sleep(0.005)
+                    continue
+                if not full:
+                    task = loop.create_task(self._issue(next_at, idle, executor, stop_event,
+                                                        payload[1] if arrivals is not None else None))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                last_at = next_at
+                if arrivals is not None:
+                    payload = self._next_arrival(arrivals)
+                    if payload is not None:
+                        next_at = start + payload[0]
+                else:
+                    next_at += self.next_interval()
+            if stop_event.is_set():
+                for task in list(tasks):
+                    task.cancel()
+            # Schedule exhausted: let the last arrivals finish
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _next_arrival(self, arrivals) -> Optional[Tuple[float, Any]]:
+        try:
+            return next(arrivals)
+        except StopIteration:
+            self.schedule_exhausted = True
+            return None
+
+    async def _issue(self, scheduled_at: float, idle: "asyncio.Queue[Any]",
+                     executor: ThreadPoolExecutor, stop_event: threading.Event, payload: Any = None) -> None:
+        try:
+            session = await idle.get()
+        finally:
+            with self._lock:
+                self.backlog -= 1
+        lateness = time.monotonic() - scheduled_at
+        with self._lock:
+            self.slots_dispatched += 1
+            self.in_flight += 1
+            if lateness > self.late_threshold:
+                self.slots_late += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+        try:
+            if not stop_event.is_set():
+                args = (session, scheduled_at) if self.schedule is None else (session, scheduled_at, payload)
+                await asyncio.get_running_loop().run_in_executor(executor, self.send, *args)
+        except Exception as e:
+            logger.error(f"Open-model send failed: {e}")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            idle.put_nowait(session)
@@ -0,0 +1,175 @@
+import csv
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Columns of logs/messages.csv (and of the binary run log, see run_log.py)
+MESSAGE_LOG_FIELDS = [
+    "timestamp_utc", "message", "response", "worker_id", "ok", "error",
+    "latency_seconds", "first_token_seconds", "complete_seconds", "send_seconds",
+    "scenario", "step",
+]
+
+
+class BackgroundWriter(ABC):
+    """Queue + single writer thread that batches records on size/time thresholds.
+
+    ``write()`` only enqueues the record (dropping it, and counting the drop,
+    if the queue is full). The writer thread flushes a batch when it reaches
+    ``batch_size`` records or when the oldest buffered record is
+    ``flush_interval`` seconds old; ``close()`` drains everything still
+    queued. Subclasses implement ``_open``, ``_write_batch`` and ``_close``.
+    """
+
+    thread_name = "log-writer"
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0, max_queue: int = 100000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def write(self, row: Any) -> bool:
+        """Queue a record without blocking; False if it had to be dropped."""
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.rows_dropped += 1
+            return False
+
+    def close(self, timeout: float = 10.0) -> None:
+        if not (self._thread and self._thread.is_alive()):
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    @abstractmethod
+    def _open(self) -> None:
+        """Prepare the output; called on the writer thread before the first batch."""
+
+    @abstractmethod
+    def _write_batch(self, batch: List[Any]) -> None:
+        """Persist one batch of records."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Release the output after the last batch."""
+
+    def _flush(self, batch: List[Any]) -> None:
+        try:
+            self._write_batch(batch)
+            self.rows_written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erro gravando log ({self.thread_name}): {e}")
+
+    def _run(self) -> None:
+        try:
+            self._open()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erro abrindo log ({self.thread_name}): {e}")
+            return
+        batch: List[Any] = []
+        deadline = None
+        stopping = False
+        try:
+            while not stopping:
+                timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    stopping = True
+                elif item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(batch)
+                    batch = []
+                    deadline = None
+            # Records queued after the stop marker (late senders) are still written
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    batch.append(item)
+            if batch:
+                self._flush(batch)
+        finally:
+            self._close()
+
+
+class BufferedCsvWriter(BackgroundWriter):
+    """Appends CSV rows from a background thread so senders never touch the disk.
+
+    If the existing file has a different header (older column layout) it is
+    renamed aside with its modification time and a fresh file is started.
+    """
+
+    thread_name = "csv-writer"
+
+    def __init__(self, path: Path, header: Sequence[str], **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.header = list(header)
+        self._file = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with self.path.open(newline='', encoding='utf-8') as f:
+                existing = next(csv.reader(f), [])
+            if existing != self.header:
+                stamp = datetime.utcfromtimestamp(self.path.stat().st_mtime).strftime('%Y%m%dT%H%M%S')
+                legacy = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+                self.path.replace(legacy)
+                logger.info("CSV com colunas antigas movido para %s", legacy)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = self.path.open('a', newline='', encoding='utf-8')
+        if new_file:
+            csv.writer(self._file).writerow(self.header)
+            self._file.flush()
+
+    def _write_batch(self, batch: List[Sequence]) -> None:
+        csv.writer(self._file).writerows(batch)
+        self._file.flush()
+
+    def _close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,306 @@
+"""
+Local stand-in for the Darcy chatbot, for offline tests and repeatable benchmarks.
+
+Reproduces the structure the selectors expect: ``/my/`` embeds an iframe
+``#tool_content`` whose page has a ``textarea`` (Enter or the submit button
+sends) and ``.message``/``.chat-message`` bubbles, bot replies also carrying
+``.bot-message``. Replies stream in chunks. ``POST /api/chat`` is a JSON
+endpoint for the HTTP backend (``?stream=1`` streams plain text instead).
+
+Behaviour is configurable: reply latency distribution (time to first chunk),
+streaming chunks, error rate and a global rate limit (HTTP 429). Run with::
+
+    python src/mock_darcy.py --port 8765 --latency lognormal --latency-mean 1.0
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from werkzeug.serving import make_server
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+_OUTER_PAGE = """<!doctype html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Darcy (mock)</title></head>
+<body>
+<h1>Aprender 2 (mock)</h1>
+<iframe id="tool_content" src="/chat" width="800" height="600"></iframe>
+</body></html>
+"""
+
+_CHAT_PAGE = """<!doctype html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Darcy</title>
+<style>
+  .chat-messages { height: 480px; overflow-y: auto; font-family: sans-serif; }
+  .message { margin: 4px; padding: 6px 10px; border-radius: 8px; }
+  .message.user { background: #d8ecff; text-align: right; }
+  .message.bot { background: #eee; }
+  .message.error { background: #fdd; }
+</style></head>
+<body>
+<div class="chat-messages messages conversation"></div>
+<form class="chat-form">
+  <textarea class="chat-input" placeholder="Digite sua pergunta"></textarea>
+  <button type="submit" class="send-button">Enviar</button>
+</form>
+<script>
+const box = document.querySelector('.chat-messages');
+const input = document.querySelector('textarea');
+const conversation = Math.random().toString(16).slice(2);
+function bubble(kind, text) {
+  const div = document.createElement('div');
+  div.className = 'message chat-message ' + kind;
+  div.textContent = text;
+  box.appendChild(div);
+  box.scrollTop = box.scrollHeight;
+  return div;
+}
+async function send() {
+  const text = input.value.trim();
+  if (!text) { return; }
+  input.value = '';
+  bubble('user', text);
+  let reply = null;
+  try {
+    const resp = await fetch('/api/chat?stream=1', {method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({message: text, conversation_id: conversation})});
+    if (!resp.ok) {
+      bubble('bot bot-message error', 'Erro ' + resp.status + ': ' + (await resp.text()));
+      return;
+    }
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    while (true) {
+      const {done, value} = await reader.read();
+      if (done) { break; }
+      const chunk = decoder.decode(value, {stream: true});
+      if (!chunk) { continue; }
+      // The bubble appears with the first chunk, like the real chat
+      if (reply === null) { reply = bubble('bot bot-message', ''); }
+      reply.textContent += chunk;
+    }
+  } catch (e) {
+    bubble('bot bot-message error', 'Falha de rede: ' + e);
+  }
+}
+document.querySelector('.chat-form').addEventListener('submit', function(e) { e.preventDefault(); send(); });
+input.addEventListener('keydown', function(e) {
+  if (e.key === 'Enter' && !e.shiftKey) { e.preventDefault(); send(); }
+});
+</script>
+</body></html>
+"""
+
+_FILLER = ("A Universidade de Brasília oferece diversos serviços aos estudantes. "
+           "Consulte o calendário acadêmico e a secretaria do seu curso para mais detalhes. "
+           "Se precisar, posso explicar cada etapa com calma.").split()
+
+
+class MockBehavior:
+    """Latency, streaming, error and rate-limit settings of the mock server."""
+
+    def __init__(self, latency: str = "lognormal", latency_mean: float = 1.0,
+                 latency_spread: float = 0.5, stream_chunks: int = 8, chunk_interval: float = 0.05,
+                 reply_words: int = 40, error_rate: float = 0.0, rate_limit: float = 0.0,
+                 burst: Optional[int] = None, seed: Optional[int] = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.stream_chunks = max(1, stream_chunks)
+        self.chunk_interval = chunk_interval
+        self.reply_words = reply_words
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else max(1, int(rate_limit))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_token_delay(self) -> float:
+        """Time to the first chunk; ``latency_mean`` is the median for lognormal."""
+        mean, spread = self.latency_mean, self.latency_spread
+        with self._lock:
+            if self.latency == "fixed":
+                return mean
+            if self.latency == "uniform":
+                return max(0.0, self._random.uniform(mean - spread, mean + spread))
+            if self.latency == "exponential":
+                return self._random.expovariate(1.0 / mean) if mean > 0 else 0.0
+            return mean * self._random.lognormvariate(0.0, spread)
+
+    def fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def reply_for(self, message: str) -> str:
+        words = [f"Sobre \"{message}\":"] + [_FILLER[i % len(_FILLER)] for i in range(self.reply_words)]
+        return " ".join(words)
+
+    def chunks(self, text: str) -> Iterator[str]:
+        size = max(1, -(-len(text) // self.stream_chunks))
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+
+class TokenBucket:
+    """Global rate limit: ``rate`` requests per second with bursts of ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> Tuple[bool, float]:
+        """(allowed, seconds until the next token)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True, 0.0
+            return False, (1.0 - self._tokens) / self.rate
+
+
+def create_app(behavior: Optional[MockBehavior] = None) -> Flask:
+    behavior = behavior or MockBehavior()
+    bucket = TokenBucket(behavior.rate_limit, behavior.burst) if behavior.rate_limit > 0 else None
+    app = Flask("mock_darcy")
+    stats = {"requests": 0, "replies": 0, "errors": 0, "rate_limited": 0, "in_flight": 0}
+    stats_lock = threading.Lock()
+    app.config["MOCK_BEHAVIOR"] = behavior
+    app.config["MOCK_STATS"] = stats
+
+    def count(key: str, delta: int = 1) -> None:
+        with stats_lock:
+            stats[key] += delta
+
+    @app.get('/')
+    @app.get('/my/')
+    def outer():
+        return _OUTER_PAGE
+
+    @app.get('/chat')
+    def chat_page():
+        return _CHAT_PAGE
+
+    @app.get('/mock/stats')
+    def mock_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    @app.post('/api/chat')
+    def chat():
+        count("requests")
+        data = request.get_json(silent=True) or {}
+        message = str(data.get("message") or "").strip()
+        if not message:
+            return jsonify({"error": "message required"}), 400
+        if bucket:
+            allowed, retry_after = bucket.take()
+            if not allowed:
+                count("rate_limited")
+                return (jsonify({"error": "rate limited"}), 429,
+                        {"Retry-After": str(max(1, round(retry_after)))})
+        if behavior.fails():
+            count("errors")
+            return jsonify({"error": "simulated failure"}), 500
+        reply = behavior.reply_for(message)
+        delay = behavior.first_token_delay()
+
+        if request.args.get("stream"):
+            def generate():
+                count("in_flight")
+                try:
+                    time.sleep(delay)
+                    for i, chunk in enumerate(behavior.chunks(reply)):
+                        if i:
+                            time.sleep(behavior.chunk_interval)
+                        yield chunk
+                    count("replies")
+                finally:
+                    count("in_flight", -1)
+            return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        count("in_flight")
+        try:
+            time.sleep(delay + behavior.chunk_interval * (behavior.stream_chunks - 1))
+        finally:
+            count("in_flight", -1)
+        count("replies")
+        return Response(json.dumps({"response": reply, "conversation_id": data.get("conversation_id")},
+                                   ensure_ascii=False), mimetype='application/json')
+
+    return app
+
+
+class MockServer:
+    """Mock server on a background thread (port 0 picks a free port)."""
+
+    def __init__(self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(behavior)
+        self._server = make_server(host, port, self.app, threaded=True)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self._server.host}:{self._server.server_port}"
+
+    @property
+    def stats(self) -> dict:
+        return dict(self.app.config["MOCK_STATS"])
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-darcy", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local Darcy stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=1.0,
+                        help="seconds to the first chunk (median for lognormal)")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="sigma for lognormal, +/- range for uniform")
+    parser.add_argument("--stream-chunks", type=int, default=8)
+    parser.add_argument("--chunk-interval", type=float, default=0.05)
+    parser.add_argument("--reply-words", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/s (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    behavior = MockBehavior(
+        latency=args.latency, latency_mean=args.latency_mean, latency_spread=args.latency_spread,
+        stream_chunks=args.stream_chunks, chunk_interval=args.chunk_interval,
+        reply_words=args.reply_words, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, burst=args.burst, seed=args.seed
+    )
+    print(f"Mock Darcy em http://{args.host}:{args.port}/my/ (JSON: POST /api/chat)")
+    create_app(behavior).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+"""
+Process-sharded execution: the sessions are split across worker processes.
+
+Sessions run as threads of one process share its GIL with the control API,
+CSV writing, response parsing and all WebDriver client work.
+``ShardedBotManager`` keeps the BotManager interface but starts ``processes``
+child processes (``python process_shards.py``), each running its own
+BotManager with a slice of the sessions, of the arrival rate, of the load
+profile targets and of the replayed rows. Every child writes its own message
+log (``messages.shard-N.csv``, ``<run_log.dir>/shard-N/``).
+
+Parent and children talk over the child's stdin/stdout with length-prefixed
+pickle frames: the parent sends ``start``/``set``/``reload_questions``/``stop``
+commands; each child sends a ``report`` (status, metrics and raw latency
+histograms) every ``report_seconds``. The parent only keeps the latest report
+per child and merges them when asked, so ``/api/status`` never waits on a
+worker.
+"""
+
+import logging
+import os
+import pickle
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from bot_manager import BotManager
+from coordinator import split_integer
+from latency_histogram import LatencyStats, merge_exports, summarize_merged
+from rate_controller import AimdRateController
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct(">I")
+
+SUMMED_OPEN_MODEL = ("target_rate", "slots_scheduled", "slots_dispatched", "slots_late", "slots_missed",
+                     "completed", "backlog", "in_flight")
+SUMMED_LOG_WRITER = ("queued", "rows_written", "rows_dropped", "batches", "errors")
+
+
+def write_frame(stream: BinaryIO, obj: Any) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_FRAME_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            raise EOFError("stream closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(stream: BinaryIO) -> Any:
+    size, = _FRAME_HEADER.unpack(_read_exact(stream, _FRAME_HEADER.size))
+    return pickle.loads(_read_exact(stream, size))
+
+
+def _combine(dicts: List[dict], summed=(), maxed=()) -> Optional[dict]:
+    """First dict with ``summed`` keys added up and ``maxed`` keys maximized across all."""
+    dicts = [d for d in dicts if d]
+    if not dicts:
+        return None
+    result = dict(dicts[0])
+    for key in summed:
+        result[key] = sum(d.get(key) or 0 for d in dicts)
+    for key in maxed:
+        values = [d[key] for d in dicts if d.get(key) is not None]
+        result[key] = max(values) if values else None
+    return result
+
+
+class _Shard:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, index: int, sessions: int, weight: float, process: subprocess.Popen):
+        self.index = index
+        self.sessions = sessions
+        self.weight = weight  # share of the arrival rate
+        self.process = process
+        self.report: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.settings: Dict[str, Any] = {}
+        self.reader: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, command: str, argument: Any = None) -> bool:
+        with self._write_lock:
+            try:
+                write_frame(self.process.stdin, (command, argument))
+                return True
+            except (OSError, ValueError):  # process gone / pipe closed
+                return False
+
+    def snapshot(self) -> dict:
+        status = (self.report or {}).get("status") or {}
+        return {
+            "shard": self.index,
+            "pid": self.process.pid,
+            "alive": self.alive,
+            "exit_code": self.process.returncode,
+            "sessions": self.sessions,
+            "messages_sent": status.get("messages_sent", 0),
+            "errors_count": status.get("errors_count", 0),
+            "error": self.error,
+            "reported_at": (self.report or {}).get("reported_at"),
+        }
+
+
+class ShardedBotManager(BotManager):
+    """BotManager whose sessions run in ``processes`` child processes.
+
+    Configuration is the BotManager's; attributes changed while stopped
+    (concurrency, mode, ...) apply to the next start, and ``interval_seconds``,
+    ``jitter`` and ``arrival_rate`` are forwarded to running shards.
+    """
+
+    def __init__(self, processes: int = 2, report_seconds: float = 1.0, stop_timeout: float = 30.0,
+                 **options):
+        super().__init__(**options)
+        self.processes = max(1, int(processes))
+        self.report_seconds = report_seconds
+        self.stop_timeout = stop_timeout
+        self._options = options
+        self._shards: List[_Shard] = []
+        self._supervisor: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        with self._lock:
+            if self.is_running:
+                return False
+            if self.mode == "replay" and self._replay_file() is None:
+                return False
+            self._stop_event.clear()
+            self._driver_restarts += self._shard_restarts()
+            if self._shards_own_pacing():
+                self._pacing_saved = (self.interval_seconds, self._arrival_rate)
+            self._shards = []
+            self._started_at = datetime.utcnow()
+            self._supervisor = threading.Thread(target=self._run_shards, name="bot-shards", daemon=True)
+            self._supervisor.start()
+            logger.info("BotManager started %d session(s) over %d process(es) in %s mode",
+                        self.concurrency, min(self.processes, self.concurrency), self.mode)
+        self._notify("started")
+        return True
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop_event.set()
+        if self._supervisor and self._supervisor is not threading.current_thread():
+            self._supervisor.join()
+        if self._pacing_saved:
+            self.interval_seconds, self.arrival_rate = self._pacing_saved
+            self._pacing_saved = None
+        logger.info("BotManager stopped")
+        self._notify("stopped")
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._supervisor and self._supervisor.is_alive()) and not self._stop_event.is_set()
+
+    def _shards_own_pacing(self) -> bool:
+        """Whether the shards' rate controller or load profile sets interval_seconds/arrival_rate."""
+        if self.load_profile.get('enabled'):
+            if any(stage.get('rate') is not None for stage in self.load_profile.get('stages') or []):
+                return True
+        return bool(self.rate_controller.get('enabled')) and self.mode in ("closed", "open")
+
+    def _live_settings(self, shard: _Shard) -> Dict[str, Any]:
+        """Settings that may change while running; forwarded to the shard when they do."""
+        return {"interval_seconds": self.interval_seconds, "jitter": self.jitter,
+                "arrival_rate": self.arrival_rate * shard.weight}
+
+    def _shard_options(self, index: int, count: int, sessions: int, weight: float) -> dict:
+        """BotManager options of one shard: its slice of the load and its own log files."""
+        csv_name = Path(self.messages_csv.name)
+        options = dict(self._options)
+        options.update(
+            interval_seconds=self.interval_seconds,
+            jitter=self.jitter,
+            concurrency=sessions,
+            mode=self.mode,
+            arrival_rate=self.arrival_rate * weight,
+            arrival_process=self.arrival_process,
+            scenarios_file=str(self.scenarios_file) if self.scenarios_file else None,
+            messages_csv=f"{csv_name.stem}.shard-{index}{csv_name.suffix}",
+            run_log=dict(self.run_log, dir=f"{self.run_log.get('dir', 'runs')}/shard-{index}"),
+            load_profile=self._shard_profile(index, count),
+            rate_controller=self._shard_controller(weight),
+            replay=dict(self.replay, shard=(index, count)),
+            # Chrome locks a profile directory: separate slots per shard, one cookie jar
+            browser_pool=dict(self.browser_pool,
+                              profiles_dir=f"{self.browser_pool.get('profiles_dir', 'profiles')}/shard-{index}",
+                              cookies_file=str(self.cookies_file)),
+            http_backend=dict(self.http_backend, cookies_file=str(self.cookies_file)),
+        )
+        return options
+
+    def _shard_profile(self, index: int, count: int) -> dict:
+        """Load profile with every stage's concurrency and rate split for one shard.
+
+        A stage's sessions are split like the shards' sessions, with at least
+        one per shard (a stage cannot empty a process); its rate follows each
+        shard's share of those sessions, so the two always agree.
+        """
+        if not self.load_profile.get('enabled'):
+            return self.load_profile
+        shares = split_integer(self.concurrency, [1] * count)
+        stages = []
+        for stage in self.load_profile.get('stages') or []:
+            stage = dict(stage)
+            if stage.get('concurrency') is not None:
+                shares = [max(1, n) for n in split_integer(int(stage['concurrency']), shares)]
+                stage['concurrency'] = shares[index]
+            if stage.get('rate') is not None:
+                stage['rate'] = float(stage['rate']) * shares[index] / sum(shares)
+            stages.append(stage)
+        return dict(self.load_profile, stages=stages)
+
+    def _shard_controller(self, weight: float) -> dict:
+        """Rate controller with its rate limits and step scaled to one shard; SLOs stay global."""
+        if not self.rate_controller.get('enabled'):
+            return self.rate_controller
+        defaults = AimdRateController.from_dict(self.rate_controller)
+        scaled = dict(self.rate_controller)
+        for key in ("min_rate", "max_rate", "increase_step", "initial_rate"):
+            value = getattr(defaults, key)
+            if value is not None:
+                scaled[key] = value * weight
+        return scaled
+
+    def _spawn(self, index: int, count: int, sessions: int, weight: float) -> Optional[_Shard]:
+        try:
+            process = subprocess.Popen([sys.executable, str(Path(__file__).resolve())],
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as e:
+            self._last_error = f"Could not start shard {index}: {e}"
+            logger.error(self._last_error)
+            return None
+        shard = _Shard(index, sessions, weight, process)
+        shard.settings = self._live_settings(shard)
+        shard.send("start", {"index": index, "report_seconds": self.report_seconds,
+                             "options": self._shard_options(index, count, sessions, weight)})
+        shard.reader = threading.Thread(target=self._read_reports, args=(shard,),
+                                        name=f"bot-shard-{index}-reader", daemon=True)
+        shard.reader.start()
+        logger.info("Shard %d started (pid %d, %d session(s))", index, process.pid, sessions)
+        return shard
+
+    def _run_shards(self) -> None:
+        self._ensure_http_session()
+        sessions = split_integer(self.concurrency, [1] * min(self.processes, self.concurrency))
+        for index, count in enumerate(sessions):
+            if self._stop_event.is_set():
+                break
+            shard = self._spawn(index, len(sessions), count, count / self.concurrency)
+            if shard:
+                self._shards.append(shard)
+        while not self._stop_event.is_set() and any(s.alive for s in self._shards):
+            self._forward_settings()
+            self._stop_event.wait(0.2)
+        for shard in self._shards:
+            shard.send("stop")
+        deadline = time.monotonic() + self.stop_timeout
+        for shard in self._shards:
+            try:
+                shard.process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Shard %d did not stop in time; killing it", shard.index)
+                shard.process.kill()
+                shard.process.wait()
+            shard.reader.join(timeout=5)
+        if not self._stop_event.is_set():
+            # Every shard finished on its own (replay or load profile done)
+            logger.info("All shards finished; stopping")
+            threading.Thread(target=self.stop, name="bot-shards-stop", daemon=True).start()
+
+    def _forward_settings(self) -> None:
+        for shard in self._shards:
+            wanted = self._live_settings(shard)
+            changed = {k: v for k, v in wanted.items() if shard.settings.get(k) != v}
+            if changed and shard.send("set", changed):
+                shard.settings.update(changed)
+
+    def _read_reports(self, shard: _Shard) -> None:
+        while True:
+            try:
+                kind, payload = read_frame(shard.process.stdout)
+            except (EOFError, OSError, pickle.UnpicklingError):
+                break
+            if kind == "report":
+                self._on_report(shard, payload)
+            elif kind == "failed":
+                shard.error = payload
+                self._last_error = f"[shard {shard.index}] {payload}"
+                logger.error(self._last_error)
+                self._notify("error", self._last_error)
+
+    def _on_report(self, shard: _Shard, report: dict) -> None:
+        before = ((shard.report or {}).get("status") or {})
+        shard.report = report
+        status = report["status"]
+        if status["errors_count"] > before.get("errors_count", 0) and status.get("last_error"):
+            self._last_error = f"[shard {shard.index}] {status['last_error']}"
+            self._notify("error", self._last_error)
+        if status["messages_sent"] > before.get("messages_sent", 0):
+            self._notify("sent")
+
+    def reload_questions(self) -> dict:
+        for shard in self._shards:
+            shard.send("reload_questions")
+        return super().reload_questions()
+
+    def _reports(self) -> List[dict]:
+        return [s.report for s in self._shards if s.report]
+
+    def _merged_histograms(self):
+        return merge_exports(r["histograms"] for r in self._reports())
+
+    @property
+    def errors_by_type(self) -> Dict[str, int]:
+        merged: Dict[str, int] = {}
+        for report in self._reports():
+            for kind, n in (report["metrics"].get("errors_by_type") or {}).items():
+                merged[kind] = merged.get(kind, 0) + n
+        return merged
+
+    @property
+    def driver_restarts(self) -> int:
+        # Shards are new processes on every start; earlier runs are kept in _driver_restarts
+        return self._driver_restarts + self._shard_restarts()
+
+    def _shard_restarts(self) -> int:
+        return sum(r["metrics"].get("driver_restarts") or 0 for r in self._reports())
+
+    @property
+    def active_workers(self) -> int:
+        return sum(r["status"].get("active_workers") or 0 for r in self._reports() if self.is_running)
+
+    @property
+    def latency_stats(self) -> Dict[str, LatencyStats]:
+        """Whole-run histograms merged across shards (sliding windows stay in ``metrics()``)."""
+        merged = self._merged_histograms()
+        result = {}
+        for name in self._latency:
+            stats = LatencyStats()
+            if "overall" in merged.get(name, {}):
+                stats.overall = merged[name]["overall"]
+            result[name] = stats
+        return result
+
+    def export_histograms(self) -> Dict[str, dict]:
+        return {name: {window: hist.to_dict() for window, hist in series.items()}
+                for name, series in self._merged_histograms().items()}
+
+    def _latest(self, key: str) -> dict:
+        """The shard report section whose last send is the most recent."""
+        sections = [r[key] for r in self._reports()]
+        return max(sections, key=lambda s: s.get("last_sent_at") or "", default={})
+
+    def status(self) -> dict:
+        statuses = [r["status"] for r in self._reports()]
+        latest = self._latest("status")
+        workers = []
+        for shard in self._shards:
+            for worker in ((shard.report or {}).get("status") or {}).get("workers") or []:
+                workers.append(dict(worker, worker_id=len(workers), shard=shard.index,
+                                    shard_worker_id=worker["worker_id"]))
+        profile = _combine([s.get("load_profile") for s in statuses],
+                           summed=("target_rate", "target_concurrency"))
+        uptime = (datetime.utcnow() - self._started_at).total_seconds() if self._started_at else None
+        return {
+            "running": self.is_running,
+            "messages_sent": sum(s["messages_sent"] for s in statuses),
+            "last_message": latest.get("last_message"),
+            "last_error": self._last_error,
+            "last_response": latest.get("last_response"),
+            "uptime_seconds": uptime,
+            "interval_seconds": self.interval_seconds,
+            "jitter": self.jitter,
+            "errors_count": sum(s["errors_count"] for s in statuses),
+            "last_sent_at": latest.get("last_sent_at"),
+            "concurrency": self.concurrency,
+            "active_workers": self.active_workers,
+            "workers": workers,
+            "browser_pool": _combine([s.get("browser_pool") for s in statuses],
+                                     summed=("size", "idle", "warming", "warmed_total", "warm_failures")),
+            "backend": self.backend,
+            "mode": self.mode,
+            "questions": latest.get("questions") or self.questions.stats(),
+            "load_profile": profile,
+            "replay": _combine([s.get("replay") for s in statuses], summed=("rows_read",)),
+            "rate_controller": _combine([s.get("rate_controller") for s in statuses],
+                                        summed=("rate", "min_rate", "max_rate", "adjustments")),
+            "processes": self.processes,
+            "shards": [s.snapshot() for s in self._shards],
+        }
+
+    def metrics(self) -> dict:
+        metrics = [r["metrics"] for r in self._reports()]
+        latest = self._latest("metrics")
+        merged = self._merged_histograms()
+        sent = sum(m["messages_sent"] for m in metrics)
+        uptime_sec = (datetime.utcnow() - self._started_at).total_seconds() if self._started_at else 0
+        round_trip_sends = [(m["avg_round_trips_per_send"], m["messages_sent"]) for m in metrics
+                            if m.get("avg_round_trips_per_send") is not None and m["messages_sent"]]
+        weighted_sends = sum(n for _, n in round_trip_sends)
+        avg_round_trips = (sum(avg * n for avg, n in round_trip_sends) / weighted_sends) if weighted_sends else None
+
+        def mean(name: str) -> Optional[float]:
+            overall = merged.get(name, {}).get("overall")
+            return overall.mean if overall else None
+
+        return {
+            "uptime_seconds": uptime_sec,
+            "messages_sent": sent,
+            "errors_count": sum(m["errors_count"] for m in metrics),
+            "errors_by_type": self.errors_by_type,
+            "driver_restarts": self.driver_restarts,
+            "avg_interval_seconds": (uptime_sec / sent) if sent else None,
+            "messages_per_min": (sent / (uptime_sec / 60)) if uptime_sec > 0 and sent else 0,
+            "last_sent_at": latest.get("last_sent_at"),
+            "running": self.is_running,
+            "concurrency": self.concurrency,
+            "active_workers": self.active_workers,
+            "mode": self.mode,
+            "avg_latency_seconds": mean("response"),
+            "last_latency_seconds": latest.get("last_latency_seconds"),
+            "avg_first_token_seconds": mean("first_token"),
+            "avg_complete_seconds": mean("complete"),
+            "avg_round_trips_per_send": avg_round_trips,
+            "latency": summarize_merged(merged),
+            "log_writer": _combine([m.get("log_writer") for m in metrics], summed=SUMMED_LOG_WRITER),
+            "run_log": _combine([m.get("run_log") for m in metrics], summed=SUMMED_LOG_WRITER),
+            "driver_resolution": next((m["driver_resolution"] for m in metrics if m.get("driver_resolution")), None),
+            "open_model": _combine([m.get("open_model") for m in metrics], summed=SUMMED_OPEN_MODEL,
+                                   maxed=("max_lateness_seconds",)),
+            "scenarios": self._merge_scenarios([m.get("scenarios") for m in metrics]),
+            "processes": self.processes,
+        }
+
+    @staticmethod
+    def _merge_scenarios(per_shard: List[Optional[dict]]) -> Optional[dict]:
+        """Scenario counters added up across shards (step latency stays per shard, not merged)."""
+        merged: Dict[str, dict] = {}
+        for scenarios in per_shard:
+            for name, summary in (scenarios or {}).items():
+                target = merged.get(name)
+                if target is None:
+                    merged[name] = dict(summary, steps=[dict(step, latency=None) for step in summary["steps"]])
+                    continue
+                for key in ("started", "completed", "aborted"):
+                    target[key] += summary[key]
+                for step, other in zip(target["steps"], summary["steps"]):
+                    step["sent"] += other["sent"]
+                    step["errors"] += other["errors"]
+        return merged or None
+
+
+def _report(manager: BotManager) -> dict:
+    return {"status": manager.status(), "metrics": manager.metrics(),
+            "histograms": manager.export_histograms(), "reported_at": time.time()}
+
+
+def _read_commands(stream: BinaryIO, commands: "queue.Queue[Tuple[str, Any]]") -> None:
+    while True:
+        try:
+            commands.put(read_frame(stream))
+        except (EOFError, OSError, pickle.UnpicklingError):
+            # Parent gone: stop this shard
+            commands.put(("stop", None))
+            return
+
+
+def run_shard(index: int, options: dict, commands_in: BinaryIO, reports_out: BinaryIO,
+              report_seconds: float = 1.0) -> None:
+    """Run one BotManager, reporting to ``reports_out`` until a ``stop`` command or the run ends."""
+    manager = BotManager(**options)
+    if not manager.start():
+        write_frame(reports_out, ("failed", manager.status()["last_error"] or "start failed"))
+        return
+    commands: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+    threading.Thread(target=_read_commands, args=(commands_in, commands), name="shard-commands",
+                     daemon=True).start()
+    last_report = 0.0
+    try:
+        while manager.is_running:
+            timeout = max(0.0, report_seconds - (time.monotonic() - last_report))
+            try:
+                command, argument = commands.get(timeout=timeout)
+            except queue.Empty:
+                command, argument = None, None
+            if command == "stop":
+                break
+            if command == "set":
+                for name, value in argument.items():
+                    setattr(manager, name, value)
+            elif command == "reload_questions":
+                manager.reload_questions()
+            if time.monotonic() - last_report >= report_seconds:
+                write_frame(reports_out, ("report", _report(manager)))
+                last_report = time.monotonic()
+    except OSError:
+        logger.warning("Lost the parent process; stopping")
+    finally:
+        manager.stop()
+        try:
+            write_frame(reports_out, ("report", _report(manager)))
+        except OSError:
+            pass
+
+
+def main() -> None:
+    """Worker process entry point, started by ShardedBotManager."""
+    # Unbuffered: the command reader may still be blocked in read() at interpreter exit
+    commands_in = os.fdopen(os.dup(sys.stdin.fileno()), "rb", buffering=0)
+    # Frames go to a private copy of stdout; stray prints end up on stderr instead
+    reports_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    command, start = read_frame(commands_in)
+    if command != "start":
+        raise SystemExit(f"expected a start command, got {command!r}")
+    index = start["index"]
+    logging.basicConfig(level=logging.INFO,
+                        format=f"[%(asctime)s] %(levelname)s shard-{index} %(name)s: %(message)s")
+    run_shard(index, start["options"], commands_in, reports_out, start.get("report_seconds", 1.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Prometheus text exposition (format 0.0.4) for BotManager, without extra dependencies.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from latency_histogram import LatencyHistogram
+
+PREFIX = "darcy_bot"
+# Coarse ``le`` boundaries (seconds) folded from the fine log-spaced buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str,
+               samples: Iterable[Tuple[Optional[Dict[str, str]], float]]) -> None:
+        full = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {full} {help_text}")
+        self.lines.append(f"# TYPE {full} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{full}{_labels(labels)} {_fmt(value)}")
+
+    def histogram(self, name: str, help_text: str,
+                  series: Iterable[Tuple[Dict[str, str], LatencyHistogram]]) -> None:
+        full = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {full} {help_text}")
+        self.lines.append(f"# TYPE {full} histogram")
+        for labels, hist in series:
+            for bound, count in zip(LATENCY_BUCKETS, hist.cumulative_counts(LATENCY_BUCKETS)):
+                self.lines.append(f"{full}_bucket{_labels({**labels, 'le': _fmt(bound)})} {count}")
+            self.lines.append(f"{full}_bucket{_labels({**labels, 'le': '+Inf'})} {hist.count}")
+            self.lines.append(f"{full}_sum{_labels(labels)} {_fmt(hist.total)}")
+            self.lines.append(f"{full}_count{_labels(labels)} {hist.count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(manager) -> str:
+    """Render a BotManager's counters, gauges and latency histograms."""
+    out = _Exposition()
+    metrics = manager.metrics()
+    out.family("messages_sent_total", "counter", "Messages sent (successful sends).",
+               [(None, metrics["messages_sent"])])
+    out.family("errors_total", "counter", "Errors by type (exception class or failure kind).",
+               [({"type": kind}, n) for kind, n in sorted(manager.errors_by_type.items())])
+    out.family("driver_restarts_total", "counter", "Session/driver re-initialisations.",
+               [(None, manager.driver_restarts)])
+    out.family("running", "gauge", "1 while the bot is running.", [(None, int(metrics["running"]))])
+    out.family("active_workers", "gauge", "Worker sessions currently alive.", [(None, metrics["active_workers"])])
+    out.family("concurrency", "gauge", "Configured number of sessions.", [(None, metrics["concurrency"])])
+    out.family("uptime_seconds", "gauge", "Seconds since the current run started.", [(None, metrics["uptime_seconds"])])
+    open_model = metrics.get("open_model")
+    if open_model:
+        out.family("target_arrival_rate", "gauge", "Open-model target arrivals per second.",
+                   [(None, open_model["target_rate"])])
+        out.family("arrival_slots_total", "counter", "Open-model arrival slots by outcome.", [
+            ({"outcome": "scheduled"}, open_model["slots_scheduled"]),
+            ({"outcome": "late"}, open_model["slots_late"]),
+            ({"outcome": "missed"}, open_model["slots_missed"]),
+        ])
+        out.family("in_flight", "gauge", "Open-model requests in flight.", [(None, open_model["in_flight"])])
+    out.histogram("latency_seconds", "Latency by phase (response, first_token, complete, send_overhead).",
+                  [({"phase": name}, stats.overall) for name, stats in manager.latency_stats.items()])
+    return out.render()
@@ -0,0 +1,86 @@
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTIONS: Tuple[str, ...] = ("Olá, tudo bem?",)
+
+
+class QuestionCorpus:
+    """Questions file loaded once and reloaded only when it changes on disk.
+
+    The current questions are an immutable tuple swapped in with a single
+    assignment, so readers never see a half-loaded list and need no lock.
+    ``current()`` stats the file at most every ``check_interval`` seconds and
+    re-reads it only if its mtime, size or inode changed (editors that save
+    via rename produce a new inode). A file that fails to load or is empty
+    keeps the previous questions.
+    """
+
+    def __init__(self, path: Union[str, Path], check_interval: float = 2.0,
+                 fallback: Sequence[str] = DEFAULT_QUESTIONS):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.fallback = tuple(fallback)
+        self._questions: Tuple[str, ...] = ()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.loads = 0
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def reload(self, force: bool = True) -> bool:
+        """Re-read the file (if changed, unless ``force``); True if the corpus was replaced."""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.check_interval
+            signature = self._stat_signature()
+            if not force and signature == self._signature:
+                return False
+            try:
+                text = self.path.read_text(encoding='utf-8')
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Failed to load questions: {e}")
+                return False
+            questions = tuple(line.strip() for line in text.splitlines() if line.strip())
+            self._signature = signature
+            if not questions:
+                self.last_error = "Questions file is empty"
+                logger.warning(f"{self.path} is empty; keeping {len(self._questions)} previous questions")
+                return False
+            self._questions = questions
+            self.loads += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            logger.info(f"Loaded {len(questions)} questions from {self.path}")
+            return True
+
+    def current(self) -> Tuple[str, ...]:
+        if time.monotonic() >= self._next_check and not self._reload_lock.locked():
+            self.reload(force=False)
+        return self._questions or self.fallback
+
+    def choice(self, rng=random) -> str:
+        return rng.choice(self.current())
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "count": len(self._questions),
+            "loads": self.loads,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,108 @@
+"""
+Closed-loop send rate: find and hold the highest load Darcy sustains within SLOs.
+
+Every ``period_seconds`` the manager reports what happened during the period
+(messages sent, errors, p95 response latency). While p95 and the error rate
+stay within ``slo_p95_seconds``/``slo_error_rate`` the rate grows by
+``increase_step`` messages/s; when either is breached it is multiplied by
+``decrease_factor`` (AIMD, as in TCP congestion control). The rate stays in
+``[min_rate, max_rate]`` and is not raised when the sessions already fail to
+reach the current target (saturated). A decision waits until ``min_samples``
+replies were measured (periods are merged) unless errors already breach the SLO.
+"""
+
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class AimdRateController:
+    """Additive-increase / multiplicative-decrease of the target send rate."""
+
+    def __init__(self, slo_p95_seconds: float = 10.0, slo_error_rate: float = 0.05,
+                 min_rate: float = 0.05, max_rate: float = 5.0, increase_step: float = 0.1,
+                 decrease_factor: float = 0.7, period_seconds: float = 30.0, min_samples: int = 3,
+                 saturation_ratio: float = 0.8, initial_rate: Optional[float] = None, history: int = 20):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("Need 0 < min_rate <= max_rate")
+        if period_seconds <= 0:
+            raise ValueError("period_seconds must be positive")
+        self.slo_p95_seconds = float(slo_p95_seconds)
+        self.slo_error_rate = float(slo_error_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase_step = float(increase_step)
+        self.decrease_factor = float(decrease_factor)
+        self.period_seconds = float(period_seconds)
+        self.min_samples = int(min_samples)
+        self.saturation_ratio = float(saturation_ratio)
+        self.initial_rate = None if initial_rate is None else float(initial_rate)
+        self.rate: Optional[float] = None
+        self.adjustments = 0
+        self.last: Optional[Dict[str, Any]] = None
+        self.history: deque = deque(maxlen=history)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AimdRateController":
+        options = {k: v for k, v in data.items() if k != 'enabled' and v is not None}
+        return cls(**options)
+
+    def clamp(self, rate: float) -> float:
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def reset(self, current_rate: float) -> float:
+        """Start a run at ``initial_rate`` (or the current rate), clamped to the limits."""
+        self.rate = self.clamp(self.initial_rate if self.initial_rate is not None else current_rate)
+        self.adjustments = 0
+        self.last = None
+        self.history.clear()
+        return self.rate
+
+    def update(self, sent: int, errors: int, p95: Optional[float], elapsed: float) -> Optional[Dict[str, Any]]:
+        """Decide the next rate from the observations since the last decision.
+
+        Returns None (no decision yet) while fewer than ``min_samples`` replies
+        were measured and the error SLO holds; the caller keeps accumulating.
+        """
+        attempts = sent + errors
+        error_rate = (errors / attempts) if attempts else 0.0
+        achieved = sent / elapsed if elapsed > 0 else 0.0
+        old = self.rate
+        if p95 is not None and p95 > self.slo_p95_seconds:
+            action, reason = "decrease", f"p95 {p95:.2f}s > {self.slo_p95_seconds:g}s"
+        elif attempts and error_rate > self.slo_error_rate:
+            action, reason = "decrease", f"error rate {error_rate:.1%} > {self.slo_error_rate:.1%}"
+        elif sent < self.min_samples:
+            return None
+        elif elapsed > 0 and attempts / elapsed < old * self.saturation_ratio:
+            action, reason = "hold", f"sessions saturated ({achieved:.2f}/s of {old:.2f}/s)"
+        else:
+            action, reason = "increase", "within SLOs"
+        if action == "decrease":
+            self.rate = self.clamp(old * self.decrease_factor)
+        elif action == "increase":
+            self.rate = self.clamp(old + self.increase_step)
+        if self.rate == old and action != "hold":
+            reason += " (at limit)"
+            action = "hold"
+        decision = {"action": action, "reason": reason, "old_rate": old, "rate": self.rate,
+                    "p95_seconds": p95, "error_rate": error_rate, "achieved_rate": achieved,
+                    "sent": sent, "errors": errors}
+        if action != "hold":
+            self.adjustments += 1
+        self.last = decision
+        self.history.append(decision)
+        return decision
+
+    def state(self) -> dict:
+        return {
+            "rate": self.rate,
+            "slo_p95_seconds": self.slo_p95_seconds,
+            "slo_error_rate": self.slo_error_rate,
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "adjustments": self.adjustments,
+            "last": self.last,
+            "history": list(self.history),
+        }
@@ -0,0 +1,101 @@
+"""
+Replay recorded traffic: re-issue the messages of a previous run with the original
+timing, scaled timing or as fast as possible.
+
+Sources are read lazily, one row at a time, so multi-GB logs never have to fit
+in memory: ``logs/messages.csv`` (``timestamp_utc``/``timestamp`` + ``message``
+columns) or a binary run log segment/directory (``run_log.py``).
+"""
+
+import csv
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+from run_log import iter_records, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP_COLUMNS = ("timestamp_utc", "timestamp")
+
+
+def iter_csv_messages(path: Union[str, Path]) -> Iterator[Tuple[float, str]]:
+    """(epoch timestamp, message) for every usable row of a messages CSV."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        column = next((c for c in _TIMESTAMP_COLUMNS if c in (reader.fieldnames or [])), None)
+        if column is None or 'message' not in (reader.fieldnames or []):
+            raise ValueError(f"{path}: expected columns {_TIMESTAMP_COLUMNS[0]} and message")
+        for row in reader:
+            ts = parse_timestamp(row.get(column))
+            message = (row.get('message') or '').strip()
+            if ts is not None and message:
+                yield ts, message
+
+
+def iter_log_messages(path: Union[str, Path]) -> Iterator[Tuple[float, str]]:
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        return iter_csv_messages(path)
+    return ((rec['timestamp'], rec['message']) for rec in iter_records(path)
+            if rec.get('timestamp') is not None and rec.get('message'))
+
+
+class ReplaySource:
+    """Turns a recorded log into ``(offset_seconds, message)`` arrivals.
+
+    ``speed`` scales the original gaps (2.0 = twice as fast); ``speed <= 0``
+    issues everything as fast as possible. Offsets never go backwards, so rows
+    logged slightly out of order are sent immediately after their predecessor.
+    With ``loop`` the log is replayed again, continuing the timeline.
+    ``shard=(index, count)`` keeps every ``count``-th row starting at ``index``
+    (one worker process each), on the timeline of the whole log.
+    """
+
+    def __init__(self, path: Union[str, Path], speed: float = 1.0, loop: bool = False,
+                 shard: Tuple[int, int] = (0, 1)):
+        self.path = Path(path)
+        self.speed = float(speed)
+        self.loop = loop
+        self.shard_index, self.shard_count = int(shard[0]), max(1, int(shard[1]))
+        self.rows = 0
+        self.passes = 0
+        self.last_timestamp: Optional[float] = None
+
+    @property
+    def as_fast_as_possible(self) -> bool:
+        return self.speed <= 0
+
+    def __iter__(self) -> Iterator[Tuple[float, str]]:
+        base = 0.0
+        offset = 0.0
+        while True:
+            first: Optional[float] = None
+            emitted = False
+            for position, (ts, message) in enumerate(iter_log_messages(self.path)):
+                if first is None:
+                    first = ts
+                if position % self.shard_count != self.shard_index:
+                    continue
+                if not self.as_fast_as_possible:
+                    offset = max(offset, base + (ts - first) / self.speed)
+                self.rows += 1
+                self.last_timestamp = ts
+                emitted = True
+                yield offset, message
+            self.passes += 1
+            if not (self.loop and emitted):
+                return
+            base = offset
+            logger.info("Replay pass %d finished; starting again", self.passes)
+
+    def stats(self) -> dict:
+        return {
+            "file": str(self.path),
+            "speed": self.speed,
+            "loop": self.loop,
+            "rows_read": self.rows,
+            "passes": self.passes,
+            "position": datetime.utcfromtimestamp(self.last_timestamp).isoformat() if self.last_timestamp else None,
+        }
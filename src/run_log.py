@@ -0,0 +1,231 @@
+"""
+Compact binary run log: gzip-compressed, length-prefixed records with rotation.
+
+Each run writes to ``<base_dir>/<run_id>/messages-00001.dlog.gz`` and rolls over
+to the next segment once ``max_segment_bytes`` of (uncompressed) records have
+been written. A segment is a gzip stream containing::
+
+    b"DLOG1\\n" | u32 header length | header JSON (schema, run id, segment)
+    then, per record: u32 record length | fixed numeric block | strings
+
+The numeric block is one ``struct`` of every non-string field in schema order;
+strings follow as u32 length + UTF-8 bytes (0xFFFFFFFF for None). Floats are
+stored as float32 with NaN for "not measured". Readers use the schema from the
+header, so new fields can be appended without breaking old files.
+"""
+
+import gzip
+import json
+import logging
+import math
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from log_writer import BackgroundWriter
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DLOG1\n"
+SEGMENT_GLOB = "messages-*.dlog.gz"
+_U32 = struct.Struct("<I")
+_NONE_STR = 0xFFFFFFFF
+_STRUCT_CODES = {"f64": "d", "f32": "f", "i32": "i", "bool": "B"}
+
+RUN_LOG_SCHEMA: List[Tuple[str, str]] = [
+    ("timestamp", "f64"),  # epoch seconds (UTC)
+    ("worker_id", "i32"),
+    ("ok", "bool"),
+    ("latency_seconds", "f32"),
+    ("first_token_seconds", "f32"),
+    ("complete_seconds", "f32"),
+    ("send_seconds", "f32"),
+    ("message", "str"),
+    ("response", "str"),
+    ("error", "str"),
+    ("scenario", "str"),
+    ("step", "i32"),
+]
+
+
+class RecordCodec:
+    """Encodes/decodes record dicts for a given schema."""
+
+    def __init__(self, schema: List[Tuple[str, str]]):
+        self.schema = [tuple(field) for field in schema]
+        self.numeric = [(name, kind) for name, kind in self.schema if kind != "str"]
+        self.strings = [name for name, kind in self.schema if kind == "str"]
+        self.struct = struct.Struct("<" + "".join(_STRUCT_CODES[kind] for _, kind in self.numeric))
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        values = []
+        for name, kind in self.numeric:
+            value = record.get(name)
+            if kind in ("f32", "f64"):
+                values.append(math.nan if value is None else float(value))
+            elif kind == "i32":
+                values.append(-1 if value is None else int(value))
+            else:
+                values.append(1 if value else 0)
+        parts = [self.struct.pack(*values)]
+        for name in self.strings:
+            value = record.get(name)
+            if value is None:
+                parts.append(_U32.pack(_NONE_STR))
+            else:
+                data = str(value).encode("utf-8")
+                parts.append(_U32.pack(len(data)))
+                parts.append(data)
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        for (name, kind), value in zip(self.numeric, self.struct.unpack_from(data, 0)):
+            if kind in ("f32", "f64"):
+                record[name] = None if math.isnan(value) else value
+            elif kind == "i32":
+                record[name] = None if value == -1 else value
+            else:
+                record[name] = bool(value)
+        offset = self.struct.size
+        for name in self.strings:
+            (length,) = _U32.unpack_from(data, offset)
+            offset += 4
+            if length == _NONE_STR:
+                record[name] = None
+            else:
+                record[name] = data[offset:offset + length].decode("utf-8")
+                offset += length
+        return record
+
+
+class RunLogWriter(BackgroundWriter):
+    """Background writer for the binary run log (one directory per run, rotated segments)."""
+
+    thread_name = "run-log-writer"
+
+    def __init__(self, base_dir: Union[str, Path], run_id: Optional[str] = None,
+                 max_segment_bytes: int = 64 * 1024 * 1024, compression_level: int = 6,
+                 schema: Optional[List[Tuple[str, str]]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.run_dir = Path(base_dir) / self.run_id
+        self.max_segment_bytes = max_segment_bytes
+        self.compression_level = compression_level
+        self.codec = RecordCodec(schema or RUN_LOG_SCHEMA)
+        self.segment = 0
+        self._segment_bytes = 0
+        self._file: Optional[gzip.GzipFile] = None
+
+    @property
+    def segment_path(self) -> Path:
+        return self.run_dir / f"messages-{self.segment:05d}.dlog.gz"
+
+    def stats(self) -> dict:
+        result = super().stats()
+        result.update({"run_dir": str(self.run_dir), "segment": self.segment})
+        return result
+
+    def _open(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._roll()
+
+    def _roll(self) -> None:
+        self._close()
+        self.segment += 1
+        self._file = gzip.open(self.segment_path, "wb", compresslevel=self.compression_level)
+        header = json.dumps({
+            "schema": self.codec.schema,
+            "run_id": self.run_id,
+            "segment": self.segment,
+            "created": datetime.utcnow().isoformat(),
+        }).encode("utf-8")
+        self._file.write(MAGIC + _U32.pack(len(header)) + header)
+        self._segment_bytes = 0
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        chunks = []
+        for record in batch:
+            data = self.codec.encode(record)
+            chunks.append(_U32.pack(len(data)))
+            chunks.append(data)
+            self._segment_bytes += 4 + len(data)
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+        if self._segment_bytes >= self.max_segment_bytes:
+            self._roll()
+
+    def _close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def segment_files(path: Union[str, Path]) -> List[Path]:
+    """Segments under a file, a run directory or a directory of runs, in write order."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    direct = sorted(path.glob(SEGMENT_GLOB))
+    return direct or sorted(path.glob(f"*/{SEGMENT_GLOB}"))
+
+
+def iter_records(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Stream records from one segment or every segment under a directory.
+
+    A truncated trailing record (process killed mid-write) ends the segment
+    quietly instead of raising.
+    """
+    for segment in segment_files(path):
+        with gzip.open(segment, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a run log segment: {segment}")
+            (header_len,) = _U32.unpack(f.read(4))
+            header = json.loads(f.read(header_len))
+            codec = RecordCodec(header["schema"])
+            try:
+                while True:
+                    prefix = f.read(4)
+                    if len(prefix) < 4:
+                        break
+                    (length,) = _U32.unpack(prefix)
+                    data = f.read(length)
+                    if len(data) < length:
+                        break
+                    yield codec.decode(data)
+            except EOFError:
+                logger.warning("Segment truncated: %s", segment)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of a CSV timestamp: a number or an ISO time (naive = UTC)."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # the CSV stores naive UTC times
+    return dt.timestamp()
+
+
+if __name__ == "__main__":
+    # Export a run log (file or directory) to CSV on stdout
+    import csv
+
+    if len(sys.argv) != 2:
+        print("usage: python src/run_log.py <segment|run_dir|runs_dir>", file=sys.stderr)
+        sys.exit(2)
+    out = csv.writer(sys.stdout)
+    names = [name for name, _ in RUN_LOG_SCHEMA]
+    out.writerow(names)
+    for rec in iter_records(sys.argv[1]):
+        out.writerow([rec.get(name) for name in names])
@@ -0,0 +1,176 @@
+"""
+Multi-turn conversation scenarios loaded from YAML and sampled by weight.
+
+File format (see ``scenarios.example.yaml``)::
+
+    defaults:
+      think_time: [3, 8]        # seconds before each follow-up step (number or [min, max])
+    scenarios:
+      - name: matricula
+        weight: 3
+        steps:
+          - Como faço minha matrícula?
+          - message: E qual é o prazo?
+            think_time: [5, 10]
+
+Selection uses Vose's alias method: O(n) to build, O(1) per sample.
+"""
+
+import logging
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import yaml
+
+from latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THINK_TIME = (2.0, 5.0)
+
+
+class Step:
+    """One message of a scenario; ``think_time`` is the pause before sending it."""
+
+    def __init__(self, message: str, think_time: Tuple[float, float] = DEFAULT_THINK_TIME):
+        self.message = message
+        self.think_time = think_time
+
+    def pause(self, rng=random) -> float:
+        low, high = self.think_time
+        return rng.uniform(low, high) if high > low else low
+
+
+class Scenario:
+    def __init__(self, name: str, steps: Sequence[Step], weight: float = 1.0):
+        self.name = name
+        self.steps = tuple(steps)
+        self.weight = weight
+
+
+class AliasSampler:
+    """Weighted choice in O(1) per sample (Vose's alias method)."""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("AliasSampler needs at least one weight")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("Weights must add up to a positive number")
+        scaled = [w * n / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            small_i, large_i = small.pop(), large.pop()
+            self.prob[small_i] = scaled[small_i]
+            self.alias[small_i] = large_i
+            scaled[large_i] -= 1.0 - scaled[small_i]
+            (small if scaled[large_i] < 1.0 else large).append(large_i)
+        # Leftovers are 1.0 up to rounding error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=random) -> int:
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+def _think_time(value: Any, default: Tuple[float, float]) -> Tuple[float, float]:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return (float(value), float(value))
+    low, high = value
+    return (float(low), float(high))
+
+
+class ScenarioSet:
+    def __init__(self, scenarios: Sequence[Scenario]):
+        self.scenarios = [s for s in scenarios if s.steps and s.weight > 0]
+        if not self.scenarios:
+            raise ValueError("No scenario with steps and a positive weight")
+        names = [s.name for s in self.scenarios]
+        if len(set(names)) != len(names):
+            raise ValueError("Scenario names must be unique")
+        self._sampler = AliasSampler([s.weight for s in self.scenarios])
+
+    def __len__(self) -> int:
+        return len(self.scenarios)
+
+    def sample(self, rng=random) -> Scenario:
+        return self.scenarios[self._sampler.sample(rng)]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScenarioSet":
+        defaults = data.get('defaults') or {}
+        default_think = _think_time(defaults.get('think_time'), DEFAULT_THINK_TIME)
+        scenarios = []
+        for i, item in enumerate(data.get('scenarios') or []):
+            think = _think_time(item.get('think_time'), default_think)
+            steps = []
+            for raw in item.get('steps') or []:
+                if isinstance(raw, str):
+                    steps.append(Step(raw, think))
+                else:
+                    steps.append(Step(str(raw['message']), _think_time(raw.get('think_time'), think)))
+            scenarios.append(Scenario(str(item.get('name') or f"scenario-{i + 1}"), steps,
+                                      float(item.get('weight', 1.0))))
+        return cls(scenarios)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ScenarioSet":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(yaml.safe_load(f) or {})
+
+
+class ScenarioStats:
+    """Counters for one scenario plus a latency histogram per step. Thread-safe."""
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.started = 0
+        self.completed = 0
+        self.aborted = 0
+        self._step_sent = [0] * len(scenario.steps)
+        self._step_errors = [0] * len(scenario.steps)
+        self._step_latency = [LatencyHistogram() for _ in scenario.steps]
+        self._lock = threading.Lock()
+
+    def record_start(self) -> None:
+        with self._lock:
+            self.started += 1
+
+    def record_step(self, index: int, ok: bool, latency: Optional[float]) -> None:
+        with self._lock:
+            if ok:
+                self._step_sent[index] += 1
+                if latency is not None:
+                    self._step_latency[index].record(latency)
+            else:
+                self._step_errors[index] += 1
+
+    def record_end(self, completed: bool) -> None:
+        with self._lock:
+            if completed:
+                self.completed += 1
+            else:
+                self.aborted += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "weight": self.scenario.weight,
+                "started": self.started,
+                "completed": self.completed,
+                "aborted": self.aborted,
+                "steps": [
+                    {"step": i + 1, "message": step.message, "sent": self._step_sent[i],
+                     "errors": self._step_errors[i], "latency": self._step_latency[i].summary()}
+                    for i, step in enumerate(self.scenario.steps)
+                ],
+            }
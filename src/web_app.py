@@ -1,29 +1,121 @@
 import logging
-from flask import Flask, jsonify, request, abort
+import os
+from functools import partial
+from flask import Flask, jsonify, request, abort, Response, stream_with_context
 from flask_cors import CORS
 from bot_manager import BotManager
+from process_shards import ShardedBotManager
+from event_stream import EventBroadcaster
+from prometheus import render_metrics
+from coordinator import AgentRegistrar, Coordinator
 import yaml
 from pathlib import Path
 from typing import Optional, Tuple, Union
 
-CONFIG_PATH = Path("config.yaml")
+# DARCY_CONFIG allows several nodes (e.g. local agents) with separate configs
+CONFIG_PATH = Path(os.environ.get("DARCY_CONFIG", "config.yaml"))
 DEFAULT_CONFIG = {
     'url': 'https://aprender2teste.unb.br/my/',
     'questions_file': 'questions.txt',
+    'scenarios_file': None,
     'interval_seconds': 3.0,
     'jitter': 0.5,
     'restart_delay': 10.0,
+    'concurrency': 1,
+    'processes': 1,
+    'mode': 'closed',  # closed | open | replay
+    'arrival_rate': 1.0,
+    'arrival_process': 'constant',  # constant | poisson
+    'max_backlog': 100,
+    'response_timeout': 60.0,
+    'response_settle_seconds': 1.0,
+    'script_submit': False,
     'headless': False,
     'wait_for_manual_login': True,
     'manual_login_wait_seconds': 120,
     'capture_responses': True,
     'log_dir': 'logs',
     'messages_csv': 'messages.csv',
+    'log_batch_size': 200,
+    'log_flush_seconds': 1.0,
+    'run_log': {
+        'enabled': False,
+        'dir': 'runs',
+        'max_segment_mb': 64,
+        'compression_level': 6
+    },
+    'load_profile': {
+        'enabled': False,
+        'on_finish': 'stop',  # stop | hold
+        'stages': []
+    },
+    'replay': {
+        'file': 'logs/replay.csv',
+        'speed': 1.0,
+        'loop': False
+    },
+    'rate_controller': {
+        'enabled': False,
+        'period_seconds': 30,
+        'slo_p95_seconds': 10.0,
+        'slo_error_rate': 0.05,
+        'min_rate': 0.05,
+        'max_rate': 5.0,
+        'initial_rate': None,  # None = start from the configured pacing
+        'increase_step': 0.1,
+        'decrease_factor': 0.7,
+        'min_samples': 3
+    },
     'port': 5000,
     'selectors': {
         'iframe_id': 'tool_content',
         'input_tag': 'textarea'
     },
+    'backend': 'selenium',  # selenium | http
+    'http_backend': {
+        'endpoint': '',
+        'method': 'POST',
+        'message_field': 'message',
+        'conversation_field': '',
+        'extra_payload': {},
+        'response_field': 'response',
+        'headers': {},
+        'timeout': 60.0,
+        'pool_size': 100,
+        'cookies_file': ''
+    },
+    'browser_pool': {
+        'enabled': False,
+        'size': 1,
+        'profiles_dir': 'profiles',
+        'cookies_file': ''
+    },
+    'chromedriver': {
+        'path': '',
+        'cache_dir': 'drivers',
+        'offline': False
+    },
+    'browser_profile': {
+        'lean': False,
+        'page_load_strategy': 'eager',
+        'block_images': True,
+        'block_fonts': True,
+        'block_media': True,
+        'window_size': '800,600',
+        'renderer_memory_mb': 512,
+        'renderer_process_limit': 1,
+        'extra_args': []
+    },
+    'cluster': {
+        'role': 'standalone',  # standalone | coordinator | agent
+        'agents': [],  # coordinator: static agents [{url, capacity}]
+        'agent_ttl_seconds': 30,
+        'request_timeout': 5.0,
+        'coordinator_url': '',  # agent: coordinator to register with
+        'agent_url': '',  # agent: URL the coordinator uses to reach this node
+        'capacity': 1,
+        'heartbeat_seconds': 10
+    },
     'ssl': {
         'enabled': False,
         'mode': 'adhoc',  # adhoc | cert
@@ -45,6 +137,17 @@ def load_config():
             with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f) or {}
                 cfg = {**DEFAULT_CONFIG, **data}
+                ssl_data = data.get('ssl') or {}
+                cfg['ssl'] = {**DEFAULT_CONFIG['ssl'], **ssl_data}
+                cfg['browser_pool'] = {**DEFAULT_CONFIG['browser_pool'], **(data.get('browser_pool') or {})}
+                cfg['chromedriver'] = {**DEFAULT_CONFIG['chromedriver'], **(data.get('chromedriver') or {})}
+                cfg['browser_profile'] = {**DEFAULT_CONFIG['browser_profile'], **(data.get('browser_profile') or {})}
+                cfg['http_backend'] = {**DEFAULT_CONFIG['http_backend'], **(data.get('http_backend') or {})}
+                cfg['run_log'] = {**DEFAULT_CONFIG['run_log'], **(data.get('run_log') or {})}
+                cfg['load_profile'] = {**DEFAULT_CONFIG['load_profile'], **(data.get('load_profile') or {})}
+                cfg['replay'] = {**DEFAULT_CONFIG['replay'], **(data.get('replay') or {})}
+                cfg['rate_controller'] = {**DEFAULT_CONFIG['rate_controller'], **(data.get('rate_controller') or {})}
+                cfg['cluster'] = {**DEFAULT_CONFIG['cluster'], **(data.get('cluster') or {})}
                 return cfg
         except Exception as e:
             logger.error(f"Failed to load config.yaml: {e}")
@@ -52,19 +155,6 @@ def load_config():
 
 cfg = load_config()
 API_KEY = cfg.get('api_key') or None
-manager = BotManager(
-    url=cfg['url'],
-    questions_file=cfg['questions_file'],
-    interval_seconds=cfg['interval_seconds'],
-                ssl_data = data.get('ssl') or {}
-                cfg['ssl'] = {**DEFAULT_CONFIG['ssl'], **ssl_data}
-    jitter=cfg['jitter'],
-    restart_delay=cfg['restart_delay'],
-    headless=cfg.get('headless', False),
-    wait_for_manual_login=cfg.get('wait_for_manual_login', True),
-    manual_login_wait_seconds=cfg.get('manual_login_wait_seconds', 120),
-    capture_responses=cfg.get('capture_responses', True),
-    log_dir=cfg.get('log_dir', 'logs'),
 SSL_CONTEXT = None
 
 
@@ -86,10 +176,67 @@ def resolve_ssl_context(ssl_cfg: Optional[dict]) -> Optional[Union[str, Tuple[st
 
 
 SSL_CONTEXT = resolve_ssl_context(cfg.get('ssl'))
+# processes > 1 splits the sessions across worker processes (read at startup)
+PROCESSES = max(1, int(cfg.get('processes', 1) or 1))
+manager_factory = partial(ShardedBotManager, processes=PROCESSES) if PROCESSES > 1 else BotManager
+manager = manager_factory(
+    url=cfg['url'],
+    questions_file=cfg['questions_file'],
+    scenarios_file=cfg.get('scenarios_file'),
+    interval_seconds=cfg['interval_seconds'],
+    jitter=cfg['jitter'],
+    restart_delay=cfg['restart_delay'],
+    headless=cfg.get('headless', False),
+    wait_for_manual_login=cfg.get('wait_for_manual_login', True),
+    manual_login_wait_seconds=cfg.get('manual_login_wait_seconds', 120),
+    capture_responses=cfg.get('capture_responses', True),
+    log_dir=cfg.get('log_dir', 'logs'),
     messages_csv=cfg.get('messages_csv', 'messages.csv'),
-    selectors=cfg.get('selectors', {})
+    selectors=cfg.get('selectors', {}),
+    concurrency=cfg.get('concurrency', 1),
+    browser_pool=cfg.get('browser_pool'),
+    browser_profile=cfg.get('browser_profile'),
+    chromedriver=cfg.get('chromedriver'),
+    backend=cfg.get('backend', 'selenium'),
+    http_backend=cfg.get('http_backend'),
+    mode=cfg.get('mode', 'closed'),
+    arrival_rate=cfg.get('arrival_rate', 1.0),
+    arrival_process=cfg.get('arrival_process', 'constant'),
+    max_backlog=cfg.get('max_backlog', 100),
+    response_timeout=cfg.get('response_timeout', 60.0),
+    response_settle_seconds=cfg.get('response_settle_seconds', 1.0),
+    script_submit=cfg.get('script_submit', False),
+    log_batch_size=cfg.get('log_batch_size', 200),
+    log_flush_seconds=cfg.get('log_flush_seconds', 1.0),
+    run_log=cfg.get('run_log'),
+    load_profile=cfg.get('load_profile'),
+    replay=cfg.get('replay'),
+    rate_controller=cfg.get('rate_controller')
 )
 
+broadcaster = EventBroadcaster(lambda: {"status": manager.status(), "metrics": manager.metrics()})
+manager.add_listener(broadcaster.notify)
+broadcaster.start()
+
+cluster_cfg = cfg.get('cluster') or {}
+coordinator: Optional[Coordinator] = None
+registrar: Optional[AgentRegistrar] = None
+if cluster_cfg.get('role') == 'coordinator':
+    coordinator = Coordinator(
+        api_key=API_KEY,
+        agents=cluster_cfg.get('agents'),
+        agent_ttl=cluster_cfg.get('agent_ttl_seconds', 30),
+        timeout=cluster_cfg.get('request_timeout', 5.0)
+    )
+elif cluster_cfg.get('role') == 'agent' and cluster_cfg.get('coordinator_url'):
+    registrar = AgentRegistrar(
+        cluster_cfg['coordinator_url'],
+        cluster_cfg.get('agent_url') or f"http://localhost:{cfg.get('port', 5000)}",
+        capacity=cluster_cfg.get('capacity', 1),
+        api_key=API_KEY,
+        interval=cluster_cfg.get('heartbeat_seconds', 10)
+    )
+
 def _check_key():
     if API_KEY:
         provided = request.headers.get('X-API-KEY') or request.args.get('api_key')
@@ -114,11 +261,17 @@ def stop():
     manager.stop()
     return jsonify({"ok": True, "status": manager.status()})
 
+@app.post('/api/questions/reload')
+def reload_questions():
+    _check_key()
+    return jsonify({"ok": True, "questions": manager.reload_questions()})
+
 @app.post('/api/config')
 def update_config():
     _check_key()
     data = request.json or {}
     global cfg
+    previous = {k: cfg.get(k) for k in ('interval_seconds', 'jitter', 'arrival_rate')}
     cfg.update({k: v for k, v in data.items() if k in DEFAULT_CONFIG})
     if 'ssl' in data:
         cfg['ssl'] = {**DEFAULT_CONFIG['ssl'], **(data.get('ssl') or {})}
@@ -130,8 +283,26 @@ def update_config():
     global API_KEY, SSL_CONTEXT
     API_KEY = cfg.get('api_key') or None
     SSL_CONTEXT = resolve_ssl_context(cfg.get('ssl'))
-    manager.interval_seconds = cfg['interval_seconds']
-    manager.jitter = cfg['jitter']
+    running = manager.is_running
+    warning = None
+    # A running manager only takes what this request changed (not a resend of the same config)
+    if not running or cfg['jitter'] != previous['jitter']:
+        manager.jitter = cfg['jitter']
+    if not running or any(cfg.get(k) != previous[k] for k in ('interval_seconds', 'arrival_rate')):
+        if not manager.set_pacing(cfg['interval_seconds'], cfg.get('arrival_rate', 1.0)):
+            warning = ("interval_seconds/arrival_rate apply when the run ends: "
+                       "the rate controller or load profile sets the pacing")
+    if not running:
+        # Pool size and load model are fixed while running; applied on next start.
+        manager.concurrency = max(1, int(cfg.get('concurrency', 1)))
+        manager.mode = cfg.get('mode', 'closed')
+        manager.arrival_process = cfg.get('arrival_process', 'constant')
+        manager.scenarios_file = Path(cfg['scenarios_file']) if cfg.get('scenarios_file') else None
+        manager.load_profile = cfg.get('load_profile') or {}
+        manager.replay = cfg.get('replay') or {}
+        manager.rate_controller = cfg.get('rate_controller') or {}
+    if warning:
+        return jsonify({"ok": True, "config": cfg, "warning": warning})
     return jsonify({"ok": True, "config": cfg})
 
 @app.get('/')
@@ -144,10 +315,20 @@ def root():
         "endpoints": [
             "/api/status",
             "/api/metrics",
+            "/api/events",
+            "/metrics",
             "/api/start",
             "/api/stop",
-            "/api/config"
-        ]
+            "/api/questions/reload",
+            "/api/config",
+            "/api/histograms"
+        ] + ([
+            "/api/cluster/agents",
+            "/api/cluster/register",
+            "/api/cluster/start",
+            "/api/cluster/stop",
+            "/api/cluster/metrics"
+        ] if coordinator else [])
     })
 
 @app.get('/api/metrics')
@@ -155,9 +336,66 @@ def metrics():
     _check_key()
     return jsonify(manager.metrics())
 
+@app.get('/metrics')
+def prometheus_metrics():
+    _check_key()
+    return Response(render_metrics(manager), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.get('/api/histograms')
+def histograms():
+    _check_key()
+    return jsonify(manager.export_histograms())
+
+def _coordinator() -> Coordinator:
+    _check_key()
+    if coordinator is None:
+        abort(404)
+    return coordinator
+
+@app.post('/api/cluster/register')
+def cluster_register():
+    data = request.json or {}
+    if not data.get('url'):
+        return jsonify({"ok": False, "error": "url required"}), 400
+    node = _coordinator().register(data['url'], data.get('capacity', 1), data.get('agent_id'))
+    return jsonify({"ok": True, "agent": node.snapshot()})
+
+@app.delete('/api/cluster/agents/<agent_id>')
+def cluster_unregister(agent_id):
+    return jsonify({"ok": _coordinator().unregister(agent_id)})
+
+@app.get('/api/cluster/agents')
+def cluster_agents():
+    return jsonify({"agents": _coordinator().status()})
+
+@app.post('/api/cluster/start')
+def cluster_start():
+    # Body: total concurrency / arrival_rate (split by capacity) and shared settings
+    return jsonify({"ok": True, "results": _coordinator().start(request.json or {})})
+
+@app.post('/api/cluster/stop')
+def cluster_stop():
+    return jsonify({"ok": True, "results": _coordinator().stop()})
+
+@app.get('/api/cluster/metrics')
+def cluster_metrics():
+    return jsonify(_coordinator().metrics())
+
+@app.get('/api/events')
+def events():
+    # EventSource não envia cabeçalhos customizados: use ?api_key= quando protegido
+    _check_key()
+    return Response(
+        stream_with_context(broadcaster.stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     if cfg.get('autostart'):
         logger.info("Autostart habilitado - iniciando bot...")
         manager.start()
+    if registrar:
+        registrar.start()
     port = cfg.get('port', 5000)
-    app.run(host='0.0.0.0', port=port, ssl_context=SSL_CONTEXT)
+    app.run(host='0.0.0.0', port=port, ssl_context=SSL_CONTEXT, threaded=True)
@@ -0,0 +1,92 @@
+"""
+Tests for the streaming message-log analyzer.
+"""
+
+import pytest
+import sys
+import os
+import json
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyze_log import OTHER, RunAnalysis, analyze, main
+from run_log import RunLogWriter
+
+HEADER = ("timestamp_utc,message,response,worker_id,ok,error,latency_seconds,"
+          "first_token_seconds,complete_seconds,send_seconds,scenario,step\n")
+
+
+@pytest.fixture
+def messages_csv(tmp_path):
+    rows = [
+        "2025-01-01T12:00:00.250000,Pergunta A,resposta,0,1,,1.0000,0.5,1.0,0.01,,",
+        "2025-01-01T12:00:30,Pergunta B,,1,1,,2.0000,1.0,2.0,0.01,,",
+        "2025-01-01T12:00:59.900000,Pergunta A,resposta,0,1,,3.0000,1.5,3.0,0.01,,",
+        "2025-01-01T12:01:10,Pergunta A,,0,0,TimeoutException: sem resposta,,,,,,",
+        "2025-01-01T12:02:00,\"Pergunta, com virgula\",resposta,1,1,,10.0000,5.0,10.0,0.01,,",
+    ]
+    path = tmp_path / "messages.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n", encoding="utf-8")
+    return path
+
+
+class TestRunAnalysis:
+    """Tests for the one-pass analysis."""
+
+    def test_report_from_csv(self, messages_csv):
+        """Totals, rates, timeline buckets, slowest messages and per-question stats."""
+        report = analyze(messages_csv, engine="python", bucket_seconds=60, top=2).report()
+
+        assert report["rows"] == 5
+        assert report["duration_seconds"] == pytest.approx(119.75)
+        assert report["errors"] == 1
+        assert report["error_rate"] == pytest.approx(0.2)
+        assert report["empty_responses"] == 1
+        assert report["errors_by_type"] == {"TimeoutException: sem resposta": 1}
+        assert report["latency"]["count"] == 4
+        assert report["latency"]["min"] == 1.0
+        assert report["latency"]["max"] == 10.0
+        assert report["latency"]["p50"] == pytest.approx(2.0, rel=0.01)
+
+        assert [(b["start"], b["sent"], b["errors"]) for b in report["timeline"]] == [
+            ("2025-01-01T12:00:00", 3, 0), ("2025-01-01T12:01:00", 1, 1), ("2025-01-01T12:02:00", 1, 0)]
+        assert [s["message"] for s in report["slowest"]] == ["Pergunta, com virgula", "Pergunta A"]
+
+        first = report["questions"][0]
+        assert (first["message"], first["sent"], first["errors"]) == ("Pergunta A", 3, 1)
+        assert first["mean"] == pytest.approx(2.0)
+
+    def test_distinct_questions_are_capped(self):
+        """Questions beyond max_questions are counted together under (other)."""
+        analysis = RunAnalysis(max_questions=2)
+        for i in range(5):
+            analysis.add(1000.0 + i, f"pergunta {i}", True, latency=0.5)
+        report = analysis.report()
+        assert report["questions_distinct"] == 3
+        assert {q["message"]: q["sent"] for q in report["questions"]}[OTHER] == 3
+
+    def test_run_log_input(self, tmp_path):
+        """Binary run logs are analyzed like the CSV."""
+        writer = RunLogWriter(tmp_path / "runs", run_id="r1")
+        writer.start()
+        for i in range(3):
+            writer.write({"timestamp": 1735732800.0 + i, "message": "oi", "response": "ola", "worker_id": 0,
+                          "ok": i != 1, "error": None if i != 1 else "falhou", "latency_seconds": 0.2 * (i + 1)})
+        writer.close()
+        report = analyze(tmp_path / "runs" / "r1").report()
+        assert report["rows"] == 3
+        assert report["errors_by_type"] == {"falhou": 1}
+        assert report["latency"]["max"] == pytest.approx(0.6)
+
+    def test_pandas_engine_matches_python(self, messages_csv):
+        """The vectorized engine gives the same report as the plain loop."""
+        pytest.importorskip("pandas")
+        python_report = analyze(messages_csv, engine="python").report()
+        pandas_report = analyze(messages_csv, engine="pandas").report()
+        assert json.dumps(pandas_report, sort_keys=True) == json.dumps(python_report, sort_keys=True)
+
+    def test_cli_json(self, messages_csv, capsys):
+        """The CLI prints the report as JSON."""
+        assert main([str(messages_csv), "--engine", "python", "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["rows"] == 5
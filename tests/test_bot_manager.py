@@ -0,0 +1,359 @@
+"""
+Unit tests for the BotManager worker pool (no browser required).
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import bot_manager
+from bot_manager import BotManager
+from chatbot_automator import SendResult
+
+
+class FakeAutomator:
+    """Stand-in for ChatbotAutomator that answers instantly."""
+
+    fail_next = False
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.profile_dir = kwargs.get("profile_dir")
+        self.closed = False
+
+    def start(self):
+        return True
+
+    def is_alive(self):
+        return not self.closed
+
+    def send_message(self, message):
+        if FakeAutomator.fail_next:
+            FakeAutomator.fail_next = False
+            raise RuntimeError("iframe sumiu")
+        return SendResult(message=message, response=f"eco: {message}",
+                          send_seconds=0.001, first_token_seconds=0.01, complete_seconds=0.02)
+
+    def close(self):
+        self.closed = True
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def questions_file(tmp_path):
+    path = tmp_path / "questions.txt"
+    path.write_text("Pergunta A\nPergunta B\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def make_manager(tmp_path, questions_file, monkeypatch):
+    """Build managers wired to FakeAutomator and stop them after the test."""
+    monkeypatch.setattr(bot_manager, "ChatbotAutomator", FakeAutomator)
+    managers = []
+
+    def factory(**kwargs):
+        options = dict(
+            url="http://localhost/",
+            questions_file=str(questions_file),
+            interval_seconds=0.0,
+            jitter=0.0,
+            restart_delay=0.05,
+            wait_for_manual_login=False,
+            log_dir=str(tmp_path / "logs"),
+        )
+        options.update(kwargs)
+        manager = BotManager(**options)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        manager.stop()
+
+
+class TestWorkerPool:
+    """Tests for running several independent sessions under one manager."""
+
+    def test_pool_runs_every_worker(self, make_manager):
+        """Each worker sends messages and shows up in status()."""
+        manager = make_manager(concurrency=3)
+        assert manager.start()
+        assert wait_until(lambda: all(w["messages_sent"] > 0 for w in manager.status()["workers"]))
+
+        status = manager.status()
+        assert status["running"]
+        assert status["active_workers"] == 3
+        assert [w["worker_id"] for w in status["workers"]] == [0, 1, 2]
+        assert status["messages_sent"] >= 3
+
+    def test_start_twice_is_rejected(self, make_manager):
+        """A running pool cannot be started again."""
+        manager = make_manager(concurrency=2)
+        assert manager.start()
+        assert not manager.start()
+
+    def test_stop_closes_all_sessions(self, make_manager):
+        """stop() joins every worker and releases their automators."""
+        manager = make_manager(concurrency=2)
+        manager.start()
+        assert wait_until(lambda: manager.status()["messages_sent"] >= 2)
+        manager.stop()
+
+        status = manager.status()
+        assert not status["running"]
+        assert status["active_workers"] == 0
+        assert all(not w["driver_ready"] for w in status["workers"])
+
+    def test_open_mode_sends_at_arrival_rate(self, make_manager):
+        """In open mode the scheduler drives the sessions and reports its slots."""
+        manager = make_manager(concurrency=2, mode="open", arrival_rate=20)
+        manager.start()
+        assert wait_until(lambda: manager.metrics()["messages_sent"] >= 5)
+
+        metrics = manager.metrics()
+        assert metrics["mode"] == "open"
+        assert metrics["open_model"]["slots_scheduled"] >= 5
+        assert metrics["avg_latency_seconds"] is not None
+
+    def test_open_mode_stop_waits_for_sends_in_flight(self, make_manager, monkeypatch):
+        """stop() joins the scheduler once and closes sessions only after their sends finish."""
+        closed_mid_send = []
+
+        class SlowAutomator(FakeAutomator):
+            sending = 0
+
+            def send_message(self, message):
+                SlowAutomator.sending += 1
+                time.sleep(0.3)
+                SlowAutomator.sending -= 1
+                return super().send_message(message)
+
+            def close(self):
+                closed_mid_send.append(SlowAutomator.sending > 0)
+                super().close()
+
+        monkeypatch.setattr(bot_manager, "ChatbotAutomator", SlowAutomator)
+        manager = make_manager(concurrency=3, mode="open", arrival_rate=20)
+        manager.start()
+        assert wait_until(lambda: SlowAutomator.sending == 3)
+        started = time.monotonic()
+        manager.stop()
+        assert time.monotonic() - started < 2.0
+        assert closed_mid_send == [False, False, False]
+        assert not manager.is_running
+
+    def test_failed_send_counts_as_error(self, make_manager, monkeypatch):
+        """A failed SendResult on a live session is an error, not a sent message."""
+        monkeypatch.setattr(FakeAutomator, "send_message",
+                            lambda self, m: SendResult(message=m, ok=False, error="sem resposta"))
+        manager = make_manager()
+        manager.start()
+        assert wait_until(lambda: manager.status()["errors_count"] >= 1)
+
+        status = manager.status()
+        assert status["messages_sent"] == 0
+        assert status["workers"][0]["driver_restarts"] == 0
+        assert "sem resposta" in status["last_error"]
+
+    def test_driver_restarts_survive_restart(self, make_manager):
+        """The manager-level restart counter is monotonic across stop/start."""
+        manager = make_manager()
+        manager.start()
+        assert wait_until(lambda: manager.status()["messages_sent"] >= 1)
+        FakeAutomator.fail_next = True
+        assert wait_until(lambda: manager.driver_restarts == 1)
+        manager.stop()
+        manager.start()
+        assert manager.status()["workers"][0]["driver_restarts"] == 0
+        assert manager.driver_restarts == 1
+        assert manager.metrics()["driver_restarts"] == 1
+
+    def test_results_are_logged(self, make_manager, tmp_path):
+        """Sent messages reach the CSV and binary logs with latency and worker columns."""
+        from run_log import iter_records
+
+        manager = make_manager(concurrency=2, run_log={"enabled": True})
+        manager.start()
+        assert wait_until(lambda: manager.status()["messages_sent"] >= 4)
+        manager.stop()
+
+        with open(tmp_path / "logs" / "messages.csv", encoding="utf-8") as f:
+            header, first = f.readline().strip().split(","), f.readline().strip().split(",")
+        assert header[:3] == ["timestamp_utc", "message", "response"]
+        assert first[header.index("ok")] == "1"
+        assert float(first[header.index("latency_seconds")]) > 0
+
+        records = list(iter_records(tmp_path / "logs" / "runs"))
+        assert len(records) == manager.status()["messages_sent"]
+        assert {r["worker_id"] for r in records} == {0, 1}
+
+
+class TestLoadProfileRun:
+    """Tests for executing a load profile from the manager."""
+
+    def test_profile_scales_workers_and_stops(self, make_manager):
+        """Closed mode follows the stage concurrency, then stops when the profile ends."""
+        manager = make_manager(load_profile={
+            "enabled": True,
+            "on_finish": "stop",
+            "stages": [
+                {"name": "low", "duration": 0.8, "concurrency": 1},
+                {"name": "high", "duration": 1.2, "concurrency": 3},
+            ],
+        })
+        assert manager.start()
+        assert manager.status()["load_profile"]["stage"] == "low"
+        assert manager.active_workers == 1
+        assert wait_until(lambda: manager.active_workers == 3)
+        assert manager.status()["load_profile"]["stage"] == "high"
+        assert wait_until(lambda: not manager.is_running, timeout=5.0)
+        assert manager.status()["load_profile"]["finished"]
+
+
+class TestRateControllerRun:
+    """Tests for the adaptive rate controller driving the manager's pacing."""
+
+    def test_open_mode_rate_grows_within_slo(self, make_manager):
+        """Fast replies: arrival_rate is raised, then restored on stop."""
+        manager = make_manager(mode="open", arrival_rate=4.0, rate_controller={
+            "enabled": True, "period_seconds": 0.5, "slo_p95_seconds": 5.0, "min_samples": 1,
+            "increase_step": 1.0, "max_rate": 10.0, "saturation_ratio": 0.25,
+        })
+        assert manager.start()
+        assert wait_until(lambda: manager.arrival_rate > 4.0)
+        state = manager.status()["rate_controller"]
+        assert state["adjustments"] >= 1
+        assert state["last"]["action"] == "increase"
+        manager.stop()
+        assert manager.arrival_rate == 4.0
+
+    def test_closed_mode_backs_off_on_p95_breach(self, make_manager):
+        """p95 above the SLO lowers the rate, i.e. lengthens interval_seconds."""
+        manager = make_manager(interval_seconds=0.1, rate_controller={
+            "enabled": True, "period_seconds": 0.3, "slo_p95_seconds": 0.001, "min_samples": 1, "max_rate": 20.0,
+        })
+        assert manager.start()
+        assert wait_until(lambda: manager.interval_seconds > 0.1)
+        assert manager.status()["rate_controller"]["last"]["action"] == "decrease"
+        manager.stop()
+        assert manager.interval_seconds == 0.1
+
+    def test_configured_pacing_waits_for_the_run_to_end(self, make_manager):
+        """Pacing set through the API while the controller runs applies after stop()."""
+        manager = make_manager(mode="open", arrival_rate=4.0, rate_controller={"enabled": True, "max_rate": 10.0})
+        assert manager.start()
+        assert not manager.set_pacing(0.5, 3.0)
+        assert manager.arrival_rate == 4.0
+        manager.stop()
+        assert (manager.interval_seconds, manager.arrival_rate) == (0.5, 3.0)
+        assert manager.set_pacing(0.2, 2.0)
+        assert manager.arrival_rate == 2.0
+
+    def test_ignored_when_profile_sets_rate(self, make_manager):
+        """A load profile with rate stages keeps control of the pacing."""
+        manager = make_manager(mode="open", rate_controller={"enabled": True}, load_profile={
+            "enabled": True, "stages": [{"duration": 5, "rate": 1.0}],
+        })
+        assert manager.start()
+        assert manager.status()["rate_controller"] is None
+
+
+class TestReplay:
+    """Tests for replaying a recorded message log."""
+
+    def test_replay_sends_recorded_messages_then_stops(self, make_manager, tmp_path):
+        """The recorded messages are re-sent and the run stops at the end of the log."""
+        recorded = tmp_path / "replay.csv"
+        recorded.write_text(
+            "timestamp_utc,message\n"
+            "2025-01-01T12:00:00.000,um\n"
+            "2025-01-01T12:00:00.100,dois\n"
+            "2025-01-01T12:00:00.200,tres\n",
+            encoding="utf-8"
+        )
+        manager = make_manager(concurrency=1, mode="replay", replay={"file": str(recorded), "speed": 1.0})
+        assert manager.start()
+        assert wait_until(lambda: not manager.is_running)
+        status = manager.status()
+        assert status["messages_sent"] == 3
+        assert status["replay"]["rows_read"] == 3
+        log = tmp_path / "logs" / "messages.csv"
+        # The automatic stop flushes the log from its own thread
+        assert wait_until(lambda: log.exists() and len(log.read_text(encoding="utf-8").splitlines()) == 4)
+        rows = log.read_text(encoding="utf-8").splitlines()
+        assert [row.split(",")[1] for row in rows[1:]] == ["um", "dois", "tres"]
+
+    def test_missing_replay_file_is_rejected(self, make_manager, tmp_path):
+        """start() fails when the replay log does not exist."""
+        manager = make_manager(mode="replay", replay={"file": str(tmp_path / "nada.csv")})
+        assert not manager.start()
+
+
+class TestScenarios:
+    """Tests for multi-turn scenarios driven by the workers."""
+
+    def test_scenarios_run_end_to_end(self, make_manager, tmp_path):
+        """Each session sends a scenario's steps in order and metrics are kept per step."""
+        scenarios = tmp_path / "scenarios.yaml"
+        scenarios.write_text(
+            "defaults:\n  think_time: 0\n"
+            "scenarios:\n"
+            "  - name: conversa\n    steps: [primeira, segunda, terceira]\n",
+            encoding="utf-8"
+        )
+        manager = make_manager(scenarios_file=str(scenarios), capture_responses=True)
+        assert manager.start()
+        assert wait_until(lambda: (manager.metrics()["scenarios"] or {}).get("conversa", {}).get("completed", 0) >= 1)
+        manager.stop()
+        summary = manager.metrics()["scenarios"]["conversa"]
+        assert [step["message"] for step in summary["steps"]] == ["primeira", "segunda", "terceira"]
+        assert summary["steps"][0]["sent"] >= summary["steps"][2]["sent"] >= 1
+        assert summary["steps"][2]["latency"]["count"] >= 1
+
+        rows = (tmp_path / "logs" / "messages.csv").read_text(encoding="utf-8").splitlines()
+        assert rows[0].endswith("scenario,step")
+        assert rows[1].endswith("conversa,1")
+        assert rows[2].endswith("conversa,2")
+
+
+class TestBrowserPool:
+    """Tests for replacing crashed sessions with warm browsers."""
+
+    def test_crash_is_replaced_by_warm_browser(self, make_manager, tmp_path):
+        """After an error the worker takes a pooled browser without restart_delay."""
+        manager = make_manager(
+            restart_delay=30.0,
+            browser_pool={"enabled": True, "size": 1, "profiles_dir": str(tmp_path / "profiles")},
+        )
+        manager.start()
+        assert wait_until(lambda: manager.status()["browser_pool"]["idle"] == 1)
+        assert wait_until(lambda: manager.status()["messages_sent"] >= 1)
+
+        FakeAutomator.fail_next = True
+        assert wait_until(lambda: manager.status()["workers"][0]["driver_restarts"] == 1)
+        worker = manager.status()["workers"][0]
+        assert worker["errors_count"] == 1
+        assert worker["last_recovery_seconds"] < 1.0
+
+    def test_profiles_are_leased_per_browser(self, tmp_path):
+        """Live browsers never share a profile directory; released slots are reused."""
+        from browser_pool import ProfileStore
+
+        store = ProfileStore(str(tmp_path / "profiles"))
+        first, second = store.lease_profile(), store.lease_profile()
+        assert first != second
+        store.release_profile(first)
+        assert store.lease_profile() == first
@@ -0,0 +1,62 @@
+"""
+Tests for the Chrome launch profile (options only, no browser required).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+from selenium.webdriver.chrome.options import Options
+
+from browser_profile import BrowserProfile, FONT_PATTERNS
+
+
+class FakeDriver:
+    def __init__(self):
+        self.cdp = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+
+
+class TestBrowserProfile:
+    """Lean switches, preferences and URL blocking."""
+
+    def test_default_profile_changes_nothing(self):
+        """With lean off the options are left as the caller built them."""
+        options = Options()
+        options.add_argument("--no-sandbox")
+        profile = BrowserProfile.from_config(None)
+        profile.apply(options)
+        driver = FakeDriver()
+        profile.attach(driver)
+        assert options.arguments == ["--no-sandbox"]
+        assert options.page_load_strategy == "normal"
+        assert driver.cdp == []
+
+    def test_lean_profile(self):
+        """Eager loading, no images, small window replacing the caller's one."""
+        options = Options()
+        options.add_argument("--window-size=1920,1080")
+        profile = BrowserProfile.from_config({"lean": True, "renderer_memory_mb": 256})
+        profile.apply(options)
+        assert options.page_load_strategy == "eager"
+        assert "--disable-extensions" in options.arguments
+        assert "--disable-background-networking" in options.arguments
+        assert "--js-flags=--max-old-space-size=256" in options.arguments
+        assert [a for a in options.arguments if a.startswith("--window-size=")] == ["--window-size=800,600"]
+        prefs = options.experimental_options["prefs"]
+        assert prefs["profile.managed_default_content_settings.images"] == 2
+
+    def test_attach_blocks_fonts_only_when_asked(self):
+        """Font/media URL patterns follow the block_* switches."""
+        driver = FakeDriver()
+        BrowserProfile(lean=True, block_media=False).attach(driver)
+        assert driver.cdp[-1] == ("Network.setBlockedURLs", {"urls": list(FONT_PATTERNS)})
+
+    def test_invalid_strategy(self):
+        """Unknown page load strategies are rejected."""
+        with pytest.raises(ValueError):
+            BrowserProfile(lean=True, page_load_strategy="fast")
@@ -0,0 +1,156 @@
+"""
+Tests for ChatbotAutomator.send_message against a fake WebDriver (no browser).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+from chatbot_automator import _REPLY_POLL_JS, ChatbotAutomator
+
+
+class FakeElement:
+    def __init__(self, driver):
+        self.driver = driver
+        self.typed = []
+        self.stale = False
+
+    def send_keys(self, text):
+        self.driver.execute('sendKeysToElement')
+        if self.stale:
+            raise StaleElementReferenceException('stale element')
+        self.typed.append(text)
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def default_content(self):
+        self.driver.execute('switchToFrame')
+
+    def frame(self, reference):
+        self.driver.execute('switchToFrame')
+
+
+class FakeDriver:
+    """Every method goes through ``execute``, like the real remote driver."""
+
+    def __init__(self):
+        self.commands = []
+        self.scripts = []
+        self.lookups = 0
+        self.switch_to = FakeSwitchTo(self)
+        self.element = FakeElement(self)
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        return {'value': None}
+
+    def find_element(self, by=None, value=None):
+        self.execute('findElement')
+        self.lookups += 1
+        return self.element
+
+    def execute_script(self, script, *args):
+        self.execute('executeScript')
+        if any(isinstance(arg, FakeElement) and arg.stale for arg in args):
+            raise StaleElementReferenceException('stale element')
+        self.scripts.append(args)
+        return None
+
+
+def make_automator(selectors=None, **kwargs):
+    selectors = dict({'iframe_id': 'tool_content', 'input_tag': 'textarea'}, **(selectors or {}))
+    automator = ChatbotAutomator("http://localhost/my/", selectors=selectors, **kwargs)
+    automator.driver = FakeDriver()
+    automator._count_round_trips(automator.driver)
+    return automator
+
+
+class TestSendMessage:
+    """Handles are kept between messages and WebDriver commands are counted."""
+
+    def test_later_sends_skip_iframe_and_lookup(self):
+        """Only the first message switches frames and looks up the input."""
+        automator = make_automator()
+        first = automator.send_message("Oi")
+        second = automator.send_message("Tudo bem?")
+        assert first.ok and second.ok
+        assert first.round_trips > second.round_trips
+        assert second.round_trips == 1
+        assert automator.driver.lookups == 2  # iframe + input, first message only
+        assert automator.driver.element.typed[-1].startswith("Tudo bem?")
+
+    def test_script_submit_is_one_command(self):
+        """script_submit fills the input and presses Enter from one script."""
+        automator = make_automator(script_submit=True)
+        automator.send_message("Oi")
+        result = automator.send_message("Onde fica a biblioteca?")
+        assert result.ok
+        assert result.round_trips == 1
+        assert automator.driver.element.typed == []
+        assert automator.driver.scripts[-1][1] == "Onde fica a biblioteca?"
+
+    def test_stale_input_is_looked_up_again(self):
+        """A stale cached input triggers one fresh lookup and the send succeeds."""
+        automator = make_automator()
+        automator.send_message("Oi")
+        driver = automator.driver
+        driver.element.stale = True
+        fresh = FakeElement(driver)
+        driver.element = fresh
+        result = automator.send_message("Olá de novo")
+        assert result.ok, result.error
+        assert driver.lookups == 4  # iframe and input found again after the stale error
+        assert fresh.typed and fresh.typed[0].startswith("Olá de novo")
+
+
+class TestWaitForReply:
+    """Reply capture through the browser-side poll script (stubbed)."""
+
+    def make_polling(self, poll):
+        automator = make_automator(selectors={'bot_message_css': '.bot'},
+                                   response_timeout=0.3, response_settle_seconds=1.0)
+        driver = automator.driver
+        execute_script = driver.execute_script
+        driver.execute_script = lambda script, *args: (poll() if script == _REPLY_POLL_JS
+                                                       else execute_script(script, *args))
+        return automator
+
+    def test_settled_reply_is_measured(self):
+        """Text unchanged for response_settle_seconds: reply times from the page clock."""
+        automator = self.make_polling(lambda: {'sent': 0, 'first': 800, 'last': 1500, 'now': 3000,
+                                               'text': 'Olá!'})
+        result = automator.send_message("Oi")
+        assert result.ok, result.error
+        assert result.response == 'Olá!'
+        assert result.first_token_seconds == 0.8
+        assert result.complete_seconds == 1.5
+
+    def test_missing_reply_is_a_timeout(self):
+        """No bot message before response_timeout fails the send."""
+        automator = self.make_polling(lambda: {'sent': 0, 'first': None, 'last': None, 'now': 100,
+                                               'text': None})
+        result = automator.send_message("Oi")
+        assert not result.ok
+        assert result.error == "reply timeout"
+        assert result.complete_seconds is None
+
+    def test_unsettled_reply_is_a_timeout(self):
+        """Text still changing at the deadline is not reported as a complete reply."""
+        clock = {'now': 1000}
+
+        def poll():
+            clock['now'] += 100
+            return {'sent': 0, 'first': 500, 'last': clock['now'], 'now': clock['now'], 'text': 'Olá, eu'}
+
+        result = self.make_polling(poll).send_message("Oi")
+        assert not result.ok
+        assert result.error == "reply timeout"
+        assert result.response == 'Olá, eu'
+        assert result.first_token_seconds == 0.5
+        assert result.complete_seconds is None
@@ -0,0 +1,261 @@
+"""
+Tests for the multi-node coordinator, using local agent servers.
+"""
+
+import pytest
+import socket
+import subprocess
+import sys
+import os
+import threading
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import requests
+import yaml
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+import bot_manager
+from bot_manager import BotManager
+from coordinator import Coordinator, split_integer
+from chatbot_automator import SendResult
+from latency_histogram import LatencyHistogram
+from mock_darcy import MockBehavior, MockServer
+
+WEB_APP = os.path.join(os.path.dirname(__file__), '..', 'src', 'web_app.py')
+
+
+class FakeAutomator:
+    """Stand-in for ChatbotAutomator that answers instantly."""
+
+    def __init__(self, url, **kwargs):
+        self.profile_dir = None
+
+    def start(self):
+        return True
+
+    def is_alive(self):
+        return True
+
+    def send_message(self, message):
+        return SendResult(message=message, response="ok", send_seconds=0.001, complete_seconds=0.02)
+
+    def close(self):
+        pass
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def serve_agent(manager):
+    """Minimal agent control API backed by a real BotManager; returns (server, url)."""
+    app = Flask(f"agent-{id(manager)}")
+
+    @app.post('/api/config')
+    def config():
+        data = request.json or {}
+        manager.concurrency = data.get('concurrency', manager.concurrency)
+        manager.mode = data.get('mode', manager.mode)
+        manager.arrival_rate = data.get('arrival_rate', manager.arrival_rate)
+        return jsonify({"ok": True})
+
+    @app.post('/api/start')
+    def start():
+        return jsonify({"ok": manager.start()})
+
+    @app.post('/api/stop')
+    def stop():
+        manager.stop()
+        return jsonify({"ok": True})
+
+    @app.get('/api/status')
+    def status():
+        return jsonify(manager.status())
+
+    @app.get('/api/metrics')
+    def metrics():
+        return jsonify(manager.metrics())
+
+    @app.get('/api/histograms')
+    def histograms():
+        return jsonify(manager.export_histograms())
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_node(directory, config):
+    """Run web_app.py as its own process with ``config`` as its config.yaml; returns (process, url)."""
+    directory.mkdir()
+    config_path = directory / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    process = subprocess.Popen([sys.executable, os.path.abspath(WEB_APP)], cwd=str(directory),
+                               env=dict(os.environ, DARCY_CONFIG=str(config_path)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process, f"http://127.0.0.1:{config['port']}"
+
+
+def get_json(url):
+    try:
+        return requests.get(url, timeout=2).json()
+    except requests.RequestException:
+        return None
+
+
+@pytest.fixture
+def cluster(tmp_path):
+    """A coordinator and two agents (capacity 2 and 1), each a separate web_app process."""
+    behavior = MockBehavior(latency="fixed", latency_mean=0.01, stream_chunks=1, reply_words=5)
+    questions = tmp_path / "questions.txt"
+    questions.write_text("Pergunta A\nPergunta B\n", encoding="utf-8")
+    processes = []
+    with MockServer(behavior) as mock:
+        coordinator_port = free_port()
+        process, coordinator_url = spawn_node(tmp_path / "coordinator", {
+            "port": coordinator_port, "cluster": {"role": "coordinator", "request_timeout": 5.0}})
+        processes.append(process)
+        agent_dirs = []
+        for i, capacity in enumerate((2, 1)):
+            port = free_port()
+            process, _ = spawn_node(tmp_path / f"agent{i}", {
+                "port": port, "url": mock.base_url + "/my/", "questions_file": str(questions),
+                "backend": "http", "http_backend": {"endpoint": mock.base_url + "/api/chat"},
+                "interval_seconds": 0.0, "jitter": 0.0, "wait_for_manual_login": False,
+                "capture_responses": False, "headless": True,
+                "cluster": {"role": "agent", "coordinator_url": coordinator_url,
+                            "agent_url": f"http://127.0.0.1:{port}", "capacity": capacity,
+                            "heartbeat_seconds": 0.5},
+            })
+            processes.append(process)
+            agent_dirs.append(tmp_path / f"agent{i}")
+        try:
+            yield coordinator_url, agent_dirs
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+
+
+@pytest.fixture
+def agents(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_manager, "ChatbotAutomator", FakeAutomator)
+    questions = tmp_path / "questions.txt"
+    questions.write_text("Pergunta A\n", encoding="utf-8")
+    started = []
+    for i in range(2):
+        manager = BotManager(url="http://localhost/", questions_file=str(questions),
+                             interval_seconds=0.0, jitter=0.0, wait_for_manual_login=False,
+                             capture_responses=False, log_dir=str(tmp_path / f"logs{i}"))
+        server, url = serve_agent(manager)
+        started.append((manager, server, url))
+    yield started
+    for manager, server, _ in started:
+        manager.stop()
+        server.shutdown()
+
+
+class TestCoordinator:
+    """Tests for Coordinator."""
+
+    def test_split_integer(self):
+        """Shares follow the weights and always add up to the total."""
+        assert split_integer(5, [1, 1]) in ([3, 2], [2, 3])
+        assert split_integer(10, [3, 1]) in ([8, 2], [7, 3])
+        assert sum(split_integer(7, [0.2, 0.5, 0.3])) == 7
+        assert split_integer(1, [1, 1, 1]).count(1) == 1
+
+    def test_histograms_roundtrip_and_merge(self):
+        """Serialized histograms merge to the same percentiles as one histogram."""
+        a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 200):
+            (a if i % 2 else b).record(i / 100)
+            both.record(i / 100)
+        merged = LatencyHistogram.from_dict(a.to_dict())
+        merged.merge(LatencyHistogram.from_dict(b.to_dict()))
+        assert merged.summary() == both.summary()
+
+    def test_rate_split_over_agents_that_start(self):
+        """With fewer sessions than agents the started agents carry the whole rate."""
+        coordinator = Coordinator(agents=[{"url": f"http://127.0.0.1:{9000 + i}"} for i in range(3)])
+        plan = coordinator.plan({"concurrency": 2, "arrival_rate": 3.0, "mode": "open"})
+        started = [share for share in plan.values() if share["concurrency"] > 0]
+        assert len(started) == 2
+        assert sum(share["arrival_rate"] for share in started) == pytest.approx(3.0)
+        assert all(share["arrival_rate"] == 0.0 for share in plan.values() if share["concurrency"] == 0)
+
+    def test_start_distributes_and_merges_metrics(self, agents):
+        """Agents get their share, run together and report one merged view."""
+        coordinator = Coordinator(agents=[{"url": agents[0][2], "capacity": 2}])
+        coordinator.register(agents[1][2], capacity=1)
+        results = coordinator.start({"concurrency": 3, "mode": "closed"})
+        assert all(r.get("ok") for r in results.values())
+        assert [m.concurrency for m, _, _ in agents] == [2, 1]
+        assert wait_until(lambda: all(m.metrics()["messages_sent"] >= 2 for m, _, _ in agents))
+
+        merged = coordinator.metrics()
+        assert merged["agents_reporting"] == 2
+        assert merged["running"]
+        assert merged["concurrency"] == 3
+        assert merged["messages_sent"] >= 4
+        assert merged["latency"]["response"]["count"] >= 4
+        assert "1m" in merged["latency"]["response"]["windows"]
+
+        coordinator.stop()
+        assert not any(m.is_running for m, _, _ in agents)
+
+    def test_unreachable_agent_is_reported(self, agents):
+        """A dead agent does not break the merged view."""
+        coordinator = Coordinator(agents=[{"url": agents[0][2]}, {"url": "http://127.0.0.1:9"}], timeout=0.5)
+        merged = coordinator.metrics()
+        assert merged["agents_total"] == 2
+        assert merged["agents_reporting"] == 1
+        assert [a["ok"] for a in merged["agents"]] == [True, False]
+
+
+class TestClusterEndToEnd:
+    """Coordinator and agents as separate web_app processes on one machine."""
+
+    def test_agents_register_share_load_and_merge(self, cluster):
+        """Agents self-register, get capacity-weighted shares and report merged histograms."""
+        url, agent_dirs = cluster
+        assert wait_until(lambda: len((get_json(url + "/api/cluster/agents") or {}).get("agents", [])) == 2,
+                          timeout=30)
+        resp = requests.post(url + "/api/cluster/start", json={"concurrency": 3, "mode": "closed"}, timeout=10)
+        assert all(r.get("ok") for r in resp.json()["results"].values())
+        agents = get_json(url + "/api/cluster/agents")["agents"]
+        assert sorted((a["capacity"], a["status"]["concurrency"]) for a in agents) == [(1, 1), (2, 2)]
+        # /api/config on each agent also persisted its share
+        saved = [yaml.safe_load((d / "config.yaml").read_text(encoding="utf-8")) for d in agent_dirs]
+        assert [c["concurrency"] for c in saved] == [2, 1]
+
+        assert wait_until(lambda: (get_json(url + "/api/cluster/metrics") or {}).get("messages_sent", 0) >= 6,
+                          timeout=20)
+        merged = get_json(url + "/api/cluster/metrics")
+        assert merged["agents_reporting"] == 2
+        assert merged["running"]
+        assert all(a["histograms_ok"] and a["messages_sent"] > 0 for a in merged["agents"])
+        assert merged["latency"]["response"]["count"] >= 6
+
+        requests.post(url + "/api/cluster/stop", timeout=10)
+        assert not get_json(url + "/api/cluster/metrics")["running"]
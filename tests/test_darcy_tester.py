@@ -0,0 +1,172 @@
+"""
+Unit tests for DarcyChatbotTester element lookup (fake driver, no browser required).
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import darcy_tester
+from darcy_tester import DarcyChatbotTester
+
+
+class FakeElement:
+    def __init__(self, text="", fail_once=False):
+        self.text = text
+        self.typed = []
+        self.clicks = 0
+        self.fail_once = fail_once
+
+    def clear(self):
+        pass
+
+    def send_keys(self, value):
+        if self.fail_once:
+            self.fail_once = False
+            raise RuntimeError("stale element reference")
+        self.typed.append(value)
+
+    def click(self):
+        self.clicks += 1
+
+
+class FakeDriver:
+    """Answers the selector probe from a selector -> elements map."""
+
+    def __init__(self, dom):
+        self.dom = dom
+        self.probes = []
+        self.watched = []
+        self.reply = None  # what the in-page reply wait resolves with
+
+    def execute_script(self, script, candidates, *args):
+        if script is darcy_tester._REPLY_WATCH_JS:
+            self.watched.append(list(candidates))
+            return None
+        last, need_text = args
+        self.probes.append(list(candidates))
+        for i, css in enumerate(candidates):
+            found = self.dom.get(css) or []
+            if not found:
+                continue
+            element = found[-1] if last else found[0]
+            if need_text and not element.text:
+                continue
+            return [i, element, element.text]
+        return None
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, timeout_ms, settle_ms):
+        return self.reply
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def make_tester(monkeypatch):
+    monkeypatch.setattr(DarcyChatbotTester, "setup_driver", lambda self, headless=False: None)
+    sleeps = []
+    monkeypatch.setattr(darcy_tester.time, "sleep", sleeps.append)
+
+    def factory(dom):
+        tester = DarcyChatbotTester(headless=True)
+        tester.driver = FakeDriver(dom)
+        tester.sleeps = sleeps
+        return tester
+
+    return factory
+
+
+class TestSelectorCache:
+    """Tests for probing and learning chat selectors."""
+
+    def test_winner_is_learned_and_reused(self, make_tester):
+        """The first message probes all candidates at once; later ones query only the learned selectors."""
+        textarea, button = FakeElement(), FakeElement()
+        tester = make_tester({"textarea": [textarea], "button[type='submit']": [button]})
+
+        assert tester.send_message_to_chatbot("primeira")
+        assert tester.driver.probes == [DarcyChatbotTester.INPUT_SELECTORS, DarcyChatbotTester.SEND_SELECTORS]
+        assert tester.learned_selectors == {"input": "textarea", "send": "button[type='submit']"}
+
+        tester.driver.probes.clear()
+        assert tester.send_message_to_chatbot("segunda")
+        assert tester.driver.probes == [["textarea"], ["button[type='submit']"]]
+        assert textarea.typed == ["primeira", "segunda"]
+        assert button.clicks == 2
+
+    def test_reprobe_when_learned_selector_stops_matching(self, make_tester):
+        """A learned selector that no longer matches is dropped and the candidates probed again."""
+        dom = {"textarea": [FakeElement()]}
+        tester = make_tester(dom)
+        assert tester.send_message_to_chatbot("oi")
+        dom["#chat-input"] = dom.pop("textarea")
+
+        assert tester.send_message_to_chatbot("oi de novo")
+        assert tester.learned_selectors["input"] == "#chat-input"
+
+    def test_failed_interaction_forgets_selectors(self, make_tester):
+        """An error using a learned element triggers one retry with fresh probing."""
+        element = FakeElement()
+        tester = make_tester({"textarea": [element]})
+        assert tester.send_message_to_chatbot("oi")
+        element.fail_once = True
+        tester.driver.probes.clear()
+
+        assert tester.send_message_to_chatbot("de novo")
+        assert DarcyChatbotTester.INPUT_SELECTORS in tester.driver.probes
+        assert "de novo" in element.typed
+
+    def test_response_is_the_latest_bot_message(self, make_tester):
+        """Without a pending reply, the last element with text of the first matching selector is read."""
+        tester = make_tester({".bot-message": [FakeElement("antiga"), FakeElement("nova")]})
+        assert tester.get_chatbot_response() == "nova"
+        assert tester.learned_selectors["response"] == ".bot-message"
+        assert make_tester({}).get_chatbot_response() is None
+
+
+class TestResponseWait:
+    """Tests for waiting on the page state instead of fixed sleeps."""
+
+    def test_reply_to_sent_message_is_awaited_in_page(self, make_tester):
+        """The reply is watched from the send on and returned as soon as the page reports it settled."""
+        tester = make_tester({"textarea": [FakeElement()]})
+        assert tester.send_message_to_chatbot("oi")
+        assert tester.driver.watched == [DarcyChatbotTester.RESPONSE_SELECTORS]
+
+        tester.driver.reply = {"text": "olá!", "index": 1, "settled": True, "first": 120.0, "last": 480.0}
+        assert tester.get_chatbot_response() == "olá!"
+        assert tester.learned_selectors["response"] == ".bot-message"
+        assert tester.last_response_timing == {"first_ms": 120.0, "complete_ms": 480.0}
+        assert tester.sleeps == []
+
+        # The learned selector is watched for the next message
+        assert tester.send_message_to_chatbot("tudo bem?")
+        assert tester.driver.watched[-1] == [".bot-message"]
+
+    def test_missing_reply_times_out_and_forgets_selector(self, make_tester):
+        """No new message within the timeout gives None and re-watches all candidates next time."""
+        tester = make_tester({"textarea": [FakeElement()]})
+        tester.learned_selectors["response"] = ".bot-message"
+        assert tester.send_message_to_chatbot("oi")
+        tester.driver.reply = {"text": None, "index": None, "settled": False, "first": None, "last": None}
+
+        assert tester.get_chatbot_response(timeout=1) is None
+        assert "response" not in tester.learned_selectors
+
+    def test_conversation_has_no_fixed_delays(self, make_tester):
+        """Turns follow each other as fast as the replies come."""
+        tester = make_tester({"textarea": [FakeElement()]})
+        tester.navigate_to_chatbot = lambda: True
+        tester.driver.reply = {"text": "resposta", "index": 0, "settled": True, "first": 10.0, "last": 20.0}
+
+        results = tester.test_chatbot_conversation(["um", "dois", "três"])
+        assert results["success"]
+        assert [turn["response"] for turn in results["conversation"]] == ["resposta"] * 3
+        assert tester.sleeps == []
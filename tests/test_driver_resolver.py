@@ -0,0 +1,73 @@
+"""
+Tests for the per-process chromedriver resolution (no network, no browser).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+import driver_resolver
+from driver_resolver import ChromeDriverResolver
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    driver_resolver.reset_cache()
+    monkeypatch.setattr(driver_resolver, "chrome_version", lambda: "126.0.6478.126")
+    monkeypatch.setattr(ChromeDriverResolver, "_download",
+                        staticmethod(lambda target: pytest.fail("unexpected download")))
+    yield
+    driver_resolver.reset_cache()
+
+
+def fake_driver(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("#!/bin/sh\n")
+    return path
+
+
+class TestChromeDriverResolver:
+    """Resolution order, on-disk cache and memoization."""
+
+    def test_configured_path(self, tmp_path):
+        """An explicit path wins and is checked to exist."""
+        binary = fake_driver(tmp_path / "bin" / "chromedriver")
+        resolution = ChromeDriverResolver(path=str(binary), cache_dir=None).resolve()
+        assert resolution.path == str(binary)
+        assert resolution.source == "configured"
+        with pytest.raises(FileNotFoundError):
+            ChromeDriverResolver(path=str(tmp_path / "missing"), cache_dir=None).resolve()
+
+    def test_cache_keyed_by_chrome_major(self, tmp_path):
+        """A driver cached for the installed Chrome major version is used offline."""
+        binary = fake_driver(tmp_path / "drivers" / "126" / driver_resolver._DRIVER_NAME)
+        resolution = ChromeDriverResolver(cache_dir=str(tmp_path / "drivers"), offline=True).resolve()
+        assert resolution.path == str(binary)
+        assert resolution.source == "cache"
+        assert resolution.chrome_version.startswith("126.")
+
+    def test_resolved_once_per_process(self, tmp_path, monkeypatch):
+        """Later resolvers with the same settings reuse the first result."""
+        calls = []
+        monkeypatch.setattr(ChromeDriverResolver, "_download",
+                            staticmethod(lambda target: calls.append(target) or str(fake_driver(target))))
+        cache_dir = str(tmp_path / "drivers")
+        first = ChromeDriverResolver(cache_dir=cache_dir).resolve()
+        second = ChromeDriverResolver(cache_dir=cache_dir).resolve()
+        assert first is second
+        assert first.source == "download"
+        assert len(calls) == 1
+        assert ChromeDriverResolver(cache_dir=cache_dir).resolution is first
+
+    def test_offline_falls_back_to_path(self, tmp_path, monkeypatch):
+        """Offline with an empty cache: chromedriver on PATH, else Selenium's lookup."""
+        monkeypatch.setattr(driver_resolver.shutil, "which", lambda name: "/usr/bin/chromedriver")
+        resolution = ChromeDriverResolver(cache_dir=str(tmp_path / "drivers"), offline=True).resolve()
+        assert (resolution.path, resolution.source) == ("/usr/bin/chromedriver", "path")
+        driver_resolver.reset_cache()
+        monkeypatch.setattr(driver_resolver.shutil, "which", lambda name: None)
+        resolution = ChromeDriverResolver(cache_dir=str(tmp_path / "drivers"), offline=True).resolve()
+        assert (resolution.path, resolution.source) == (None, "selenium")
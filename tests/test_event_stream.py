@@ -0,0 +1,94 @@
+"""
+Tests for the Server-Sent Events broadcaster.
+"""
+
+import json
+import pytest
+import sys
+import os
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from event_stream import EventBroadcaster
+
+
+def parse(frame):
+    lines = frame.strip().split("\n")
+    return lines[0].split(": ", 1)[1], json.loads(lines[1].split(": ", 1)[1])
+
+
+@pytest.fixture
+def state():
+    return {"status": {"running": False, "messages_sent": 0}, "metrics": {"errors_count": 0}}
+
+
+@pytest.fixture
+def broadcaster(state):
+    b = EventBroadcaster(lambda: {k: dict(v) for k, v in state.items()},
+                         interval=0.05, refresh_interval=60)
+    b.start()
+    return b
+
+
+class TestEventBroadcaster:
+    """Tests for EventBroadcaster."""
+
+    def test_snapshot_then_deltas(self, broadcaster, state):
+        """A new client gets the full state, then only the keys that changed."""
+        stream = broadcaster.stream()
+        assert next(stream).startswith("retry:")
+        event, data = parse(next(stream))
+        assert event == "snapshot"
+        assert data["status"]["running"] is False
+
+        state["status"]["messages_sent"] = 1
+        broadcaster.notify("sent")
+        event, data = parse(next(stream))
+        assert event == "delta"
+        assert data == {"status": {"messages_sent": 1}}
+        stream.close()
+        assert broadcaster.subscriber_count == 0
+
+    def test_bursts_are_coalesced(self, broadcaster, state):
+        """Many notifications inside one tick produce a single delta frame."""
+        stream = broadcaster.stream()
+        next(stream), next(stream)
+        for i in range(1, 101):
+            state["status"]["messages_sent"] = i
+            broadcaster.notify("sent")
+        time.sleep(0.2)
+
+        sub = next(iter(broadcaster._subscribers))
+        frames = [parse(next(stream))]
+        while not sub.queue.empty():
+            frames.append(parse(next(stream)))
+        assert len(frames) <= 2
+        assert frames[-1][1]["status"]["messages_sent"] == 100
+
+    def test_errors_are_pushed(self, broadcaster, state):
+        """Errors are delivered in an errors frame."""
+        stream = broadcaster.stream()
+        next(stream), next(stream)
+        state["metrics"]["errors_count"] = 1
+        broadcaster.notify("error", "iframe sumiu")
+
+        frames = dict(parse(next(stream)) for _ in range(2))
+        assert frames["errors"]["errors"][0]["error"] == "iframe sumiu"
+        assert frames["delta"] == {"metrics": {"errors_count": 1}}
+
+    def test_slow_client_is_resynced(self, state):
+        """A client whose queue overflows gets a fresh snapshot instead of blocking."""
+        broadcaster = EventBroadcaster(lambda: {k: dict(v) for k, v in state.items()})
+        sub = broadcaster.subscribe()
+        broadcaster._tick()
+        i = 0
+        while not sub.needs_resync:
+            i += 1
+            state["status"]["messages_sent"] = i
+            broadcaster._tick()
+            assert i <= sub.queue.maxsize + 1
+        assert sub.queue.empty()
+        broadcaster._tick()
+        assert parse(sub.queue.get_nowait())[0] == "snapshot"
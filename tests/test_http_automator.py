@@ -0,0 +1,89 @@
+"""
+Tests for the browserless HTTP backend against a throwaway local server.
+"""
+
+import json
+import pytest
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from http_automator import HttpChatbotClient
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Replies with the received message and cookie header."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body.get("message") == "boom":
+            self.send_response(500)
+            self.end_headers()
+            return
+        payload = json.dumps({
+            "data": {"answer": f"eco: {body['message']}"},
+            "cookie": self.headers.get("Cookie"),
+            "conversation": body.get("conversation_id"),
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/chat"
+    httpd.shutdown()
+
+
+class TestHttpChatbotClient:
+    """Tests for HttpChatbotClient."""
+
+    def test_send_message_extracts_reply(self, server):
+        """The reply is read from the configured dotted response path."""
+        client = HttpChatbotClient(server, endpoint=server, response_field="data.answer")
+        assert client.start()
+        result = client.send_message("Olá")
+        assert result.ok
+        assert result.response == "eco: Olá"
+        assert 0 <= result.first_token_seconds <= result.complete_seconds
+        client.close()
+
+    def test_cookies_and_conversation_id_are_sent(self, server, tmp_path):
+        """Saved browser cookies and the per-session conversation id reach the server."""
+        cookies = tmp_path / "cookies.json"
+        cookies.write_text(json.dumps([
+            {"name": "MoodleSession", "value": "abc123", "domain": "127.0.0.1", "path": "/"}
+        ]))
+        client = HttpChatbotClient(
+            server, endpoint=server, cookies_file=str(cookies),
+            conversation_field="conversation_id", response_field="",
+        )
+        client.start()
+        reply = json.loads(client.send_message("Oi").response)
+        assert reply["cookie"] == "MoodleSession=abc123"
+        assert reply["conversation"] == client.conversation_id
+
+    def test_http_errors_are_reported(self, server):
+        """Server errors come back as a failed result the manager counts."""
+        client = HttpChatbotClient(server, endpoint=server)
+        client.start()
+        result = client.send_message("boom")
+        assert not result.ok
+        assert "500" in result.error
+
+    def test_start_requires_endpoint(self):
+        """Without an endpoint the backend refuses to start."""
+        assert not HttpChatbotClient("http://x/", endpoint="").start()
@@ -0,0 +1,81 @@
+"""
+Tests for the constant-memory latency histograms.
+"""
+
+import pytest
+import sys
+import os
+import random
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from latency_histogram import LatencyHistogram, LatencyStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyHistogram:
+    """Tests for LatencyHistogram."""
+
+    def test_percentiles_within_precision(self):
+        """Reported percentiles stay within the bucket precision of the exact value."""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(0, 1) for _ in range(20000)]
+        hist = LatencyHistogram()
+        for v in values:
+            hist.record(v)
+
+        ordered = sorted(values)
+        for p in (50, 90, 99):
+            exact = ordered[int(len(ordered) * p / 100) - 1]
+            assert hist.percentile(p) == pytest.approx(exact, rel=0.03)
+        assert hist.max == max(values)
+        assert hist.count == len(values)
+
+    def test_memory_is_bounded(self):
+        """Bucket count is fixed by the range, not by the number of samples."""
+        hist = LatencyHistogram()
+        for i in range(100000):
+            hist.record((i % 5000) / 100.0)
+        assert len(hist.counts) <= hist.bucket_count
+
+    def test_merge_combines_counts(self):
+        """Merging two histograms equals recording everything in one."""
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(0.1)
+        b.record(2.0)
+        a.merge(b)
+        assert a.count == 2
+        assert a.min == 0.1 and a.max == 2.0
+
+    def test_empty_summary(self):
+        """An empty histogram reports no percentiles."""
+        assert LatencyHistogram().summary()["p99"] is None
+
+
+class TestLatencyStats:
+    """Tests for sliding-window summaries."""
+
+    def test_windows_forget_old_samples(self):
+        """Samples older than a window drop out of it but stay in the run total."""
+        clock = FakeClock()
+        stats = LatencyStats(clock=clock)
+        stats.record(10.0)
+        clock.now = 120.0
+        stats.record(1.0)
+
+        summary = stats.summary()
+        assert summary["count"] == 2
+        assert summary["windows"]["1m"]["count"] == 1
+        assert summary["windows"]["1m"]["max"] == 1.0
+        assert summary["windows"]["5m"]["count"] == 2
+
+        clock.now = 2000.0
+        assert stats.summary()["windows"]["15m"]["count"] == 0
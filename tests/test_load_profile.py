@@ -0,0 +1,53 @@
+"""
+Tests for staged load profiles.
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from load_profile import LoadProfile
+
+
+PROFILE = {
+    "stages": [
+        {"name": "ramp-up", "duration": 10, "rate": 4.0, "concurrency": 5, "ramp": True},
+        {"name": "plateau", "duration": 20},
+        {"name": "spike", "duration": 5, "rate": 10.0},
+    ]
+}
+
+
+class TestLoadProfile:
+    """Tests for LoadProfile.at."""
+
+    def test_ramp_interpolates_from_previous_stage(self):
+        """A ramp starts from 0 msg/s and 1 session and reaches its targets."""
+        profile = LoadProfile.from_dict(PROFILE)
+        state = profile.at(5.0)
+        assert state["stage"] == "ramp-up"
+        assert state["target_rate"] == pytest.approx(2.0)
+        assert state["target_concurrency"] == 3
+        assert state["stage_remaining"] == pytest.approx(5.0)
+
+    def test_steps_carry_targets_forward(self):
+        """Omitted targets keep the previous values; non-ramp stages jump."""
+        profile = LoadProfile.from_dict(PROFILE)
+        plateau = profile.at(15.0)
+        assert (plateau["stage"], plateau["target_rate"], plateau["target_concurrency"]) == ("plateau", 4.0, 5)
+        spike = profile.at(30.0)
+        assert (spike["stage"], spike["target_rate"], spike["target_concurrency"]) == ("spike", 10.0, 5)
+        assert not spike["finished"]
+        assert profile.at(35.0)["finished"]
+        assert profile.total_duration == 35.0
+        assert profile.max_concurrency == 5
+
+    def test_invalid_profiles(self):
+        """Empty profiles and non-positive durations are rejected."""
+        with pytest.raises(ValueError):
+            LoadProfile.from_dict({"stages": []})
+        with pytest.raises(ValueError):
+            LoadProfile.from_dict({"stages": [{"duration": 0, "rate": 1}]})
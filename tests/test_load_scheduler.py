@@ -0,0 +1,100 @@
+"""
+Tests for the open-model arrival scheduler.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from load_scheduler import OpenLoadScheduler
+
+
+def run_for(scheduler, seconds):
+    stop = threading.Event()
+    thread = threading.Thread(target=scheduler.run, args=(stop,), daemon=True)
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    return scheduler.stats()
+
+
+class TestOpenLoadScheduler:
+    """Tests for OpenLoadScheduler."""
+
+    def test_constant_rate_is_independent_of_sessions(self):
+        """Fast sessions keep up with the target rate without late or missed slots."""
+        sent = []
+        scheduler = OpenLoadScheduler(["s1", "s2"], lambda s, at: sent.append(s), rate=50)
+        stats = run_for(scheduler, 0.5)
+
+        assert 20 <= stats["slots_scheduled"] <= 30
+        assert stats["slots_missed"] == 0
+        assert len(sent) == stats["completed"]
+
+    def test_slow_session_yields_late_and_missed_slots(self):
+        """Arrivals keep coming when the target is slow; the excess is reported."""
+        latencies = []
+
+        def slow_send(session, scheduled_at):
+            time.sleep(0.2)
+            latencies.append(time.monotonic() - scheduled_at)
+
+        scheduler = OpenLoadScheduler(["only"], slow_send, rate=40, max_backlog=3)
+        stats = run_for(scheduler, 0.6)
+
+        assert stats["slots_scheduled"] > stats["slots_dispatched"]
+        assert stats["slots_missed"] > 0
+        assert stats["slots_late"] > 0
+        # Latency counts time spent waiting for the busy session
+        assert max(latencies) > 0.3
+
+    def test_poisson_intervals_have_expected_mean(self):
+        """Poisson arrivals are exponential with mean 1/rate."""
+        scheduler = OpenLoadScheduler([], lambda s, at: None, rate=10, process="poisson", seed=1)
+        intervals = [scheduler.next_interval() for _ in range(5000)]
+        assert sum(intervals) / len(intervals) == pytest.approx(0.1, rel=0.1)
+        assert len(set(intervals)) > 1
+
+    def test_unknown_process_is_rejected(self):
+        """Only the supported arrival processes are accepted."""
+        with pytest.raises(ValueError):
+            OpenLoadScheduler([], lambda s, at: None, rate=1, process="burst")
+
+    def test_rate_change_applies_to_pending_slot(self):
+        """Raising the rate from 0 (paused) starts arrivals without waiting out the old interval."""
+        sent = []
+        scheduler = OpenLoadScheduler(["s1"], lambda s, at: sent.append(s), rate=0)
+        stop = threading.Event()
+        thread = threading.Thread(target=scheduler.run, args=(stop,), daemon=True)
+        thread.start()
+        time.sleep(0.3)
+        assert scheduler.stats()["slots_scheduled"] == 0
+        scheduler.rate = 50
+        time.sleep(0.4)
+        stop.set()
+        thread.join(timeout=5)
+        assert 12 <= len(sent) <= 25
+
+    def test_rate_increase_mid_run_has_no_late_slots(self):
+        """Raising the rate while running re-spaces the pending slot instead of firing it late."""
+        scheduler = OpenLoadScheduler(["s1", "s2"], lambda s, at: None, rate=2)
+        stop = threading.Event()
+        thread = threading.Thread(target=scheduler.run, args=(stop,), daemon=True)
+        thread.start()
+        time.sleep(0.7)
+        scheduler.rate = 5
+        time.sleep(0.3)
+        scheduler.rate = 20
+        time.sleep(0.6)
+        stop.set()
+        thread.join(timeout=5)
+        stats = scheduler.stats()
+        assert stats["slots_scheduled"] >= 10
+        assert stats["slots_late"] == 0
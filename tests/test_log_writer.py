@@ -0,0 +1,171 @@
+"""
+Tests for the background message log writers.
+"""
+
+import csv
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from log_writer import BackgroundWriter, BufferedCsvWriter
+from run_log import RunLogWriter, iter_records, segment_files
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+class TestBufferedCsvWriter:
+    """Tests for BufferedCsvWriter."""
+
+    def test_close_flushes_everything(self, tmp_path):
+        """All queued rows reach the file, after a single header, once closed."""
+        path = tmp_path / "messages.csv"
+        writer = BufferedCsvWriter(path, ["a", "b"], batch_size=1000, flush_interval=60)
+        writer.start()
+        for i in range(50):
+            assert writer.write([i, "x"])
+        writer.close()
+
+        rows = read_rows(path)
+        assert rows[0] == ["a", "b"]
+        assert len(rows) == 51
+        assert writer.stats()["rows_written"] == 50
+
+    def test_flushes_on_time_threshold(self, tmp_path):
+        """A partial batch is written once flush_interval elapses."""
+        path = tmp_path / "messages.csv"
+        writer = BufferedCsvWriter(path, ["a"], batch_size=1000, flush_interval=0.05)
+        writer.start()
+        writer.write(["row"])
+        time.sleep(0.3)
+        assert read_rows(path)[-1] == ["row"]
+        writer.close()
+
+    def test_concurrent_writers_do_not_interleave(self, tmp_path):
+        """Rows from many threads are serialized into whole CSV lines."""
+        path = tmp_path / "messages.csv"
+        writer = BufferedCsvWriter(path, ["worker", "text"], batch_size=64)
+        writer.start()
+
+        def produce(n):
+            for i in range(200):
+                writer.write([n, "linha\ncom quebra, vírgula " * 3])
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.close()
+
+        rows = read_rows(path)[1:]
+        assert len(rows) == 1600
+        assert all(len(r) == 2 for r in rows)
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        """write() never blocks the sender; overflow is counted."""
+        writer = BufferedCsvWriter(tmp_path / "m.csv", ["a"], max_queue=2)
+        assert writer.write(["1"]) and writer.write(["2"])
+        assert not writer.write(["3"])
+        assert writer.stats()["rows_dropped"] == 1
+
+    def test_existing_file_keeps_single_header(self, tmp_path):
+        """Appending to an existing log does not repeat the header."""
+        path = tmp_path / "messages.csv"
+        for value in ("first", "second"):
+            writer = BufferedCsvWriter(path, ["a"])
+            writer.start()
+            writer.write([value])
+            writer.close()
+        assert read_rows(path) == [["a"], ["first"], ["second"]]
+
+    def test_old_layout_is_moved_aside(self, tmp_path):
+        """A log with a different header is renamed instead of mixed with new rows."""
+        path = tmp_path / "messages.csv"
+        path.write_text("timestamp_utc,message,response\nx,y,z\n", encoding="utf-8")
+        writer = BufferedCsvWriter(path, ["a", "b"])
+        writer.start()
+        writer.write([1, 2])
+        writer.close()
+
+        assert read_rows(path) == [["a", "b"], ["1", "2"]]
+        legacy = [p for p in tmp_path.iterdir() if p.name.startswith("messages-")]
+        assert len(legacy) == 1
+
+
+def make_record(i):
+    return {
+        "timestamp": 1700000000.0 + i, "worker_id": i % 3, "ok": i % 5 != 0,
+        "latency_seconds": 0.5 if i % 2 else None, "first_token_seconds": 0.25,
+        "complete_seconds": 0.5, "send_seconds": None,
+        "message": f"Pergunta {i}", "response": "Resposta " * 10,
+        "error": None if i % 5 else "timeout",
+    }
+
+
+class TestBackgroundWriter:
+    """The writer base class checks its hooks up front."""
+
+    def test_missing_hook_fails_at_construction(self):
+        """A subclass without _write_batch cannot be instantiated."""
+        class Incomplete(BackgroundWriter):
+            def _open(self):
+                pass
+
+            def _close(self):
+                pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestRunLogWriter:
+    """Tests for the binary run log."""
+
+    def test_round_trip(self, tmp_path):
+        """Records read back equal what was written (floats at float32 precision)."""
+        writer = RunLogWriter(tmp_path, run_id="run1")
+        writer.start()
+        for i in range(100):
+            writer.write(make_record(i))
+        writer.close()
+
+        records = list(iter_records(tmp_path / "run1"))
+        assert len(records) == 100
+        assert records[3]["message"] == "Pergunta 3"
+        assert records[5]["error"] == "timeout" and records[5]["ok"] is False
+        assert records[2]["latency_seconds"] is None
+        assert records[1]["latency_seconds"] == pytest.approx(0.5)
+        assert records[7]["timestamp"] == 1700000007.0
+
+    def test_rotation_by_size(self, tmp_path):
+        """Segments roll over at the size limit and are read back in order."""
+        writer = RunLogWriter(tmp_path, run_id="run1", max_segment_bytes=2000, batch_size=10)
+        writer.start()
+        for i in range(200):
+            writer.write(make_record(i))
+        writer.close()
+
+        assert len(segment_files(tmp_path)) > 1
+        assert [r["message"] for r in iter_records(tmp_path)] == [f"Pergunta {i}" for i in range(200)]
+
+    def test_truncated_segment_is_tolerated(self, tmp_path):
+        """A segment cut mid-record yields the complete records before the cut."""
+        writer = RunLogWriter(tmp_path, run_id="run1")
+        writer.start()
+        for i in range(20):
+            writer.write(make_record(i))
+        writer.close()
+        segment = segment_files(tmp_path)[0]
+        import gzip
+        raw = gzip.decompress(segment.read_bytes())
+        segment.write_bytes(gzip.compress(raw[:-7]))
+
+        assert len(list(iter_records(segment))) == 19
@@ -0,0 +1,56 @@
+"""
+Tests for the local Darcy stand-in server.
+"""
+
+import sys
+import os
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from http_automator import HttpChatbotClient
+from mock_darcy import MockBehavior, MockServer, create_app
+
+
+class TestMockDarcy:
+    """Tests for the mock chatbot server."""
+
+    def test_pages_match_default_selectors(self):
+        """The outer page embeds #tool_content and the chat page has a textarea."""
+        client = create_app().test_client()
+        assert 'id="tool_content"' in client.get('/my/').get_data(as_text=True)
+        chat = client.get('/chat').get_data(as_text=True)
+        assert '<textarea' in chat and 'chat-message' in chat and 'bot-message' in chat
+
+    def test_streamed_reply_is_chunked(self):
+        """?stream=1 returns the same reply text in several chunks."""
+        behavior = MockBehavior(latency="fixed", latency_mean=0.0, chunk_interval=0.0, stream_chunks=4)
+        client = create_app(behavior).test_client()
+        resp = client.post('/api/chat?stream=1', json={"message": "oi"})
+        chunks = list(resp.response)
+        assert len(chunks) == 4
+        assert b"".join(chunks).decode("utf-8") == behavior.reply_for("oi")
+
+    def test_http_backend_against_mock(self):
+        """HttpChatbotClient gets replies with the configured latency."""
+        behavior = MockBehavior(latency="fixed", latency_mean=0.1, chunk_interval=0.0)
+        with MockServer(behavior) as server:
+            client = HttpChatbotClient(server.base_url, endpoint=server.base_url + "/api/chat")
+            assert client.start()
+            result = client.send_message("Qual o prazo?")
+            assert result.ok
+            assert "Qual o prazo?" in result.response
+            assert result.complete_seconds >= 0.1
+            assert server.stats["replies"] == 1
+
+    def test_errors_and_rate_limit(self):
+        """error_rate yields 500s and the token bucket yields 429 with Retry-After."""
+        failing = create_app(MockBehavior(latency="fixed", latency_mean=0.0, chunk_interval=0.0,
+                                          error_rate=1.0)).test_client()
+        assert failing.post('/api/chat', json={"message": "oi"}).status_code == 500
+
+        limited = create_app(MockBehavior(latency="fixed", latency_mean=0.0, chunk_interval=0.0,
+                                          rate_limit=1.0, burst=2)).test_client()
+        codes = [limited.post('/api/chat', json={"message": "oi"}).status_code for _ in range(4)]
+        assert codes == [200, 200, 429, 429]
+        assert limited.post('/api/chat', json={"message": "oi"}).headers["Retry-After"] == "1"
@@ -0,0 +1,125 @@
+"""
+Tests for process-sharded execution (HTTP backend against the mock server, no browser).
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from mock_darcy import MockBehavior, MockServer
+from process_shards import ShardedBotManager, read_frame, write_frame
+
+
+def wait_until(predicate, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@pytest.fixture
+def mock_server():
+    behavior = MockBehavior(latency="fixed", latency_mean=0.01, stream_chunks=1, reply_words=5)
+    with MockServer(behavior) as server:
+        yield server
+
+
+@pytest.fixture
+def sharded(tmp_path, mock_server):
+    questions = tmp_path / "questions.txt"
+    questions.write_text("Pergunta A\nPergunta B\n", encoding="utf-8")
+    manager = ShardedBotManager(
+        processes=2,
+        report_seconds=0.2,
+        url=mock_server.base_url + "/my/",
+        questions_file=str(questions),
+        backend="http",
+        http_backend={"endpoint": mock_server.base_url + "/api/chat"},
+        interval_seconds=0.0,
+        jitter=0.0,
+        concurrency=3,
+        wait_for_manual_login=False,
+        log_dir=str(tmp_path / "logs"),
+    )
+    yield manager
+    manager.stop()
+
+
+class TestFrames:
+    """Length-prefixed pickle frames used between parent and shards."""
+
+    def test_round_trip(self):
+        """Frames read back in order; a closed stream raises EOFError."""
+        stream = io.BytesIO()
+        write_frame(stream, ("set", {"jitter": 0.5}))
+        write_frame(stream, ("stop", None))
+        stream.seek(0)
+        assert read_frame(stream) == ("set", {"jitter": 0.5})
+        assert read_frame(stream) == ("stop", None)
+        with pytest.raises(EOFError):
+            read_frame(stream)
+
+
+class TestShardProfile:
+    """Load profile stages split over the shards."""
+
+    def test_stage_concurrency_below_processes(self, tmp_path):
+        """Every shard keeps a session, and each stage's rate follows its session share."""
+        manager = ShardedBotManager(processes=2, url="http://localhost/", concurrency=3,
+                                    questions_file=str(tmp_path / "questions.txt"),
+                                    wait_for_manual_login=False, log_dir=str(tmp_path / "logs"),
+                                    load_profile={"enabled": True, "stages": [
+                                        {"duration": 1, "concurrency": 1, "rate": 3.0},
+                                        {"duration": 1, "concurrency": 3, "rate": 6.0},
+                                        {"duration": 1, "rate": 9.0},
+                                    ]})
+        shards = [manager._shard_profile(index, 2)["stages"] for index in range(2)]
+        concurrency = [[stage.get("concurrency") for stage in stages] for stages in shards]
+        assert concurrency == [[1, 2, None], [1, 1, None]]
+        assert [[stage["rate"] for stage in stages] for stages in shards] == [[1.5, 4.0, 6.0], [1.5, 2.0, 3.0]]
+
+
+class TestShardedBotManager:
+    """Sessions split over processes, counters and histograms merged in the parent."""
+
+    def test_sessions_split_and_metrics_merged(self, sharded, tmp_path):
+        """Both shards send; status, metrics and histograms add up across them."""
+        assert sharded.start()
+        assert not sharded.start()
+        assert wait_until(lambda: all(s.report and s.report["status"]["messages_sent"] >= 2
+                                      for s in sharded._shards) and len(sharded._shards) == 2)
+        status = sharded.status()
+        assert status["running"]
+        assert [s["sessions"] for s in status["shards"]] == [2, 1]
+        assert len(status["workers"]) == 3
+        assert {w["shard"] for w in status["workers"]} == {0, 1}
+        metrics = sharded.metrics()
+        assert metrics["messages_sent"] == sum(s["messages_sent"] for s in status["shards"])
+        assert metrics["latency"]["response"]["count"] > 0
+        assert sharded.export_histograms()["response"]["overall"]["count"] > 0
+        assert sharded.latency_stats["response"].overall.count > 0
+
+        sharded.stop()
+        assert not sharded.is_running
+        assert all(not s.alive for s in sharded._shards)
+        logs = tmp_path / "logs"
+        assert (logs / "messages.shard-0.csv").exists()
+        assert (logs / "messages.shard-1.csv").exists()
+
+    def test_live_settings_are_forwarded(self, sharded):
+        """arrival_rate is split by each shard's share of the sessions."""
+        sharded.mode = "open"
+        sharded.arrival_rate = 3.0
+        assert sharded.start()
+        assert wait_until(lambda: len(sharded._shards) == 2 and all(s.report for s in sharded._shards))
+        sharded.arrival_rate = 6.0
+        assert wait_until(lambda: [round(s.report["metrics"]["open_model"]["target_rate"], 3)
+                                   for s in sharded._shards] == [4.0, 2.0])
+        assert sharded.metrics()["open_model"]["target_rate"] == pytest.approx(6.0)
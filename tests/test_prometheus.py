@@ -0,0 +1,39 @@
+"""
+Tests for the Prometheus text exposition.
+"""
+
+import sys
+import os
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bot_manager import BotManager, SessionWorker
+from latency_histogram import LatencyHistogram
+from prometheus import render_metrics
+
+
+class TestPrometheus:
+    """Tests for render_metrics and cumulative histogram buckets."""
+
+    def test_cumulative_counts(self):
+        """Fine buckets fold into cumulative counts for coarse bounds."""
+        hist = LatencyHistogram()
+        for value in (0.02, 0.3, 0.3, 4.0, 500.0):
+            hist.record(value)
+        assert hist.cumulative_counts([0.05, 0.5, 5.0, 120.0]) == [1, 3, 4, 4]
+
+    def test_render(self):
+        """Counters, labelled errors and histogram series are exposed."""
+        manager = BotManager(url="http://example.invalid", questions_file="questions.txt", concurrency=2)
+        manager._latency["response"].record(0.3)
+        manager._latency["response"].record(3.0)
+        manager._record_error(SessionWorker(worker_id=0), "boom", "TimeoutException")
+        text = render_metrics(manager)
+        assert "# TYPE darcy_bot_messages_sent_total counter" in text
+        assert 'darcy_bot_errors_total{type="TimeoutException"} 1' in text
+        assert "darcy_bot_concurrency 2" in text
+        assert 'darcy_bot_latency_seconds_bucket{phase="response",le="0.5"} 1' in text
+        assert 'darcy_bot_latency_seconds_bucket{phase="response",le="+Inf"} 2' in text
+        assert 'darcy_bot_latency_seconds_count{phase="response"} 2' in text
+        assert text.endswith("\n")
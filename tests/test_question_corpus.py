@@ -0,0 +1,51 @@
+"""
+Tests for the change-driven question corpus.
+"""
+
+import os
+import sys
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from question_corpus import QuestionCorpus
+
+
+class TestQuestionCorpus:
+    """Tests for QuestionCorpus."""
+
+    def test_unchanged_file_is_not_reread(self, tmp_path):
+        """Repeated reads reuse the loaded tuple until the file changes."""
+        path = tmp_path / "questions.txt"
+        path.write_text("A\n\n  B  \n", encoding="utf-8")
+        corpus = QuestionCorpus(path, check_interval=0)
+        assert corpus.current() == ("A", "B")
+        for _ in range(50):
+            corpus.current()
+        assert corpus.loads == 1
+
+        os.replace(_write(tmp_path / "new.txt", "C\n"), path)  # new inode, like an editor save
+        assert corpus.current() == ("C",)
+        assert corpus.loads == 2
+
+    def test_bad_reload_keeps_previous_questions(self, tmp_path):
+        """An empty or missing file keeps the last good corpus."""
+        path = _write(tmp_path / "questions.txt", "A\n")
+        corpus = QuestionCorpus(path, check_interval=0)
+        assert corpus.current() == ("A",)
+        path.write_text("", encoding="utf-8")
+        assert corpus.reload() is False
+        assert corpus.current() == ("A",)
+        path.unlink()
+        assert corpus.current() == ("A",)
+        assert corpus.last_error
+
+    def test_missing_file_uses_fallback(self, tmp_path):
+        """Without any questions the fallback greeting is used."""
+        corpus = QuestionCorpus(tmp_path / "missing.txt")
+        assert corpus.choice() == "Olá, tudo bem?"
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
@@ -0,0 +1,81 @@
+"""
+Unit tests for the AIMD rate controller.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from rate_controller import AimdRateController
+
+
+def make_controller(**kwargs):
+    options = dict(slo_p95_seconds=2.0, slo_error_rate=0.1, min_rate=0.5, max_rate=3.0,
+                   increase_step=0.5, decrease_factor=0.5, min_samples=3)
+    options.update(kwargs)
+    controller = AimdRateController(**options)
+    controller.reset(2.0)
+    return controller
+
+
+class TestAimdRateController:
+    """Decisions taken from one period's sends, errors and p95."""
+
+    def test_increase_within_slo(self):
+        """Healthy period: the rate grows by increase_step."""
+        controller = make_controller()
+        decision = controller.update(sent=20, errors=0, p95=1.0, elapsed=10.0)
+        assert decision["action"] == "increase"
+        assert controller.rate == 2.5
+        assert controller.adjustments == 1
+
+    def test_decrease_on_p95_breach(self):
+        """p95 above the SLO multiplies the rate by decrease_factor."""
+        controller = make_controller()
+        decision = controller.update(sent=20, errors=0, p95=3.0, elapsed=10.0)
+        assert decision["action"] == "decrease"
+        assert controller.rate == 1.0
+        assert "p95" in decision["reason"]
+
+    def test_decrease_on_errors_even_with_few_samples(self):
+        """The error SLO is checked before waiting for min_samples."""
+        controller = make_controller()
+        decision = controller.update(sent=1, errors=2, p95=None, elapsed=10.0)
+        assert decision["action"] == "decrease"
+        assert decision["error_rate"] == pytest.approx(2 / 3)
+
+    def test_waits_for_min_samples(self):
+        """Too few replies and no breach: no decision yet."""
+        controller = make_controller()
+        assert controller.update(sent=2, errors=0, p95=0.5, elapsed=10.0) is None
+        assert controller.rate == 2.0
+        assert controller.state()["history"] == []
+
+    def test_hold_when_sessions_saturated(self):
+        """Not raised while the achieved rate stays well below the target."""
+        controller = make_controller()
+        decision = controller.update(sent=5, errors=0, p95=0.5, elapsed=10.0)
+        assert decision["action"] == "hold"
+        assert controller.rate == 2.0
+        assert controller.adjustments == 0
+
+    def test_clamped_to_limits(self):
+        """The rate never leaves [min_rate, max_rate]; a move blocked by a limit is a hold."""
+        controller = make_controller(initial_rate=10.0)
+        assert controller.reset(1.0) == 3.0
+        decision = controller.update(sent=40, errors=0, p95=0.5, elapsed=10.0)
+        assert decision["action"] == "hold"
+        assert "at limit" in decision["reason"]
+        for _ in range(5):
+            controller.update(sent=40, errors=0, p95=9.0, elapsed=10.0)
+        assert controller.rate == 0.5
+
+    def test_invalid_settings_are_rejected(self):
+        """decrease_factor must shrink the rate and min_rate must not exceed max_rate."""
+        with pytest.raises(ValueError):
+            AimdRateController(decrease_factor=1.5)
+        with pytest.raises(ValueError):
+            AimdRateController.from_dict({"enabled": True, "min_rate": 4, "max_rate": 2})
@@ -0,0 +1,89 @@
+"""
+Tests for traffic replay sources and the replay schedule in the open-model scheduler.
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from load_scheduler import OpenLoadScheduler
+from replay import ReplaySource, iter_csv_messages
+
+
+@pytest.fixture
+def recorded_csv(tmp_path):
+    path = tmp_path / "replay.csv"
+    path.write_text(
+        "timestamp_utc,message,response,worker_id,ok\n"
+        "2025-01-01T12:00:00,primeira,r,0,True\n"
+        "2025-01-01T12:00:02,segunda,r,1,True\n"
+        "2025-01-01T12:00:01,fora de ordem,r,0,True\n"
+        "2025-01-01T12:00:06,,r,0,False\n"
+        "2025-01-01T12:00:10,terceira,r,0,True\n",
+        encoding="utf-8"
+    )
+    return path
+
+
+class TestReplaySource:
+    """Tests for ReplaySource."""
+
+    def test_csv_rows_are_parsed_as_utc(self, recorded_csv):
+        """Naive timestamps are UTC and rows without a message are skipped."""
+        rows = list(iter_csv_messages(recorded_csv))
+        assert [m for _, m in rows] == ["primeira", "segunda", "fora de ordem", "terceira"]
+        assert rows[0][0] == 1735732800.0
+
+    def test_offsets_follow_the_recording_scaled_by_speed(self, recorded_csv):
+        """Gaps are divided by speed and never go backwards."""
+        source = ReplaySource(recorded_csv, speed=2.0)
+        assert list(source) == [(0.0, "primeira"), (1.0, "segunda"), (1.0, "fora de ordem"), (5.0, "terceira")]
+        assert source.stats()["rows_read"] == 4
+        assert source.stats()["passes"] == 1
+
+    def test_as_fast_as_possible_and_loop(self, recorded_csv):
+        """speed 0 yields offset 0; loop continues the timeline on the next pass."""
+        assert {offset for offset, _ in ReplaySource(recorded_csv, speed=0)} == {0.0}
+        looped = ReplaySource(recorded_csv, loop=True)
+        first_eight = [item for item, _ in zip(looped, range(8))]
+        assert first_eight[4] == (10.0, "primeira")
+        assert first_eight[7][0] == 20.0
+
+    def test_shards_split_rows_on_one_timeline(self, recorded_csv):
+        """Shards take alternating rows and keep the offsets of the whole recording."""
+        first = list(ReplaySource(recorded_csv, shard=(0, 2)))
+        second = list(ReplaySource(recorded_csv, shard=(1, 2)))
+        assert first == [(0.0, "primeira"), (1.0, "fora de ordem")]
+        assert second == [(2.0, "segunda"), (10.0, "terceira")]
+
+    def test_missing_columns_are_rejected(self, tmp_path):
+        """A CSV without timestamps cannot be replayed."""
+        path = tmp_path / "bad.csv"
+        path.write_text("message\noi\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            list(iter_csv_messages(path))
+
+
+class TestReplaySchedule:
+    """Tests for OpenLoadScheduler driven by a replay schedule."""
+
+    def test_schedule_is_sent_in_order_and_ends(self, recorded_csv):
+        """Every message is sent once, in order, and run() returns at the end of the log."""
+        sent = []
+        scheduler = OpenLoadScheduler(["s1", "s2"], lambda s, at, message: sent.append(message), rate=1,
+                                      schedule=ReplaySource(recorded_csv, speed=0), backpressure=True,
+                                      max_backlog=1)
+        stop = threading.Event()
+        thread = threading.Thread(target=scheduler.run, args=(stop,), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert sorted(sent) == sorted(["primeira", "segunda", "fora de ordem", "terceira"])
+        stats = scheduler.stats()
+        assert stats["schedule_exhausted"]
+        assert stats["slots_missed"] == 0
+        assert stats["completed"] == 4
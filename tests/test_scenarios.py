@@ -0,0 +1,62 @@
+"""
+Tests for conversation scenarios and the alias-table sampler.
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scenarios import AliasSampler, ScenarioSet
+
+
+class TestAliasSampler:
+    """Tests for AliasSampler."""
+
+    def test_frequencies_follow_weights(self):
+        """Sample frequencies converge to the normalised weights."""
+        weights = [5, 2, 1, 0, 12]
+        sampler = AliasSampler(weights)
+        rng = random.Random(3)
+        counts = [0] * len(weights)
+        n = 200000
+        for _ in range(n):
+            counts[sampler.sample(rng)] += 1
+        for w, c in zip(weights, counts):
+            assert abs(c / n - w / sum(weights)) < 0.005
+
+    def test_rejects_empty_weights(self):
+        """No weights (or all zero) is an error."""
+        with pytest.raises(ValueError):
+            AliasSampler([])
+        with pytest.raises(ValueError):
+            AliasSampler([0, 0])
+
+
+class TestScenarioSet:
+    """Tests for parsing the scenarios file."""
+
+    def test_from_dict(self):
+        """Steps inherit think times from the scenario, then from defaults."""
+        scenarios = ScenarioSet.from_dict({
+            "defaults": {"think_time": [1, 2]},
+            "scenarios": [
+                {"name": "a", "weight": 2, "steps": ["oi", {"message": "e aí?", "think_time": 7}]},
+                {"name": "b", "think_time": [3, 4], "steps": ["tchau"]},
+                {"name": "vazio", "steps": []},
+            ],
+        })
+        assert [s.name for s in scenarios.scenarios] == ["a", "b"]
+        a, b = scenarios.scenarios
+        assert a.steps[0].think_time == (1.0, 2.0)
+        assert a.steps[1].think_time == (7.0, 7.0)
+        assert b.steps[0].think_time == (3.0, 4.0)
+        assert b.weight == 1.0
+
+    def test_example_file_loads(self):
+        """The shipped example file is valid."""
+        path = os.path.join(os.path.dirname(__file__), '..', 'scenarios.example.yaml')
+        assert len(ScenarioSet.load(path)) == 3